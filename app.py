@@ -12,6 +12,7 @@
 from PIL import Image, ImageTk
 import sys
 import traceback
+import multiprocessing
 import logging
 from datetime import datetime
 from config import get_config
@@ -196,4 +197,6 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # Required for the export render pool in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     main() 
\ No newline at end of file
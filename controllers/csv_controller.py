@@ -1,8 +1,39 @@
 import os
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Optional
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 import shutil
 from config import get_config
+from utils import columnar_cache
+
+# Rows per batch when streaming a data source; keeps memory flat on huge files
+DEFAULT_CHUNK_ROWS = 5000
+
+def read_csv_batches(file_path, chunk_rows: int = DEFAULT_CHUNK_ROWS, start_row: int = 0,
+                     end_row: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """Stream rows start_row..end_row (0-based, end exclusive) of a CSV file in batches
+
+    Cells are read as text, so a column is stringified the same way in every
+    batch no matter which values happen to share a batch. Rows are labelled
+    with their 0-based position among the file's data rows.
+    """
+    if end_row is not None and end_row <= start_row:
+        return
+    # Rows are counted as parsed records: skipping lines instead would miscount
+    # quoted multi-line cells and blank lines, so earlier rows are parsed and dropped
+    reader = pd.read_csv(
+        file_path,
+        dtype=str,
+        chunksize=chunk_rows,
+        nrows=end_row
+    )
+    with reader:
+        for chunk in reader:
+            if start_row:
+                if chunk.index[-1] < start_row:
+                    continue
+                chunk = chunk.loc[start_row:]
+            yield chunk
 
 class CSVController:
     def __init__(self):
@@ -23,6 +54,8 @@ def import_csv(self, file_path: str) -> bool:
             destination = os.path.join(self.data_dir, filename)
             shutil.copy2(file_path, destination)
             
+            # Parse once now so later loads read the typed columnar sidecar
+            columnar_cache.build(destination)
             return True
             
         except Exception as e:
@@ -42,18 +75,88 @@ def load_csv(self, filename: str) -> Optional[pd.DataFrame]:
         try:
             file_path = os.path.join(self.data_dir, filename)
             if os.path.exists(file_path):
-                return pd.read_csv(file_path)
+                return columnar_cache.read_frame(file_path)
             return None
             
         except Exception as e:
             print(f"Error loading CSV: {e}")
             return None
     
+    def iter_batches(self, filename: str, chunk_rows: int = DEFAULT_CHUNK_ROWS, start_row: int = 0,
+                     end_row: Optional[int] = None,
+                     row_filter: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+                     row_ranges: Optional[List[Tuple[int, int]]] = None,
+                     rows: Optional[np.ndarray] = None) -> Iterator[pd.DataFrame]:
+        """Stream a data source as row batches, selecting rows on the way
+
+        start_row/end_row pick a range of file rows before anything else.
+        rows keeps only the given sorted 0-based file row positions, as
+        found by a DataQuery. row_filter is applied to each batch, and
+        row_ranges then keeps (start, end) positions counted over the
+        filtered rows. Empty batches are skipped, and reading stops once every
+        row range and every listed row has been passed.
+        """
+        file_path = os.path.join(self.data_dir, filename)
+        last_position = max((end for _, end in row_ranges), default=0) if row_ranges else None
+        position = 0
+        if rows is not None:
+            if not len(rows):
+                return
+            # Nothing before the first wanted row needs parsing
+            start_row = max(start_row, int(rows[0]))
+            end_row = int(rows[-1]) + 1 if end_row is None else min(end_row, int(rows[-1]) + 1)
+        file_row = start_row
+        for batch in read_csv_batches(file_path, chunk_rows, start_row, end_row):
+            if rows is not None:
+                # Wanted rows inside this batch, by binary search
+                batch_start = file_row
+                file_row += len(batch)
+                first, last = np.searchsorted(rows, [batch_start, file_row])
+                batch = batch.iloc[rows[first:last] - batch_start]
+            if row_filter is not None:
+                batch = row_filter(batch)
+            if row_ranges:
+                # Keep the slice of each range that falls inside this batch
+                mask = pd.Series(False, index=batch.index)
+                for start, end in row_ranges:
+                    mask.iloc[max(0, start - position):max(0, end - position)] = True
+                position += len(batch)
+                batch = batch[mask]
+            if len(batch):
+                yield batch
+            if last_position is not None and position >= last_position:
+                break
+    
+    def estimate_rows(self, filename: str) -> int:
+        """Count data rows, exactly from the columnar metadata or else by scanning for line breaks
+
+        The scan counts quoted multi-line cells more than once, so it is an estimate.
+        """
+        file_path = os.path.join(self.data_dir, filename)
+        rows = columnar_cache.read_row_count(file_path)
+        if rows is not None:
+            return rows
+        lines = 0
+        last = b"\n"
+        with open(file_path, 'rb') as f:
+            while True:
+                block = f.read(1024 * 1024)
+                if not block:
+                    break
+                lines += block.count(b"\n")
+                last = block[-1:]
+        if last != b"\n":
+            lines += 1
+        # Minus the header line
+        return max(0, lines - 1)
+    
     def save_csv(self, filename: str, data: pd.DataFrame) -> bool:
         """Save DataFrame to CSV file"""
         try:
             file_path = os.path.join(self.data_dir, filename)
             data.to_csv(file_path, index=False)
+            # Re-parse the written file so the sidecar holds the types a fresh load would infer
+            columnar_cache.build(file_path)
             return True
             
         except Exception as e:
@@ -63,9 +166,10 @@ def save_csv(self, filename: str, data: pd.DataFrame) -> bool:
     def get_columns(self, filename: str) -> List[str]:
         """Get column names from CSV file"""
         try:
-            df = self.load_csv(filename)
-            if df is not None:
-                return list(df.columns)
+            file_path = os.path.join(self.data_dir, filename)
+            if os.path.exists(file_path):
+                # Metadata when fresh, otherwise just the header row
+                return columnar_cache.read_columns(file_path)
             return []
             
         except Exception as e:
@@ -75,9 +179,9 @@ def get_columns(self, filename: str) -> List[str]:
     def get_data_preview(self, filename: str, rows: int = 5) -> Optional[pd.DataFrame]:
         """Get preview of CSV data"""
         try:
-            df = self.load_csv(filename)
-            if df is not None:
-                return df.head(rows)
+            file_path = os.path.join(self.data_dir, filename)
+            if os.path.exists(file_path):
+                return columnar_cache.read_head(file_path, rows)
             return None
             
         except Exception as e:
@@ -90,6 +194,7 @@ def delete_csv(self, filename: str) -> bool:
             file_path = os.path.join(self.data_dir, filename)
             if os.path.exists(file_path):
                 os.remove(file_path)
+                columnar_cache.remove(file_path)
                 return True
             return False
             
@@ -108,14 +213,15 @@ def validate_csv(self, file_path: str) -> Dict[str, any]:
             if not file_path.lower().endswith('.csv'):
                 return {"valid": False, "error": "Not a CSV file"}
             
-            # Try to read file
-            df = pd.read_csv(file_path)
+            # Try to read file; streamed, since it is not imported yet and may be large
+            columns = columnar_cache.read_columns(file_path)
+            rows = sum(len(batch) for batch in read_csv_batches(file_path))
             
             return {
                 "valid": True,
-                "rows": len(df),
-                "columns": len(df.columns),
-                "column_names": list(df.columns)
+                "rows": rows,
+                "columns": len(columns),
+                "column_names": columns
             }
             
         except Exception as e:
@@ -5,22 +5,13 @@
 from models.template_manager import TemplateManager
 from controllers.component_controller import ComponentController
 from typing import Optional, List
-import pandas as pd
 from PIL import Image, ImageTk
-import base64
-import io
-import customtkinter as ctk
 from config import get_config
-
-try:
-    from views.component_editor.canvas_manager import CanvasManager
-    from views.component_editor.element_manager import ElementManager
-    from views.component_editor.events.event_manager import EventManager   
-except ImportError:
-    # Fallback imports if the component_editor module isn't in the expected location
-    from ..views.component_editor.canvas_manager import CanvasManager
-    from ..views.component_editor.element_manager import ElementManager
-    from ..views.component_editor.events.event_manager import EventManager
+from utils.image_processor import ImageProcessor
+from utils.card_instance import CardInstance
+from utils.render_cache import get_render_cache
+from controllers.csv_controller import read_csv_batches
+from utils import columnar_cache
 import tkinter as tk
 
 class TemplateController:
@@ -28,6 +19,7 @@ def __init__(self, db_manager):
         self.config = get_config()  # Get config instance
         self.template_manager = TemplateManager(db_manager)
         self.component_controller = ComponentController(db_manager)
+        self.image_processor = ImageProcessor()
     def save_template(self, name: str, template_data: dict) -> bool:
         """Save a component template"""
         return self.template_manager.save_template(name, template_data)
@@ -120,40 +112,52 @@ def edit_template(self, template_id: str, template_data: dict) -> bool:
         """Edit an existing template"""
         return self.update_template(template_id, template_data)
     
-    def create_from_csv(self, template_name: str, csv_file: str, mappings: dict) -> bool:
-        """Create components from CSV data source"""
+    def create_from_csv(self, template_name: str, csv_file: str, mappings: dict):
+        """Create components from CSV data source, one list of CardInstances per batch of rows"""
         try:
             # Load template
             template = self.load_template(template_name)
             if not template:
                 return False
             
-            # Load CSV data
-            data_path = self.config.USER_DATA_DIR / "data" / csv_file
-            df = pd.read_csv(data_path)
+            # Find the element each mapped column writes to
+            targets = []
+            for csv_col, template_field in mappings.items():
+                for index, element in enumerate(template['elements']):
+                    if element.get('id') == template_field:
+                        if element['type'] == 'text':
+                            targets.append((csv_col, index))
+                        # Add other element type handling as needed
             
-            # Create components for each row
-            components = []
-            for _, row in df.iterrows():
-                component_data = template.copy()
-                
-                # Apply mappings
-                for csv_col, template_field in mappings.items():
-                    # Find and update the element with matching field
-                    for element in component_data['elements']:
-                        if element.get('id') == template_field:
-                            if element['type'] == 'text':
-                                element['text'] = str(row[csv_col])
-                            # Add other element type handling as needed
-                
-                components.append(component_data)
+            # Check the file and its columns now, so errors surface before any component is made
+            data_path = self.config.USER_DATA_DIR / "data" / csv_file
+            columns = columnar_cache.read_columns(data_path)
+            missing = [csv_col for csv_col, _ in targets if csv_col not in columns]
+            if missing:
+                print(f"Error creating components from CSV: missing columns {', '.join(missing)}")
+                return False
             
-            return components
+            # Stream the CSV data in batches; the caller holds one batch of components at a time
+            return self._iter_csv_components(template, targets, data_path)
             
         except Exception as e:
             print(f"Error creating components from CSV: {e}")
             return False
     
+    def _iter_csv_components(self, template: dict, targets: list, data_path):
+        """Yield the components for each batch of CSV rows"""
+        for batch in read_csv_batches(data_path):
+            columns = {csv_col: batch[csv_col].tolist() for csv_col, _ in targets}
+            components = []
+            for position in range(len(batch)):
+                # Apply mappings as per-row overrides on the shared template
+                overrides = {
+                    (index, 'text'): str(columns[csv_col][position])
+                    for csv_col, index in targets
+                }
+                components.append(CardInstance(template, overrides))
+            yield components
+    
     def create_from_component(self, component_id: str) -> bool:
         """Create a template from an existing component"""
         try:
@@ -212,219 +216,51 @@ def create_from_component(self, component_id: str) -> bool:
             traceback.print_exc()
             return False
     
+    def render_template_image(self, template_data: dict) -> Image.Image:
+        """Render template (or mapped card) data to an in-memory RGBA image"""
+        return self.image_processor.render_template(template_data)
+    
+    def render_cached_image(self, template_data: dict) -> Image.Image:
+        """Render card data, reusing an identical card from the render cache's memory tier"""
+        # Callers save the image themselves, so a disk copy in the cache would only duplicate it
+        return get_render_cache().get_or_render(template_data, self.render_template_image, persist=False)
+    
     def export_template_image(self, template_data: dict, output_path: str, preview_frame=None) -> bool:
-        """Export template as image using canvas rendering"""
+        """Export template as image using the headless renderer"""
         try:
-            # Create a dialog window for rendering
-            dialog = ctk.CTkToplevel()
-            dialog.title("Rendering...")
-            
-            # Get actual dimensions
-            actual_width = template_data['dimensions'].get('actual_width', template_data['dimensions']['width'])
-            actual_height = template_data['dimensions'].get('actual_height', template_data['dimensions']['height'])
-            background_color = template_data.get('background_color', 'white')
-            
-            # Position dialog in center of screen
-            screen_width = dialog.winfo_screenwidth()
-            screen_height = dialog.winfo_screenheight()
-            x = (screen_width - actual_width) // 2
-            y = (screen_height - actual_height) // 2
-            dialog.geometry(f"{actual_width}x{actual_height}+{x}+{y}")
-            
-            # Prevent dialog from being resized or moved
-            dialog.resizable(False, False)
-            dialog.overrideredirect(True)  # Remove window decorations
-            
-            # Keep dialog on top of other windows
-            dialog.attributes('-topmost', True)
-            dialog.lift()
-            dialog.focus_force()
-            
-            # Create a frame with fixed dimensions
-            render_frame = ctk.CTkFrame(dialog, width=actual_width, height=actual_height)
-            render_frame.pack_propagate(False)  # Prevent frame from shrinking
-            render_frame.pack(padx=0, pady=0)
+            image = self.render_cached_image(template_data)
+            image.save(output_path, 'PNG')
             
-            # Create internal canvas for final rendering
-            internal_canvas = tk.Canvas(
-                render_frame,
-                width=actual_width,
-                height=actual_height,
-                highlightthickness=0,
-                background=background_color
-            )
-            internal_canvas.pack(expand=False, fill=None)
+            # Update preview if provided
+            if preview_frame:
+                self.show_preview(image, preview_frame)
             
-            # Initialize managers
-            event_manager = EventManager()
-            element_manager = ElementManager(event_manager, dialog)
-            canvas_manager = CanvasManager(render_frame, event_manager, element_manager)
+            return True
             
-            # Configure canvas with explicit dimensions
-            canvas = canvas_manager.canvas
-            canvas.configure(width=actual_width, height=actual_height)
-            canvas.pack(expand=False, fill=None)  # Don't allow canvas to resize
-            
-            # Force dialog update and ensure it stays on top
-            dialog.update_idletasks()
-            dialog.lift()
-            
-            try:
-                # Render elements at actual size and get rendered canvas
-                rendered_canvas = canvas_manager.render_elements_ondemand(template_data['elements'], exporting=True)
-                
-                # Copy rendered content to internal canvas
-                internal_canvas.delete('all')
-                for item in rendered_canvas.find_all():
-                    # Get item type and coordinates
-                    item_type = rendered_canvas.type(item)
-                    coords = rendered_canvas.coords(item)
-                    
-                    # Copy item properties
-                    config = {key: rendered_canvas.itemcget(item, key) 
-                            for key in rendered_canvas.itemconfig(item)}
-                    
-                    # Create same item on internal canvas based on type
-                    print("=== item_type", item_type)
-                    try:
-                        if item_type == "line":
-                            if len(coords) >= 4:  # Ensure we have enough coordinates
-                                internal_canvas.create_line(*coords, **config)
-                        elif item_type == "text":
-                            internal_canvas.create_text(*coords, **config)
-                        elif item_type == "image":
-                            internal_canvas.create_image(*coords, **config)
-                        elif item_type == "rectangle":
-                            internal_canvas.create_rectangle(*coords, **config)
-                        # Add other types as needed
-                    except Exception as e:
-                        print(f"Error copying item type {item_type}: {e}")
-                        continue
-                
-                # Multiple update cycles to ensure complete rendering
-                for _ in range(3):
-                    internal_canvas.update_idletasks()
-                    dialog.update_idletasks()
-                    dialog.update()
-                    dialog.lift()  # Keep ensuring dialog stays on top
-                
-                # Additional wait for rendering
-                dialog.after(1000)
-                
-                # Get base64 string from internal canvas
-                base64_data = self._canvas_to_base64(internal_canvas)
-                
-                # Save to file
-                self._save_base64_to_file(base64_data, output_path, 'PNG')
-                
-                # Update preview if provided
-                if preview_frame:
-                    for widget in preview_frame.winfo_children():
-                        widget.destroy()
-                    
-                    # Load and verify the saved image
-                    from PIL import Image, ImageTk
-                    preview_img = Image.open(output_path)
-                    
-                    # Verify image dimensions
-                    if preview_img.size == (1, 1):
-                        raise Exception("Generated image is 1x1 pixel - rendering failed")
-                    
-                    # Calculate scaling to fit preview frame
-                    preview_width = preview_frame.winfo_width()
-                    preview_height = preview_frame.winfo_height()
-                    
-                    width_scale = preview_width / actual_width
-                    height_scale = preview_height / actual_height
-                    print("=== width_scale", width_scale)
-                    print("=== height_scale", height_scale)
-                    print("=== actual_width", actual_width)
-                    print("=== actual_height", actual_height)
-                    scale = min(width_scale, height_scale)
-                    print("=== scale", scale)
-                    # Resize preview image
-                    preview_size = (int(actual_width * scale), int(actual_height * scale))
-                    print("=== preview_size", preview_size)
-                    preview_img = preview_img.resize(preview_size, Image.Resampling.LANCZOS)
-                    
-                    # Create and display preview
-                    preview_photo = ImageTk.PhotoImage(preview_img)
-                    preview_label = tk.Label(preview_frame, image=preview_photo)
-                    preview_label.image = preview_photo  # Keep a reference
-                    preview_label.pack(expand=True)
-                
-                return True
-                
-            finally:
-                # Clean up
-                dialog.destroy()  # Commented out to keep dialog visible
-                
         except Exception as e:
             print(f"Error exporting template image: {e}")
             import traceback
             traceback.print_exc()
             return False
-    def _canvas_to_base64(self, canvas):
-        """Convert canvas content to base64 string"""
-        import base64
-        import io
-        from PIL import Image, ImageGrab
+    
+    def show_preview(self, image: Image.Image, preview_frame):
+        """Show a rendered card scaled to fit the preview frame"""
+        for widget in preview_frame.winfo_children():
+            widget.destroy()
         
-        try:
-            # Ensure canvas is fully updated
-            canvas.update_idletasks()
-            canvas.update()
-            
-            # Wait a bit for rendering
-            canvas.after(100)
-            
-            # Get the absolute coordinates of the canvas on screen
-            x = canvas.winfo_rootx()
-            y = canvas.winfo_rooty()
-            width = canvas.winfo_width()
-            height = canvas.winfo_height()
-            
-            # Take a screenshot of the exact canvas area
-            # Add a small offset to account for any borders
-            img = ImageGrab.grab(
-                bbox=(
-                    x ,  # Add small offset to avoid border
-                    y ,  # Add small offset to avoid border
-                    x + width,
-                    y + height
-                ),
-                include_layered_windows=True  # This helps with some rendering issues
-            )
-            
-            # Save image to bytes buffer
-            buffer = io.BytesIO()
-            img.save(buffer, format='PNG')
-            buffer.seek(0)
-            
-            # Convert to base64
-            base64_string = base64.b64encode(buffer.getvalue()).decode()
-            
-            return base64_string
-            
-        except Exception as e:
-            print(f"Error converting canvas to base64: {e}")
-            raise
-    def _save_base64_to_file(self, base64_string: str, filename: str, format: str):
-        """Convert base64 string to image file"""
-        import base64
-        from PIL import Image
-        import io
+        # Calculate scaling to fit preview frame
+        preview_width = preview_frame.winfo_width()
+        preview_height = preview_frame.winfo_height()
+        scale = min(preview_width / image.width, preview_height / image.height)
+        if scale <= 0:
+            return
         
-        try:
-            # Decode base64 string to bytes
-            image_data = base64.b64decode(base64_string)
-            
-            # Create PIL Image from bytes
-            image = Image.open(io.BytesIO(image_data))
-            
-            # Save in requested format
-            image.save(filename, format)
-            
-        except Exception as e:
-            print(f"Error saving base64 to file: {e}")
-            raise
\ No newline at end of file
+        # Resize preview image
+        preview_size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+        preview_img = image.resize(preview_size, Image.Resampling.LANCZOS)
+        
+        # Create and display preview
+        preview_photo = ImageTk.PhotoImage(preview_img)
+        preview_label = tk.Label(preview_frame, image=preview_photo)
+        preview_label.image = preview_photo  # Keep a reference
+        preview_label.pack(expand=True)
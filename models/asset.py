@@ -5,6 +5,7 @@
 import os
 from PIL import Image
 import customtkinter as ctk
+from utils.image_cache import get_image_cache
 
 @dataclass
 class Asset:
@@ -107,12 +108,8 @@ def preview_image(self) -> Optional[ctk.CTkImage]:
                 
                 # Load and process the image
                 print(f"Loading image from: {self.file_path}")
-                pil_image = Image.open(self.file_path)
-                original_size = pil_image.size
-                print(f"Original size: {original_size}")
-                
-                # Create thumbnail
-                pil_image.thumbnail((100, 100))
+                # Create thumbnail from the shared decode cache
+                pil_image = get_image_cache().thumbnail(self.file_path, (100, 100))
                 print(f"Thumbnail size: {pil_image.size}")
                 
                 self._preview_image = ctk.CTkImage(
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests import the app's packages (utils, views, ...) from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,74 @@
+import pytest
+from PIL import Image
+from reportlab.lib.pagesizes import A4
+from utils.pdf_generator import CardSheetWriter, concatenate_pdfs
+
+pypdf = pytest.importorskip('pypdf')
+
+LAYOUT = {
+    'cards_per_row': 2, 'cards_per_page': 4, 'card_width': 63, 'card_height': 88,
+    'margin': 10, 'h_spacing': 2, 'v_spacing': 2
+}
+
+def write_deck(tmp_path, cards, pages_per_part):
+    output = tmp_path / 'deck.pdf'
+    writer_class = type('SmallPartWriter', (CardSheetWriter,), {'pages_per_part': pages_per_part})
+    writer = writer_class(str(output), A4, LAYOUT)
+    for n in range(cards):
+        writer.add_card(Image.new('RGB', (8, 8), (n, 0, 0)))
+    writer.finish()
+    return output
+
+@pytest.mark.parametrize('cards, pages_per_part', [(27, 3), (24, 3), (5, 3), (9, None)])
+def test_parts_join_into_one_document_with_every_page(tmp_path, cards, pages_per_part):
+    output = write_deck(tmp_path, cards, pages_per_part)
+    reader = pypdf.PdfReader(str(output))
+    assert len(reader.pages) == -(-cards // LAYOUT['cards_per_page'])
+    assert all(len(page.images) >= 1 for page in reader.pages)
+    # Part files are cleaned up once joined
+    assert [path.name for path in tmp_path.iterdir()] == ['deck.pdf']
+
+class LinkedWriter(CardSheetWriter):
+    """Every page links to a URL that looks like object references"""
+
+    pages_per_part = 1
+    url = "https://example.com/(3 0 R)/1 0 R"
+
+    def flush_page(self):
+        if self.cards_on_page:
+            self.canvas.linkURL(self.url, (0, 0, 50, 50))
+        super().flush_page()
+
+def test_references_inside_strings_are_copied_unchanged(tmp_path):
+    output = tmp_path / 'deck.pdf'
+    writer = LinkedWriter(str(output), A4, LAYOUT)
+    for n in range(9):
+        writer.add_card(Image.new('RGB', (8, 8), (n, 0, 0)))
+    writer.finish()
+    reader = pypdf.PdfReader(str(output), strict=True)
+    assert len(reader.pages) == 3
+    for page in reader.pages:
+        assert page['/Annots'][0].get_object()['/A']['/URI'] == LinkedWriter.url
+
+def test_abort_removes_the_part_files(tmp_path):
+    writer = CardSheetWriter(str(tmp_path / 'deck.pdf'), A4, LAYOUT)
+    for n in range(9):
+        writer.add_card(Image.new('RGB', (8, 8), (n, 0, 0)))
+    assert len(writer.part_paths) == 3 and any(tmp_path.iterdir())
+    writer.abort()
+    assert list(tmp_path.iterdir()) == []
+
+def test_parts_not_written_by_reportlab_are_refused(tmp_path):
+    part = write_deck(tmp_path, 1, None)
+    data = part.read_bytes()
+    # Same file with one object claiming generation 1
+    entry = data.index(b" 00000 n ", data.rindex(b"\nxref\n"))
+    bumped = tmp_path / 'bumped.pdf'
+    bumped.write_bytes(data[:entry] + b" 00001 n " + data[entry + 9:])
+    # A cross-reference stream instead of a classic table
+    xref_stream = tmp_path / 'stream.pdf'
+    xref_stream.write_bytes(b"%PDF-1.5\n1 0 obj\n<< /Type /XRef /Size 2 >>\nendobj\nstartxref\n9\n%%EOF\n")
+
+    for path in (bumped, xref_stream):
+        with pytest.raises(ValueError):
+            concatenate_pdfs([str(part), str(path)], str(tmp_path / 'joined.pdf'))
@@ -0,0 +1,57 @@
+import os
+import pytest
+from utils import columnar_cache
+
+def write_csv(path, text):
+    path.write_text(text, encoding='utf-8')
+    return path
+
+def test_first_read_builds_a_sidecar_with_metadata(tmp_path):
+    csv_path = write_csv(tmp_path / 'cards.csv', "name,cost\nGoblin,2\nDragon,7\n")
+    assert columnar_cache.load_metadata(csv_path) is None
+
+    df = columnar_cache.read_frame(csv_path)
+    assert df['cost'].tolist() == [2, 7]
+    meta = columnar_cache.load_metadata(csv_path)
+    assert meta['columns'] == ['name', 'cost'] and meta['rows'] == 2
+    assert columnar_cache.read_columns(csv_path) == ['name', 'cost']
+    assert columnar_cache.read_row_count(csv_path) == 2
+
+def test_sidecar_matches_the_csv_and_selects_columns(tmp_path):
+    csv_path = write_csv(tmp_path / 'cards.csv', "name,cost\nGoblin,2\nDragon,7\n")
+    columnar_cache.build(csv_path)
+    df = columnar_cache.read_frame(csv_path, columns=['name'])
+    assert list(df.columns) == ['name'] and df['name'].tolist() == ['Goblin', 'Dragon']
+    assert columnar_cache.read_head(csv_path, 1)['name'].tolist() == ['Goblin']
+
+def test_edited_csv_makes_the_sidecar_stale(tmp_path):
+    csv_path = write_csv(tmp_path / 'cards.csv', "name,cost\nGoblin,2\n")
+    columnar_cache.build(csv_path)
+    write_csv(csv_path, "name,cost\nGoblin,2\nDragon,7\nTroll,4\n")
+    assert columnar_cache.read_row_count(csv_path) is None
+
+    assert columnar_cache.read_frame(csv_path)['name'].tolist() == ['Goblin', 'Dragon', 'Troll']
+    assert columnar_cache.read_row_count(csv_path) == 3
+
+def test_remove_deletes_the_sidecar(tmp_path):
+    csv_path = write_csv(tmp_path / 'cards.csv', "name\nGoblin\n")
+    columnar_cache.build(csv_path)
+    columnar_cache.remove(csv_path)
+    assert columnar_cache.load_metadata(csv_path) is None
+    assert not any(os.scandir(tmp_path / columnar_cache.SIDECAR_DIR))
+
+def test_feather_sidecar_is_read_without_parsing_the_csv(tmp_path, monkeypatch, capsys):
+    pytest.importorskip('pyarrow')
+    csv_path = write_csv(tmp_path / 'cards.csv', "name,cost\nGoblin,2\nDragon,7\nTroll,4\n")
+    columnar_cache.build(csv_path)
+    assert columnar_cache.load_metadata(csv_path)['format'] == 'feather'
+
+    def fail_read_csv(*args, **kwargs):
+        raise AssertionError("CSV parsed despite a fresh sidecar")
+    monkeypatch.setattr(columnar_cache.pd, 'read_csv', fail_read_csv)
+
+    df = columnar_cache.read_frame(csv_path)
+    assert df['name'].tolist() == ['Goblin', 'Dragon', 'Troll'] and df['cost'].tolist() == [2, 7, 4]
+    assert columnar_cache.read_frame(csv_path, columns=['cost'])['cost'].tolist() == [2, 7, 4]
+    assert columnar_cache.read_head(csv_path, 2)['name'].tolist() == ['Goblin', 'Dragon']
+    assert capsys.readouterr().out == ""
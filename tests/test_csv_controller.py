@@ -0,0 +1,41 @@
+import pytest
+from controllers.csv_controller import CSVController, read_csv_batches
+from utils.data_query import get_query
+
+# A quoted cell spanning three lines and a blank line come before the later rows
+MULTILINE_CSV = 'name,text\na,"l1\n\nl2"\n\nb,x\nc,y\nd,z\ne,w\n'
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'cards.csv'
+    path.write_text(MULTILINE_CSV, encoding='utf-8')
+    return path
+
+@pytest.fixture
+def controller(tmp_path):
+    controller = CSVController.__new__(CSVController)
+    controller.data_dir = tmp_path
+    return controller
+
+def _rows(batches):
+    return [(row, name) for batch in batches for row, name in batch['name'].items()]
+
+def test_start_row_counts_records_not_lines(csv_path):
+    assert _rows(read_csv_batches(csv_path, chunk_rows=2, start_row=2)) == [(2, 'c'), (3, 'd'), (4, 'e')]
+    assert _rows(read_csv_batches(csv_path, chunk_rows=2, start_row=1, end_row=3)) == [(1, 'b'), (2, 'c')]
+    assert _rows(read_csv_batches(csv_path, start_row=3, end_row=3)) == []
+
+def test_batches_cover_every_record_once(csv_path):
+    assert _rows(read_csv_batches(csv_path, chunk_rows=2)) == [
+        (0, 'a'), (1, 'b'), (2, 'c'), (3, 'd'), (4, 'e')
+    ]
+    first = next(read_csv_batches(csv_path))
+    assert first['text'][0] == 'l1\n\nl2'
+
+def test_filtered_rows_export_the_matching_records(csv_path, controller):
+    rows = get_query(csv_path).positions('name = d')
+    assert rows.tolist() == [3]
+    assert _rows(controller.iter_batches('cards.csv', chunk_rows=2, rows=rows)) == [(3, 'd')]
+
+    rows = get_query(csv_path).positions('name in (a, c, e)')
+    assert _rows(controller.iter_batches('cards.csv', chunk_rows=2, rows=rows)) == [(0, 'a'), (2, 'c'), (4, 'e')]
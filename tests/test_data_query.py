@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+from utils.data_query import And, Comparison, DataQuery, QueryError, get_query, parse_query
+
+@pytest.fixture
+def query():
+    data = pd.DataFrame({
+        'name': ['Fire Bolt', 'Ice Wall', 'Goblin', 'fire drake', None, 'Stone'],
+        'type': ['Spell', 'Creature', 'Creature', 'Creature', 'Land', 'Land'],
+        'cost': [1, 3, 2, 5, np.nan, 0],
+        'power': ['', '0', '2', '4', 'x', '10']
+    })
+    return DataQuery(data)
+
+def _rows(query, text):
+    return query.positions(text).tolist()
+
+def test_search_matches_any_column_case_insensitively(query):
+    assert _rows(query, 'fire') == [0, 3]
+    assert _rows(query, 'land') == [4, 5]
+
+def test_equality_on_text_and_numbers(query):
+    assert _rows(query, 'type = Creature') == [1, 2, 3]
+    assert _rows(query, 'type == creature') == []
+    assert _rows(query, 'cost = 3') == [1]
+    assert _rows(query, 'cost = 3.0') == [1]
+    assert _rows(query, 'cost = abc') == []
+    assert _rows(query, 'type != Creature') == [0, 4, 5]
+
+def test_numeric_ranges_skip_missing_values(query):
+    assert _rows(query, 'cost >= 2') == [1, 2, 3]
+    assert _rows(query, 'cost < 2') == [0, 5]
+    assert _rows(query, 'cost between 1 and 3') == [0, 1, 2]
+    # Text columns compare the values that parse as numbers
+    assert _rows(query, 'power > 1') == [2, 3, 5]
+    assert _rows(query, 'power between 0 and 2') == [1, 2]
+
+def test_boolean_operators_and_grouping(query):
+    assert _rows(query, 'type = Creature cost > 2') == [1, 3]
+    assert _rows(query, 'type = Creature and cost > 2') == [1, 3]
+    assert _rows(query, 'type = Spell or cost = 5') == [0, 3]
+    assert _rows(query, 'not type = Creature') == [0, 4, 5]
+    assert _rows(query, '(type = Spell or type = Land) and not cost = 0') == [0, 4]
+
+def test_contains_in_and_quoting(query):
+    assert _rows(query, 'name ~ FIRE') == [0, 3]
+    assert _rows(query, 'type in (Spell, Land)') == [0, 4, 5]
+    assert _rows(query, 'name = "Fire Bolt"') == [0]
+    assert _rows(query, "NAME = 'Ice Wall'") == [1]
+
+def test_matches_a_plain_pandas_filter(query):
+    data = query.data
+    expected = np.flatnonzero(((data['type'] == 'Creature') & (data['cost'] >= 2)) | (data['cost'] == 0))
+    assert _rows(query, 'type = Creature and cost >= 2 or cost = 0') == expected.tolist()
+
+def test_parsed_nodes_can_be_built_directly(query):
+    condition = And([Comparison('type', '=', ['Creature']), Comparison('cost', 'between', ['2', '3'])])
+    assert query.positions(condition).tolist() == [1, 2]
+
+@pytest.mark.parametrize('text', ['', 'cost >', '(type = Spell', 'cost between 1 3', 'type in Spell', 'a = "b" )'])
+def test_invalid_queries_raise_query_error(text):
+    with pytest.raises(QueryError):
+        parse_query(text)
+
+def test_unknown_columns_and_bad_numbers_raise_query_error(query):
+    with pytest.raises(QueryError):
+        query.positions('colour = red')
+    with pytest.raises(QueryError):
+        query.positions('cost > cheap')
+
+def test_get_query_is_rebuilt_when_the_file_changes(tmp_path):
+    path = tmp_path / 'cards.csv'
+    pd.DataFrame({'name': ['a', 'b']}).to_csv(path, index=False)
+    first = get_query(path)
+    assert get_query(path) is first
+    assert first.positions('name = b').tolist() == [1]
+
+    pd.DataFrame({'name': ['b', 'b', 'c']}).to_csv(path, index=False)
+    second = get_query(path)
+    assert second is not first
+    assert second.positions('name = b').tolist() == [0, 1]
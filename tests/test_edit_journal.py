@@ -0,0 +1,60 @@
+from utils import columnar_cache
+from utils.edit_journal import EditJournal
+
+SOURCE = 'name,text\na,"line1\n\nline2"\n\nb,x\n,\nc,y\n'
+
+def _load(path):
+    data = columnar_cache.read_frame(path)
+    return data, EditJournal(path, len(data))
+
+def _write(tmp_path, text=SOURCE):
+    path = tmp_path / 'cards.csv'
+    path.write_text(text, encoding='utf-8', newline='')
+    return path
+
+def test_labels_skip_blank_lines_like_the_loader(tmp_path):
+    path = _write(tmp_path)
+    data, journal = _load(path)
+    assert list(data['name'].fillna('')) == ['a', 'b', '', 'c']
+
+    journal.record_cell(3, 'text', 'edited')
+    journal.save(list(data.columns))
+
+    assert path.read_text(encoding='utf-8') == 'name,text\na,"line1\n\nline2"\n\nb,x\n,\nc,edited\n'
+
+def test_rewrite_keeps_multiline_cells_and_blank_lines(tmp_path):
+    path = _write(tmp_path)
+    data, journal = _load(path)
+
+    journal.delete_rows([1])
+    journal.add_column('extra')
+    journal.record_cell(0, 'extra', 'first')
+    label = journal.add_row()
+    journal.record_cell(label, 'name', 'new')
+    journal.save(list(data.columns) + ['extra'])
+
+    assert path.read_text(encoding='utf-8') == (
+        'name,text,extra\na,"line1\n\nline2",first\n\n,,\nc,y,\nnew,,\n'
+    )
+    reloaded = columnar_cache.read_frame(path)
+    assert list(reloaded['name'].fillna('')) == ['a', '', 'c', 'new']
+    assert reloaded['text'][0] == 'line1\n\nline2'
+
+def test_append_only_save_adds_rows_at_the_end(tmp_path):
+    path = _write(tmp_path, 'name,text\na,x')
+    data, journal = _load(path)
+
+    label = journal.add_row()
+    journal.record_cell(label, 'text', 'y')
+    assert journal.append_only
+    journal.save(list(data.columns))
+
+    assert list(columnar_cache.read_frame(path)['text']) == ['x', 'y']
+
+def test_source_changed_detects_outside_writes(tmp_path):
+    path = _write(tmp_path)
+    _, journal = _load(path)
+    assert not journal.source_changed()
+
+    path.write_text(SOURCE + 'd,z\n', encoding='utf-8')
+    assert journal.source_changed()
@@ -0,0 +1,72 @@
+from views.component_editor.events.event_manager import EventManager
+from views.component_editor.events.event_types import EventType
+
+class _Widget:
+    """Collects idle callbacks instead of running a Tk loop"""
+
+    def __init__(self):
+        self.idle = []
+
+    def after_idle(self, callback):
+        self.idle.append(callback)
+        return len(self.idle)
+
+    def after_cancel(self, callback_id):
+        pass
+
+def _batched():
+    events = EventManager()
+    widget = _Widget()
+    events.enable_batching(widget)
+    received = []
+    for event_type in (EventType.STATE_CHANGED, EventType.ELEMENT_EDITED, EventType.ELEMENT_RESIZED):
+        events.subscribe(event_type, lambda data, event_type=event_type: received.append((event_type, data)))
+    return events, received
+
+def test_state_changes_with_fresh_dicts_merge():
+    events, received = _batched()
+    events.emit(EventType.STATE_CHANGED, {'can_undo': True, 'can_redo': False})
+    events.emit(EventType.STATE_CHANGED, {'can_undo': False, 'can_redo': True})
+    events.flush()
+
+    assert received == [(EventType.STATE_CHANGED, {'can_undo': False, 'can_redo': True})]
+
+def test_payloads_of_other_shapes_are_kept_apart():
+    events, received = _batched()
+    events.emit(EventType.STATE_CHANGED, {'can_undo': True, 'can_redo': False})
+    events.emit(EventType.STATE_CHANGED, None)
+    events.flush()
+
+    assert [data for _, data in received] == [{'can_undo': True, 'can_redo': False}, None]
+
+def test_element_events_merge_per_element():
+    events, received = _batched()
+    first = {'type': 'text', 'x': 0, 'y': 0, 'properties': {}}
+    second = {'type': 'shape', 'x': 5, 'y': 5, 'properties': {}}
+    events.emit(EventType.ELEMENT_EDITED, {'element': first})
+    events.emit(EventType.ELEMENT_EDITED, {'element': second})
+    events.emit(EventType.ELEMENT_EDITED, {'element': first})
+    events.emit(EventType.ELEMENT_RESIZED, first)
+    events.emit(EventType.ELEMENT_RESIZED, first)
+    events.flush()
+
+    assert received == [
+        (EventType.ELEMENT_EDITED, {'element': first}),
+        (EventType.ELEMENT_EDITED, {'element': second}),
+        (EventType.ELEMENT_RESIZED, first)
+    ]
+
+def test_unbatched_events_are_delivered_at_once_and_timed():
+    events = EventManager()
+    received = []
+
+    def listener(data):
+        received.append(data)
+
+    events.subscribe(EventType.UNDO, listener)
+    events.emit(EventType.UNDO, 1)
+    events.emit(EventType.UNDO, 2)
+
+    assert received == [1, 2]
+    name, calls, _, _ = events.get_listener_stats()[0]
+    assert name.endswith('listener') and calls == 2
@@ -0,0 +1,77 @@
+import os
+from PIL import Image
+from utils.export_checkpoint import ExportCheckpoint
+from utils.export_manifest import ExportManifest
+
+SCOPE = {'template': 'deck', 'data': 'cards.csv', 'layout': 'a4'}
+
+def saved_manifest(tmp_path, keys, cards_per_page=2):
+    output = tmp_path / 'deck.pdf'
+    output.write_bytes(b'%PDF')
+    manifest = ExportManifest(tmp_path / 'manifests', SCOPE)
+    manifest.save(keys, 'tpl', cards_per_page, str(output))
+    return ExportManifest(tmp_path / 'manifests', SCOPE), output
+
+def test_first_export_counts_everything_as_changed(tmp_path):
+    diff = ExportManifest(tmp_path, SCOPE).diff(['a', 'b', 'c'], 'tpl', 2)
+    assert diff.changed_cards == [0, 1, 2]
+    assert diff.changed_pages == [0, 1]
+    assert diff.total_pages == 2
+
+def test_diff_reports_changed_cards_and_their_pages(tmp_path):
+    manifest, _ = saved_manifest(tmp_path, ['a', 'b', 'c', 'd', 'e'])
+    diff = manifest.diff(['a', 'b', 'X', 'd', 'e'], 'tpl', 2)
+    assert diff.changed_cards == [2]
+    assert diff.changed_pages == [1]
+
+def test_template_or_layout_change_invalidates_every_page(tmp_path):
+    manifest, _ = saved_manifest(tmp_path, ['a', 'b', 'c'])
+    assert manifest.diff(['a', 'b', 'c'], 'other', 2).changed_pages == [0, 1]
+    assert manifest.diff(['a', 'b', 'c'], 'tpl', 3).changed_pages == [0]
+
+def test_shorter_deck_rewrites_its_last_page(tmp_path):
+    manifest, _ = saved_manifest(tmp_path, ['a', 'b', 'c', 'd', 'e'])
+    diff = manifest.diff(['a', 'b', 'c'], 'tpl', 2)
+    assert diff.changed_cards == []
+    assert diff.changed_pages == [1]
+    assert not diff.unchanged
+
+def test_unchanged_deck_with_untouched_output_is_current(tmp_path):
+    manifest, output = saved_manifest(tmp_path, ['a', 'b'])
+    assert manifest.may_be_current('tpl', str(output))
+    assert manifest.is_current(manifest.diff(['a', 'b'], 'tpl', 2), str(output))
+    assert not manifest.may_be_current('other', str(output))
+
+def test_edited_output_file_is_not_current(tmp_path):
+    manifest, output = saved_manifest(tmp_path, ['a', 'b'])
+    output.write_bytes(b'%PDF changed')
+    assert not manifest.may_be_current('tpl', str(output))
+    os.remove(output)
+    assert not manifest.is_current(manifest.diff(['a', 'b'], 'tpl', 2), str(output))
+
+def test_checkpoint_pages_round_trip(tmp_path):
+    image = Image.new('RGB', (3, 3), (9, 8, 7))
+    checkpoint = ExportCheckpoint(tmp_path, SCOPE)
+    checkpoint.start('tpl', 2)
+    checkpoint.save_page(0, ['a', 'b'], [image, None])
+
+    reopened = ExportCheckpoint(tmp_path, SCOPE)
+    reopened.start('tpl', 2)
+    assert reopened.page_keys(0) == ['a', 'b']
+    loaded, missing = reopened.load_page(0)
+    assert loaded.tobytes() == image.tobytes() and missing is None
+
+def test_checkpoint_drops_pages_for_another_layout(tmp_path):
+    checkpoint = ExportCheckpoint(tmp_path, SCOPE)
+    checkpoint.start('tpl', 2)
+    checkpoint.save_page(0, ['a', 'b'], [1, 2])
+    checkpoint.start('tpl', 4)
+    assert checkpoint.page_keys(0) is None
+
+def test_discard_from_removes_trailing_pages(tmp_path):
+    checkpoint = ExportCheckpoint(tmp_path, SCOPE)
+    checkpoint.start('tpl', 1)
+    for page in range(4):
+        checkpoint.save_page(page, [str(page)], [page])
+    checkpoint.discard_from(2)
+    assert [checkpoint.page_keys(page) for page in range(4)] == [['0'], ['1'], None, None]
@@ -0,0 +1,111 @@
+from views.component_editor.history_manager import HistoryManager
+
+class _Events:
+    def __init__(self):
+        self.emitted = []
+
+    def emit(self, event_type, data=None):
+        self.emitted.append((event_type, data))
+
+def _text(text='a', x=0):
+    return {'type': 'text', 'x': x, 'y': 0, 'properties': {'text': text, 'fill': 'black'}}
+
+def _history(elements, background='#FFFFFF'):
+    history = HistoryManager(_Events())
+    history.push_state(elements, background)
+    return history
+
+def test_undo_and_redo_patch_elements_in_place():
+    element = _text()
+    elements = [element]
+    history = _history(elements)
+
+    element['properties']['text'] = 'b'
+    history.push_state(elements, '#FFFFFF')
+    element['x'] = 10
+    history.push_state(elements, '#000000')
+
+    state = history.undo()
+    assert state.elements[0] is element
+    assert element['x'] == 0 and state.background_color == '#FFFFFF'
+    history.undo()
+    assert element['properties']['text'] == 'a'
+    assert not history.can_undo()
+
+    state = history.redo()
+    assert element['properties']['text'] == 'b'
+    history.redo()
+    assert element['x'] == 10 and not history.can_redo()
+
+def test_entries_store_only_changed_fields():
+    element = _text()
+    history = _history([element])
+
+    element['properties']['fill'] = 'red'
+    history.push_state([element], '#FFFFFF')
+
+    changes = history.history[0].field_changes
+    assert [(path, old, new) for _, path, old, new in changes] == [(('properties', 'fill'), 'black', 'red')]
+
+def test_added_and_removed_elements_come_back():
+    first, second = _text('a'), _text('b')
+    history = _history([first])
+
+    history.push_state([first, second], '#FFFFFF')
+    history.push_state([second], '#FFFFFF')
+
+    assert history.undo().elements == [first, second]
+    assert history.undo().elements == [first]
+    assert history.redo().elements == [first, second]
+
+def test_transaction_records_one_step():
+    element = _text()
+    history = _history([element])
+
+    history.begin_transaction()
+    for x in range(1, 6):
+        element['x'] = x
+        history.push_state([element], '#FFFFFF')
+    history.commit_transaction()
+
+    assert len(history.history) == 1
+    history.undo()
+    assert element['x'] == 0
+
+def test_edits_to_the_same_property_merge():
+    element = _text('')
+    history = _history([element])
+
+    for text in ('h', 'he', 'hey'):
+        element['properties']['text'] = text
+        history.push_state([element], '#FFFFFF', merge_key=('edit', id(element)))
+
+    assert len(history.history) == 1
+    history.undo()
+    assert element['properties']['text'] == ''
+
+def test_edits_to_different_properties_stay_separate():
+    element = _text()
+    history = _history([element])
+
+    element['properties']['text'] = 'b'
+    history.push_state([element], '#FFFFFF', merge_key=('edit', id(element)))
+    element['properties']['fill'] = 'red'
+    history.push_state([element], '#FFFFFF', merge_key=('edit', id(element)))
+
+    assert len(history.history) == 2
+    history.undo()
+    assert element['properties'] == {'text': 'b', 'fill': 'black'}
+
+def test_memory_limit_drops_oldest_steps():
+    element = _text()
+    history = _history([element])
+    history.max_bytes = 1
+
+    for x in range(1, 4):
+        element['x'] = x
+        history.push_state([element], '#FFFFFF')
+
+    assert len(history.history) == 1 and history.current_index == 0
+    history.undo()
+    assert element['x'] == 2
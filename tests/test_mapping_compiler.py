@@ -0,0 +1,140 @@
+import copy
+import io
+import pandas as pd
+from utils.mapping_compiler import compile_mappings
+
+ASSETS = '/assets'
+
+def _reference_apply_mappings(card_data: dict, row: pd.Series):
+    """The per-row mapping rules the compiled plan replaces, applied to one card dict"""
+    mappings = card_data.get('data_source', {}).get('mappings', {})
+    available_columns = row.index.tolist()
+
+    def cell(column):
+        return str(row[column]) if pd.notna(row[column]) else ""
+
+    for element_id, mapping in mappings.items():
+        if mapping['type'] == 'direct':
+            if mapping['column'] not in available_columns:
+                continue
+            value = cell(mapping['column'])
+            if not value:
+                continue
+            for element in card_data['elements']:
+                if element['id'] == element_id and element['type'] == 'text':
+                    element['properties']['text'] = value
+                elif element['id'] == element_id and element['type'] == 'qrcode':
+                    element['properties']['content'] = value
+                    break
+
+        elif mapping['type'] == 'conditional':
+            matched_value = None
+            for condition in mapping.get('conditions', []):
+                column, operator, test_value = condition['column'], condition['operator'], condition['value']
+                if column not in available_columns:
+                    continue
+                cell_value = cell(column)
+                try:
+                    if operator == 'equals':
+                        met = cell_value == test_value
+                    elif operator == 'not equals':
+                        met = cell_value != test_value
+                    elif operator == 'contains':
+                        met = test_value.lower() in cell_value.lower()
+                    elif operator == 'greater than':
+                        met = float(cell_value) > float(test_value)
+                    else:
+                        met = float(cell_value) < float(test_value)
+                except (ValueError, TypeError):
+                    continue
+                if met:
+                    matched_value = condition['result'].replace("${ASSETS}", ASSETS)
+                    for col in available_columns:
+                        matched_value = matched_value.replace(f"${{{col}}}", cell(col))
+                    break
+            if matched_value is not None:
+                for element in card_data['elements']:
+                    if element['id'] == element_id:
+                        if element['type'] == 'text':
+                            element['properties']['text'] = matched_value
+                        elif element['type'] == 'image':
+                            element['properties']['path'] = matched_value
+                        break
+
+        elif mapping['type'] == 'macro':
+            expression = mapping['expression'].replace("${ASSETS}", ASSETS)
+            for column in available_columns:
+                expression = expression.replace(f"${{{column}}}", cell(column))
+            for element in card_data['elements']:
+                if element['id'] == element_id and element['type'] == 'image':
+                    element['properties']['path'] = expression
+                    break
+
+TEMPLATE = {
+    'elements': [
+        {'id': 'title', 'type': 'text', 'properties': {'text': 'Title'}},
+        {'id': 'title', 'type': 'text', 'properties': {'text': 'Second title'}},
+        {'id': 'code', 'type': 'qrcode', 'properties': {'content': 'none'}},
+        {'id': 'code', 'type': 'text', 'properties': {'text': 'after the code'}},
+        {'id': 'badge', 'type': 'text', 'properties': {'text': 'Badge'}},
+        {'id': 'art', 'type': 'image', 'properties': {'path': ''}},
+        {'id': 'frame', 'type': 'image', 'properties': {'path': ''}},
+        {'id': 'untouched', 'type': 'shape', 'properties': {'fill': 'red'}}
+    ],
+    'data_source': {
+        'mappings': {
+            'title': {'type': 'direct', 'column': 'name'},
+            'code': {'type': 'direct', 'column': 'url'},
+            'missing': {'type': 'direct', 'column': 'name'},
+            'untouched': {'type': 'direct', 'column': 'no such column'},
+            'badge': {'type': 'conditional', 'conditions': [
+                {'column': 'cost', 'operator': 'greater than', 'value': '4', 'result': 'Expensive ${name}'},
+                {'column': 'type', 'operator': 'contains', 'value': 'crea', 'result': 'Creature'},
+                {'column': 'type', 'operator': 'equals', 'value': 'Land', 'result': '${ASSETS}/land.png'},
+                {'column': 'cost', 'operator': 'less than', 'value': 'cheap', 'result': 'never'},
+                {'column': 'type', 'operator': 'not equals', 'value': 'Spell', 'result': 'Other ${unknown}'}
+            ]},
+            'art': {'type': 'conditional', 'conditions': [
+                {'column': 'type', 'operator': 'equals', 'value': 'Spell', 'result': '${ASSETS}/spell/${name}.png'}
+            ]},
+            'frame': {'type': 'macro', 'expression': '${ASSETS}/frames/${type}_${cost}.png'}
+        }
+    }
+}
+
+CSV = """name,url,type,cost
+Fire Bolt,https://a,Spell,1
+Ice Wall,,Creature,5
+,https://c,Land,
+Goblin,https://d,creature,x
+Stone,https://e,Artifact,4.5
+"""
+
+def test_compiled_plan_matches_per_row_mappings():
+    df = pd.read_csv(io.StringIO(CSV), dtype=str)
+    table = compile_mappings(TEMPLATE, ASSETS).evaluate(df)
+    assert len(table) == len(df)
+
+    for position, (_, row) in enumerate(df.iterrows()):
+        expected = copy.deepcopy(TEMPLATE)
+        _reference_apply_mappings(expected, row)
+        assert table.card(TEMPLATE, position).elements == expected['elements'], f"row {position}"
+
+def test_template_is_never_modified():
+    template = copy.deepcopy(TEMPLATE)
+    df = pd.read_csv(io.StringIO(CSV), dtype=str)
+    table = compile_mappings(template, ASSETS).evaluate(df)
+    for position in range(len(df)):
+        table.card(template, position).elements
+    assert template == TEMPLATE
+
+def test_overrides_are_sparse():
+    df = pd.read_csv(io.StringIO(CSV), dtype=str)
+    table = compile_mappings(TEMPLATE, ASSETS).evaluate(df)
+
+    # Row 2 has no name, so the title texts keep their template values
+    overrides = table.row(2)
+    assert (0, 'text') not in overrides and (1, 'text') not in overrides
+    assert overrides[(2, 'content')] == 'https://c'
+    assert (3, 'text') not in overrides
+    assert overrides[(4, 'text')] == '/assets/land.png'
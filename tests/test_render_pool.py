@@ -0,0 +1,92 @@
+import time
+from concurrent.futures import Future
+from PIL import Image
+from utils.render_cache import RenderCache, decode_result, encode_result
+from utils.render_pool import RenderPool
+
+def render_slowly(spec):
+    """Later cards finish first, so results arrive out of order"""
+    time.sleep(0.02 * (5 - spec['n'] % 5))
+    return Image.new('RGB', (4, 4), (spec['n'], 0, 0))
+
+def times_ten(spec):
+    return spec['n'] * 10
+
+class _LazyFuture(Future):
+    """Renders only when its result is asked for, so several cards stay in flight"""
+
+    def __init__(self, render):
+        super().__init__()
+        self._render = render
+
+    def result(self, timeout=None):
+        if not self.done():
+            self.set_result(self._render())
+        return super().result(timeout)
+
+class _DeferredPool(RenderPool):
+    """Records what is submitted while earlier cards are still in flight"""
+
+    def __init__(self, **kwargs):
+        super().__init__(1, render_fn=times_ten, **kwargs)
+        self.submitted = []
+
+    def _submit(self, card_data):
+        self.submitted.append(card_data)
+        return _LazyFuture(lambda: self.render_fn(card_data))
+
+def test_results_come_back_in_input_order_across_processes():
+    specs = [{'n': n} for n in range(12)]
+    with RenderPool(3, window=6, render_fn=render_slowly) as pool:
+        results = list(pool.imap(specs))
+    assert [image.getpixel((0, 0))[0] for image in results] == list(range(12))
+
+def test_single_worker_renders_inline():
+    with RenderPool(1, render_fn=lambda spec: spec['n'] + 1) as pool:
+        assert list(pool.imap({'n': n} for n in range(5))) == [1, 2, 3, 4, 5]
+
+def test_duplicates_in_flight_share_one_render(tmp_path):
+    pool = _DeferredPool(window=10)
+    specs = [{'n': 1}, {'n': 2}, {'n': 1}, {'n': 1}, {'n': 3}]
+    results = list(pool.imap(specs, cache=RenderCache(tmp_path)))
+    assert [card['n'] for card in pool.submitted] == [1, 2, 3]
+    assert results == [10, 20, 10, 10, 30]
+
+def test_cached_cards_are_not_rendered_again(tmp_path):
+    cache = RenderCache(tmp_path)
+    with RenderPool(1, render_fn=times_ten) as pool:
+        list(pool.imap([{'n': 1}, {'n': 2}], cache=cache))
+
+    pool = _DeferredPool()
+    results = list(pool.imap([{'n': 1}, {'n': 2}, {'n': 4}], cache=cache))
+    assert [card['n'] for card in pool.submitted] == [4]
+    assert results == [10, 20, 40]
+
+def test_window_bounds_cards_in_flight():
+    pool = _DeferredPool(window=2)
+    seen = []
+    for result in pool.imap({'n': n} for n in range(6)):
+        seen.append(len(pool.submitted))
+    # The first result is only taken once the window is full
+    assert seen[0] == 2 and seen == sorted(seen)
+
+def test_render_cache_survives_a_restart(tmp_path):
+    image = Image.new('RGBA', (3, 2), (1, 2, 3, 4))
+    cache = RenderCache(tmp_path)
+    key = cache.key({'n': 1}, render_slowly)
+    cache.put(key, {'layers': [(image, (1, 2)), None]})
+
+    reloaded = RenderCache(tmp_path).get(key)
+    layer, offset = reloaded['layers'][0]
+    assert offset == (1, 2) and reloaded['layers'][1] is None
+    assert layer.tobytes() == image.tobytes()
+
+def test_memory_only_results_skip_the_disk(tmp_path):
+    cache = RenderCache(tmp_path)
+    result = cache.get_or_render({'n': 7}, render_slowly, persist=False)
+    assert cache.get_or_render({'n': 7}, render_slowly, persist=False) is result
+    assert not list(tmp_path.glob('*/*.card'))
+
+def test_result_codec_round_trips_plain_data():
+    result = {'layers': [[({'type': 'qrcode'}, ((True, False), (False, True)))]], 'images': [{'x': 1}]}
+    assert decode_result(encode_result(result)) == result
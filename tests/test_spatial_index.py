@@ -0,0 +1,101 @@
+from views.component_editor.canvas_manager import CanvasManager
+from views.component_editor.element_manager import ElementManager
+from views.component_editor.spatial_index import SpatialIndex
+
+class _Events:
+    def emit(self, event_type, data):
+        pass
+
+class _Window:
+    def after(self, delay, callback):
+        pass
+
+def _element(x, y, width, height):
+    return {'type': 'shape', 'x': x, 'y': y, 'properties': {'width': width, 'height': height}}
+
+def _index(elements):
+    index = SpatialIndex(cell_size=32)
+    for element in elements:
+        props = element['properties']
+        index.insert(id(element), element, (element['x'], element['y'],
+                                            element['x'] + props['width'], element['y'] + props['height']))
+    return index
+
+def test_query_point_returns_topmost_first():
+    bottom, top = _element(0, 0, 100, 100), _element(50, 50, 100, 100)
+    index = _index([bottom, top])
+
+    assert index.query_point(75, 75) == [top, bottom]
+    assert index.query_point(10, 10) == [bottom]
+    assert index.query_point(160, 160) == []
+
+def test_insert_updates_bounds_and_keeps_stacking_order():
+    bottom, top = _element(0, 0, 40, 40), _element(200, 200, 40, 40)
+    index = _index([bottom, top])
+
+    index.insert(id(bottom), bottom, (190, 190, 250, 250))
+    assert index.query_point(10, 10) == []
+    assert index.query_point(210, 210) == [top, bottom]
+
+def test_remove_and_clear():
+    element = _element(0, 0, 40, 40)
+    index = _index([element])
+
+    index.remove(id(element))
+    assert index.query_point(10, 10) == []
+    assert len(index) == 0
+
+    index.insert(id(element), element, (0, 0, 40, 40))
+    index.stale = True
+    index.clear()
+    assert len(index) == 0 and not index.stale
+
+def test_bounds_are_normalized_across_cells():
+    element = _element(0, 0, 0, 0)
+    index = SpatialIndex(cell_size=10)
+    index.insert('a', element, (95, 95, -5, -5))
+
+    assert index.query_point(-5, -5) == [element]
+    assert index.query_point(50, 50) == [element]
+    assert index.query_point(96, 50) == []
+
+def test_query_rect_intersects_or_contains_bottom_first():
+    bottom, top, far = _element(0, 0, 100, 100), _element(50, 50, 100, 100), _element(400, 400, 10, 10)
+    index = _index([bottom, top, far])
+
+    assert index.query_rect(120, 120, 60, 60) == [bottom, top]
+    assert index.query_rect(-10, -10, 110, 110, contained=True) == [bottom]
+    assert index.query_rect(-10, -10, 500, 500, contained=True) == [bottom, top, far]
+    assert index.query_rect(200, 200, 300, 300) == []
+
+def test_element_manager_scans_when_the_index_is_stale():
+    manager = ElementManager(_Events(), _Window())
+    element = manager.create_element('shape', 0, 0)
+    manager.spatial_index = _index(manager.elements)
+    assert manager.find_element_at(10, 10) is element
+
+    # Moved, but the canvas has not re-indexed it yet
+    manager.move_element(element, 300, 300)
+    assert manager.spatial_index.stale
+    assert manager.find_element_at(10, 10) is None
+    assert manager.find_element_at(310, 310) is element
+
+    manager.delete_element(element)
+    assert manager.find_element_at(310, 310) is None
+
+def test_canvas_reindexes_a_stale_index_before_querying():
+    manager = ElementManager(_Events(), _Window())
+    canvas = CanvasManager.__new__(CanvasManager)
+    canvas.element_manager = manager
+    canvas.scene = {}
+    canvas.spatial_index = manager.spatial_index = SpatialIndex()
+    first = manager.create_element('shape', 0, 0)
+    second = manager.create_element('shape', 200, 0)
+
+    # Created but never drawn: the index is empty and stale
+    assert canvas._find_exact_element_at(10, 10) is first
+    manager.move_element(first, 300, 300)
+    assert canvas._find_exact_element_at(10, 10) is None
+    assert canvas._find_exact_element_at(310, 310) is first
+    assert canvas.find_elements_in_rect(190, -10, 500, 500) == [first, second]
+    assert canvas.find_elements_in_rect(290, 290, 310, 310, contained=False) == [first]
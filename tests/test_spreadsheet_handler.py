@@ -0,0 +1,8 @@
+from utils.spreadsheet_handler import SpreadsheetHandler
+
+def test_csv_import_keeps_numeric_columns(tmp_path):
+    path = tmp_path / 'cards.csv'
+    path.write_text("name,cost\nGoblin,2\nDragon,7\n", encoding='utf-8')
+    records = SpreadsheetHandler().import_spreadsheet(str(path))
+    assert records == [{'name': 'Goblin', 'cost': 2}, {'name': 'Dragon', 'cost': 7}]
+    assert isinstance(records[0]['cost'], int)
@@ -0,0 +1,24 @@
+from types import SimpleNamespace
+import pytest
+from controllers.template_controller import TemplateController
+
+TEMPLATE = {'elements': [{'type': 'text', 'id': 'title', 'properties': {'text': ''}}]}
+
+@pytest.fixture
+def controller(tmp_path):
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'cards.csv').write_text("name,cost\nGoblin,2\nDragon,7\n", encoding='utf-8')
+    controller = TemplateController.__new__(TemplateController)
+    controller.config = SimpleNamespace(USER_DATA_DIR=tmp_path)
+    controller.load_template = lambda name: TEMPLATE
+    return controller
+
+def test_components_stream_with_mapped_text(controller):
+    batches = controller.create_from_csv('deck', 'cards.csv', {'name': 'title'})
+    cards = [card for batch in batches for card in batch]
+    assert [card.element(0)['properties']['text'] for card in cards] == ['Goblin', 'Dragon']
+
+def test_missing_column_or_file_fails_up_front(controller, capsys):
+    assert controller.create_from_csv('deck', 'cards.csv', {'colour': 'title'}) is False
+    assert 'colour' in capsys.readouterr().out
+    assert controller.create_from_csv('deck', 'missing.csv', {'name': 'title'}) is False
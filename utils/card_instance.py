@@ -0,0 +1,78 @@
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional, Tuple
+
+class CardInstance(Mapping):
+    """One data row's card: a shared, read-only template plus sparse property overrides
+
+    Reads like the template dict (``card['elements']``, ``card.get('dimensions')``).
+    Only elements that have overrides are copied, and only when first read, so
+    rows never share mutable state and no deep copy of the template is made.
+    """
+
+    def __init__(self, template: dict, overrides: Optional[Dict[Tuple[int, str], Any]] = None):
+        self.template = template
+        # (element index, property name) -> value
+        self.overrides = overrides or {}
+        self._elements: Optional[List[dict]] = None
+
+    def __getitem__(self, key):
+        if key == 'elements':
+            return self.elements
+        return self.template[key]
+
+    def __iter__(self):
+        return iter(self.template)
+
+    def __len__(self):
+        return len(self.template)
+
+    def __getstate__(self):
+        # Resolved elements are rebuilt on demand; only ship template and overrides
+        return {'template': self.template, 'overrides': self.overrides}
+
+    def __setstate__(self, state):
+        self.template = state['template']
+        self.overrides = state['overrides']
+        self._elements = None
+
+    @property
+    def elements(self) -> List[dict]:
+        """Template elements with this row's overrides applied"""
+        if self._elements is None:
+            self._elements = self._resolve()
+        return self._elements
+
+    def element(self, index: int) -> dict:
+        """A single resolved element"""
+        return self.elements[index]
+
+    def with_overrides(self, overrides: Dict[Tuple[int, str], Any]) -> 'CardInstance':
+        """A new instance of the same template with more overrides layered on top"""
+        merged = dict(self.overrides)
+        merged.update(overrides)
+        return CardInstance(self.template, merged)
+
+    def to_dict(self) -> dict:
+        """A plain dict of the resolved card, e.g. for saving"""
+        card_data = dict(self.template)
+        card_data['elements'] = self.elements
+        return card_data
+
+    def _resolve(self) -> List[dict]:
+        elements = self.template.get('elements', [])
+        if not self.overrides:
+            return list(elements)
+
+        by_element: Dict[int, Dict[str, Any]] = {}
+        for (index, prop), value in self.overrides.items():
+            by_element.setdefault(index, {})[prop] = value
+
+        resolved = list(elements)
+        for index, props in by_element.items():
+            # Copy just this element and its properties; everything else is shared
+            element = dict(elements[index])
+            properties = dict(element.get('properties', {}))
+            properties.update(props)
+            element['properties'] = properties
+            resolved[index] = element
+        return resolved
@@ -0,0 +1,126 @@
+import json
+import os
+from pathlib import Path
+from typing import List, Optional
+import pandas as pd
+
+# Feather sidecars need pyarrow (listed in requirements.txt). Without it the
+# sidecar falls back to a pandas pickle, which still skips CSV parsing but is
+# neither columnar nor memory-mapped: every load reads the whole file.
+try:
+    from pyarrow import feather
+    SIDECAR_FORMAT = 'feather'
+except ImportError:
+    feather = None
+    SIDECAR_FORMAT = 'pickle'
+
+# Sidecars live next to the data files, hidden from the CSV lists
+SIDECAR_DIR = '.columnar'
+
+def _paths(csv_path):
+    csv_path = Path(csv_path)
+    directory = csv_path.parent / SIDECAR_DIR
+    return directory / f"{csv_path.name}.{SIDECAR_FORMAT}", directory / f"{csv_path.name}.meta.json"
+
+def _stamp(csv_path) -> List[int]:
+    stat = os.stat(csv_path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+def load_metadata(csv_path) -> Optional[dict]:
+    """Columns, dtypes and row count of a data source, if its sidecar is up to date"""
+    data_path, meta_path = _paths(csv_path)
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('source_stamp') != _stamp(csv_path) or meta.get('format') != SIDECAR_FORMAT:
+            return None
+        if not data_path.exists():
+            return None
+        return meta
+    except (OSError, ValueError):
+        return None
+
+def build(csv_path, df: Optional[pd.DataFrame] = None) -> Optional[dict]:
+    """Write the typed sidecar and metadata for a CSV file, parsing it if no frame is given
+
+    The sidecar is Feather when pyarrow is installed and a pandas pickle otherwise.
+    """
+    data_path, meta_path = _paths(csv_path)
+    try:
+        if df is None:
+            df = pd.read_csv(csv_path)
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write then rename so readers never see a half-written sidecar
+        temp_path = data_path.with_name(data_path.name + '.tmp')
+        df = df.reset_index(drop=True)
+        if SIDECAR_FORMAT == 'feather':
+            df.to_feather(temp_path)
+        else:
+            df.to_pickle(temp_path)
+        os.replace(temp_path, data_path)
+
+        meta = {
+            'format': SIDECAR_FORMAT,
+            'columns': [str(column) for column in df.columns],
+            'dtypes': {str(column): str(dtype) for column, dtype in df.dtypes.items()},
+            'rows': len(df),
+            'source_stamp': _stamp(csv_path)
+        }
+        temp_meta = meta_path.with_name(meta_path.name + '.tmp')
+        with open(temp_meta, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(temp_meta, meta_path)
+        return meta
+    except Exception as e:
+        print(f"Error writing columnar cache for {csv_path}: {e}")
+        return None
+
+def read_frame(csv_path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Load a data source from its sidecar, rebuilding the sidecar when the CSV is newer"""
+    data_path, _ = _paths(csv_path)
+    if load_metadata(csv_path) is not None:
+        try:
+            if SIDECAR_FORMAT == 'feather':
+                # Memory-mapped, and only the requested columns are read
+                return feather.read_table(data_path, columns=columns, memory_map=True).to_pandas()
+            df = pd.read_pickle(data_path)
+            return df[columns] if columns is not None else df
+        except Exception as e:
+            print(f"Error reading columnar cache for {csv_path}: {e}")
+
+    df = pd.read_csv(csv_path)
+    build(csv_path, df)
+    return df[columns] if columns is not None else df
+
+def read_head(csv_path, rows: int) -> pd.DataFrame:
+    """First rows of a data source, from a memory-mapped Feather sidecar when there is one"""
+    data_path, _ = _paths(csv_path)
+    if SIDECAR_FORMAT == 'feather' and load_metadata(csv_path) is not None:
+        try:
+            # Memory-mapped, and only the first rows are converted to a frame
+            return feather.read_table(data_path, memory_map=True).slice(0, rows).to_pandas()
+        except Exception as e:
+            print(f"Error reading columnar cache for {csv_path}: {e}")
+    # A pickle sidecar would be loaded whole, so parsing just these rows is cheaper
+    return pd.read_csv(csv_path, nrows=rows)
+
+def read_columns(csv_path) -> List[str]:
+    """Column names, from the metadata when fresh, otherwise from the header line only"""
+    meta = load_metadata(csv_path)
+    if meta is not None:
+        return list(meta['columns'])
+    return [str(column) for column in pd.read_csv(csv_path, nrows=0).columns]
+
+def read_row_count(csv_path) -> Optional[int]:
+    """Row count from the metadata, or None when the sidecar is missing or stale"""
+    meta = load_metadata(csv_path)
+    return meta['rows'] if meta is not None else None
+
+def remove(csv_path):
+    """Delete a data source's sidecar and metadata"""
+    for path in _paths(csv_path):
+        try:
+            path.unlink()
+        except OSError:
+            pass
@@ -0,0 +1,407 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+class QueryError(ValueError):
+    """A filter expression that cannot be parsed or applied, with a message for the user"""
+
+# Comparison operators of the filter language; '~' means "contains" (case-insensitive)
+OPERATORS = ('==', '!=', '<=', '>=', '=', '<', '>', '~')
+
+_TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<op>==|!=|<=|>=|=|<|>|~)
+      | (?P<punct>[(),])
+      | (?P<word>[^\s"'(),=!<>~]+)
+    )""", re.VERBOSE)
+
+_KEYWORDS = {'and', 'or', 'not', 'in', 'between'}
+
+def _to_number(text) -> Optional[float]:
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+class ColumnIndex:
+    """Value indexes over one column, built on first use
+
+    Numeric columns get a sorted array of values with their row positions, for
+    equality and range lookups by binary search. Every column can also get a
+    hash index: its distinct values, a value -> code map, and row positions
+    grouped by code, so text lookups touch each distinct value once instead of
+    every row.
+    """
+
+    def __init__(self, series: pd.Series):
+        self.series = series.reset_index(drop=True)
+        self.length = len(series)
+        dtype = series.dtype
+        self.numeric = pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+        self._sorted = None
+        self._hash = None
+
+    def equals(self, value: str) -> np.ndarray:
+        if self.numeric:
+            number = _to_number(value)
+            if number is None:
+                return self._empty()
+            return self._number_range(number, number, True, True)
+        codes, uniques, lookup, order, offsets = self._hash_index()
+        code = lookup.get(value)
+        if code is None:
+            return self._empty()
+        return self._mask(order[offsets[code]:offsets[code + 1]])
+
+    def compare(self, operator: str, value: str) -> np.ndarray:
+        """Numeric <, <=, > or >=; text columns compare the values that parse as numbers"""
+        number = _to_number(value)
+        if number is None:
+            raise QueryError(f"'{value}' is not a number")
+        if self.numeric:
+            if operator in ('<', '<='):
+                return self._number_range(-np.inf, number, True, operator == '<=')
+            return self._number_range(number, np.inf, operator == '>=', True)
+        return self._match_uniques(lambda uniques: _apply_operator(
+            pd.to_numeric(pd.Series(uniques, dtype=object), errors='coerce').to_numpy(dtype=float), operator, number))
+
+    def between(self, low: str, high: str) -> np.ndarray:
+        """Inclusive numeric range"""
+        low_number, high_number = _to_number(low), _to_number(high)
+        if low_number is None or high_number is None:
+            raise QueryError(f"'{low}' to '{high}' is not a numeric range")
+        if self.numeric:
+            return self._number_range(low_number, high_number, True, True)
+        return self._match_uniques(lambda uniques: _in_range(
+            pd.to_numeric(pd.Series(uniques, dtype=object), errors='coerce').to_numpy(dtype=float),
+            low_number, high_number))
+
+    def contains(self, text: str) -> np.ndarray:
+        needle = text.lower()
+        return self._match_uniques(lambda uniques: pd.Series(uniques, dtype=object).astype(str).str.lower()
+                                   .str.contains(needle, regex=False).to_numpy(dtype=bool))
+
+    def isin(self, values: List[str]) -> np.ndarray:
+        mask = self._empty()
+        for value in values:
+            mask |= self.equals(value)
+        return mask
+
+    def _empty(self) -> np.ndarray:
+        return np.zeros(self.length, dtype=bool)
+
+    def _mask(self, positions: np.ndarray) -> np.ndarray:
+        mask = self._empty()
+        mask[positions] = True
+        return mask
+
+    def _sorted_index(self):
+        if self._sorted is None:
+            values = self.series.to_numpy(dtype=float, na_value=np.nan)
+            positions = np.flatnonzero(~np.isnan(values))
+            order = np.argsort(values[positions], kind='stable')
+            self._sorted = (values[positions][order], positions[order])
+        return self._sorted
+
+    def _number_range(self, low: float, high: float, include_low: bool, include_high: bool) -> np.ndarray:
+        values, positions = self._sorted_index()
+        start = np.searchsorted(values, low, side='left' if include_low else 'right')
+        end = np.searchsorted(values, high, side='right' if include_high else 'left')
+        return self._mask(positions[start:end]) if end > start else self._empty()
+
+    def _hash_index(self):
+        if self._hash is None:
+            codes, uniques = pd.factorize(self.series, use_na_sentinel=True)
+            uniques = np.asarray(uniques, dtype=object)
+            # Rows grouped by code; missing values (code -1) sort first and are skipped
+            order = np.argsort(codes, kind='stable')
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            offsets = int((codes < 0).sum()) + np.concatenate(([0], np.cumsum(counts)))
+            lookup = {str(value): code for code, value in enumerate(uniques)}
+            self._hash = (codes, uniques, lookup, order, offsets)
+        return self._hash
+
+    def _match_uniques(self, predicate) -> np.ndarray:
+        """Rows whose value satisfies a vectorized predicate over the distinct values"""
+        codes, uniques, _, _, _ = self._hash_index()
+        if not len(uniques):
+            return self._empty()
+        matched = np.asarray(predicate(uniques), dtype=bool)
+        return matched[codes] & (codes >= 0)
+
+def _apply_operator(values: np.ndarray, operator: str, number: float) -> np.ndarray:
+    with np.errstate(invalid='ignore'):
+        if operator == '<':
+            return values < number
+        if operator == '<=':
+            return values <= number
+        if operator == '>':
+            return values > number
+        return values >= number
+
+def _in_range(values: np.ndarray, low: float, high: float) -> np.ndarray:
+    with np.errstate(invalid='ignore'):
+        return (values >= low) & (values <= high)
+
+class Comparison:
+    """column OP value, column in (values) or column between low and high"""
+
+    def __init__(self, column: str, operator: str, values: List[str]):
+        self.column = column
+        self.operator = operator
+        self.values = values
+
+    def evaluate(self, query: 'DataQuery') -> np.ndarray:
+        index = query.index(self.column)
+        operator = self.operator
+        if operator in ('=', '=='):
+            return index.equals(self.values[0])
+        if operator == '!=':
+            return ~index.equals(self.values[0])
+        if operator == '~':
+            return index.contains(self.values[0])
+        if operator == 'in':
+            return index.isin(self.values)
+        if operator == 'between':
+            return index.between(self.values[0], self.values[1])
+        return index.compare(operator, self.values[0])
+
+class Search:
+    """Bare text: rows where any column contains it"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def evaluate(self, query: 'DataQuery') -> np.ndarray:
+        mask = np.zeros(query.length, dtype=bool)
+        for column in query.columns:
+            mask |= query.index(column).contains(self.text)
+        return mask
+
+class And:
+    def __init__(self, items: list):
+        self.items = items
+
+    def evaluate(self, query: 'DataQuery') -> np.ndarray:
+        mask = np.ones(query.length, dtype=bool)
+        for item in self.items:
+            mask &= item.evaluate(query)
+        return mask
+
+class Or:
+    def __init__(self, items: list):
+        self.items = items
+
+    def evaluate(self, query: 'DataQuery') -> np.ndarray:
+        mask = np.zeros(query.length, dtype=bool)
+        for item in self.items:
+            mask |= item.evaluate(query)
+        return mask
+
+class Not:
+    def __init__(self, item):
+        self.item = item
+
+    def evaluate(self, query: 'DataQuery') -> np.ndarray:
+        return ~self.item.evaluate(query)
+
+def parse_query(text: str):
+    """Parse a filter expression into a tree of Comparison/Search/And/Or/Not nodes
+
+    Examples:
+        goblin                      any column contains "goblin"
+        type = Creature             exact match
+        cost >= 3 and cost < 6      numeric comparisons; 'and' may be left out
+        name ~ fire or name ~ ice   '~' is case-insensitive "contains"
+        rarity in (rare, mythic)    any of several values
+        power between 2 and 4       inclusive range
+        not type = Land             negation; parentheses group
+        "card name" = 'Fire Bolt'   quote names and values with spaces
+    """
+    return _Parser(_tokenize(text)).parse()
+
+def _tokenize(text: str) -> List[tuple]:
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN_PATTERN.match(text, position)
+        if match is None or match.end() == position:
+            raise QueryError(f"Unexpected character at position {position + 1}: '{text[position:].strip()[:1]}'")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'string':
+            value = re.sub(r"\\(.)", r"\1", value[1:-1])
+        tokens.append((kind, value))
+        position = match.end()
+    return tokens
+
+class _Parser:
+    def __init__(self, tokens: List[tuple]):
+        self.tokens = tokens
+        self.position = 0
+
+    def parse(self):
+        if not self.tokens:
+            raise QueryError("Empty query")
+        node = self._or()
+        if self._peek() is not None:
+            raise QueryError(f"Unexpected '{self._peek()[1]}'")
+        return node
+
+    def _peek(self, offset: int = 0) -> Optional[tuple]:
+        position = self.position + offset
+        return self.tokens[position] if position < len(self.tokens) else None
+
+    def _next(self) -> tuple:
+        token = self._peek()
+        if token is None:
+            raise QueryError("Query ends too early")
+        self.position += 1
+        return token
+
+    def _is_keyword(self, token: Optional[tuple], keyword: str) -> bool:
+        return token is not None and token[0] == 'word' and token[1].lower() == keyword
+
+    def _or(self):
+        items = [self._and()]
+        while self._is_keyword(self._peek(), 'or'):
+            self._next()
+            items.append(self._and())
+        return items[0] if len(items) == 1 else Or(items)
+
+    def _and(self):
+        items = [self._not()]
+        while True:
+            token = self._peek()
+            if token is None or token == ('punct', ')') or self._is_keyword(token, 'or'):
+                break
+            if self._is_keyword(token, 'and'):
+                self._next()
+            items.append(self._not())
+        return items[0] if len(items) == 1 else And(items)
+
+    def _not(self):
+        if self._is_keyword(self._peek(), 'not'):
+            self._next()
+            return Not(self._not())
+        return self._atom()
+
+    def _atom(self):
+        token = self._next()
+        if token == ('punct', '('):
+            node = self._or()
+            if self._next() != ('punct', ')'):
+                raise QueryError("Missing ')'")
+            return node
+        if token[0] not in ('word', 'string'):
+            raise QueryError(f"Unexpected '{token[1]}'")
+
+        following = self._peek()
+        if following is not None and following[0] == 'op':
+            self._next()
+            return Comparison(token[1], following[1], [self._value()])
+        if self._is_keyword(following, 'in'):
+            self._next()
+            return Comparison(token[1], 'in', self._value_list())
+        if self._is_keyword(following, 'between'):
+            self._next()
+            low = self._value()
+            if not self._is_keyword(self._next_or_none(), 'and'):
+                raise QueryError("Expected 'and' in 'between'")
+            return Comparison(token[1], 'between', [low, self._value()])
+        if token[0] == 'word' and token[1].lower() in _KEYWORDS:
+            raise QueryError(f"Unexpected '{token[1]}'")
+        return Search(token[1])
+
+    def _next_or_none(self) -> Optional[tuple]:
+        token = self._peek()
+        if token is not None:
+            self.position += 1
+        return token
+
+    def _value(self) -> str:
+        token = self._next()
+        if token[0] not in ('word', 'string'):
+            raise QueryError(f"Expected a value, got '{token[1]}'")
+        return token[1]
+
+    def _value_list(self) -> List[str]:
+        if self._next() != ('punct', '('):
+            raise QueryError("Expected '(' after 'in'")
+        values = [self._value()]
+        while self._peek() == ('punct', ','):
+            self._next()
+            values.append(self._value())
+        if self._next() != ('punct', ')'):
+            raise QueryError("Missing ')'")
+        return values
+
+class DataQuery:
+    """Filter a loaded data source through per-column indexes"""
+
+    def __init__(self, data: pd.DataFrame):
+        self.data = data
+        self.length = len(data)
+        self.columns = [str(column) for column in data.columns]
+        # Column names are matched case-insensitively
+        self._names = {column.lower(): original for column, original in zip(self.columns, data.columns)}
+        self._indexes: Dict[str, ColumnIndex] = {}
+        self._lock = threading.Lock()
+
+    def index(self, column: str) -> ColumnIndex:
+        """The index of a column, building it on first use"""
+        original = self._names.get(str(column).lower())
+        if original is None:
+            raise QueryError(f"Unknown column '{column}'")
+        with self._lock:
+            index = self._indexes.get(original)
+            if index is None:
+                index = ColumnIndex(self.data[original])
+                self._indexes[original] = index
+        return index
+
+    def mask(self, condition) -> np.ndarray:
+        """Boolean row mask for an expression string or parsed node"""
+        if isinstance(condition, str):
+            condition = parse_query(condition)
+        return condition.evaluate(self)
+
+    def positions(self, condition) -> np.ndarray:
+        """Sorted row positions matching an expression string or parsed node"""
+        return np.flatnonzero(self.mask(condition))
+
+# Queries for the most recently used data sources, keyed by file and sidecar state
+MAX_CACHED_QUERIES = 4
+_queries = OrderedDict()
+_queries_lock = threading.Lock()
+
+def get_query(csv_path) -> DataQuery:
+    """Shared DataQuery over a data source, rebuilt when the file changes"""
+    from utils import columnar_cache
+    path = str(csv_path)
+    data = None
+    meta = columnar_cache.load_metadata(path)
+    if meta is None:
+        # Loading refreshes the sidecar, which gives the stamp to key on
+        data = columnar_cache.read_frame(path)
+        meta = columnar_cache.load_metadata(path) or {}
+    stamp = meta.get('source_stamp')
+
+    with _queries_lock:
+        cached = _queries.get(path)
+        if cached is not None and stamp is not None and cached[0] == stamp:
+            _queries.move_to_end(path)
+            return cached[1]
+
+    query = DataQuery(data if data is not None else columnar_cache.read_frame(path))
+    with _queries_lock:
+        _queries[path] = (stamp, query)
+        _queries.move_to_end(path)
+        while len(_queries) > MAX_CACHED_QUERIES:
+            _queries.popitem(last=False)
+    return query
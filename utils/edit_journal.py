@@ -0,0 +1,155 @@
+import csv
+import os
+import shutil
+from typing import Dict, Hashable, Iterable, List, Optional
+import pandas as pd
+
+def _stamp(file_path) -> Optional[List[int]]:
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+def is_blank_record(record: List[str]) -> bool:
+    """Blank and whitespace-only lines, which pandas skips when loading a CSV"""
+    return len(record) <= 1 and not "".join(record).strip()
+
+def write_frame(data: pd.DataFrame, file_path):
+    """Write a whole DataFrame to CSV through a temp file and rename"""
+    temp_path = f"{file_path}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+            data.to_csv(f, index=False)
+        os.replace(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+class EditJournal:
+    """Cell, row and column edits made to a loaded data source since it was last saved
+
+    Rows are identified by DataFrame index labels: loaded rows are labelled by
+    their position among the file's data rows, skipping blank lines as pandas
+    does when loading, and added rows get fresh labels after those.
+    Edited cells are stored as the text the user typed, so saving writes
+    exactly that text and leaves every untouched cell's text as it was.
+    """
+
+    def __init__(self, file_path, base_rows: int):
+        self.file_path = file_path
+        self.base_rows = base_rows
+        self.base_stamp = _stamp(file_path)
+
+        self.cells: Dict[Hashable, Dict[Hashable, str]] = {}
+        self.deleted = set()
+        self.added_rows: List[Hashable] = []
+        self.added_columns: List[str] = []
+        self._next_label = base_rows
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self.cells or self.deleted or self.added_rows or self.added_columns)
+
+    @property
+    def append_only(self) -> bool:
+        """True when the only changes are new rows, which can be appended to the file as-is"""
+        if self.deleted or self.added_columns:
+            return False
+        return all(label in self._added_set() for cells in self.cells.values() for label in cells)
+
+    def record_cell(self, label, column, text: str):
+        self.cells.setdefault(column, {})[label] = text
+
+    def add_row(self):
+        """Reserve the label of a new row at the end"""
+        label = self._next_label
+        self._next_label += 1
+        self.added_rows.append(label)
+        return label
+
+    def delete_rows(self, labels: Iterable):
+        added = self._added_set()
+        for label in labels:
+            if label in added:
+                # Never saved: forget it instead of deleting it from the file
+                self.added_rows.remove(label)
+            else:
+                self.deleted.add(label)
+            for cells in self.cells.values():
+                cells.pop(label, None)
+
+    def add_column(self, name: str):
+        self.added_columns.append(name)
+
+    def save(self, columns: List[str]):
+        """Apply the journal to the file through a temp file and rename
+
+        Appending rows copies the file and adds them at the end; any other
+        change streams the file through record by record, applying edits.
+        """
+        temp_path = f"{self.file_path}.tmp"
+        try:
+            if self.append_only:
+                shutil.copyfile(self.file_path, temp_path)
+                self._append_rows(temp_path, columns)
+            else:
+                self._rewrite(temp_path, columns)
+            os.replace(temp_path, self.file_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def source_changed(self) -> bool:
+        """Check if the file was changed by something else since it was loaded"""
+        return _stamp(self.file_path) != self.base_stamp
+
+    def _added_set(self) -> set:
+        return set(self.added_rows)
+
+    def _new_rows_frame(self, columns: List[str]) -> pd.DataFrame:
+        """Text of the added rows, blank except where cells were typed in"""
+        return pd.DataFrame({
+            column: [self.cells.get(column, {}).get(label, "") for label in self.added_rows]
+            for column in columns
+        }, index=self.added_rows, dtype=object)
+
+    def _append_rows(self, path, columns: List[str]):
+        with open(path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) not in (b"\n", b"\r"):
+                    f.write(os.linesep.encode())
+        with open(path, 'a', encoding='utf-8', newline='') as f:
+            self._new_rows_frame(columns).to_csv(f, header=False, index=False)
+
+    def _rewrite(self, path, columns: List[str]):
+        # The csv module keeps quoted multi-line cells in one record and reports
+        # blank lines, which are copied through without taking a row label
+        positions = {column: position for position, column in enumerate(columns)}
+        edits = [(positions[column], cells) for column, cells in self.cells.items() if column in positions]
+        with open(self.file_path, 'r', encoding='utf-8', newline='') as source, \
+                open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, lineterminator=os.linesep)
+            reader = csv.reader(source)
+            next(reader, None)
+            writer.writerow(columns)
+            label = 0
+            for record in reader:
+                if is_blank_record(record):
+                    writer.writerow(record)
+                    continue
+                row_label = label
+                label += 1
+                if row_label in self.deleted:
+                    continue
+                # Short rows and added columns are padded with empty cells
+                record.extend([""] * (len(columns) - len(record)))
+                for position, cells in edits:
+                    text = cells.get(row_label)
+                    if text is not None:
+                        record[position] = text
+                writer.writerow(record)
+            if self.added_rows:
+                self._new_rows_frame(columns).to_csv(f, header=False, index=False)
@@ -0,0 +1,93 @@
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import List, Optional
+from utils.export_manifest import content_hash
+from utils.render_cache import decode_result, encode_result
+
+class ExportCheckpoint:
+    """Finished pages of an export, kept so later runs only render pages that changed
+
+    Each finished page is kept as a fragment file holding the page's card
+    hashes followed by its render results, stored as JSON plus PNG images.
+    A later run of the same export, including one resuming after an
+    interruption, replays every fragment whose hashes still match into a
+    fresh sheet writer and only renders the other pages.
+    """
+
+    def __init__(self, checkpoint_dir, scope: dict):
+        self.directory = Path(checkpoint_dir) / content_hash(scope)
+        self.state_path = self.directory / 'checkpoint.json'
+        self.scope = scope
+
+    def start(self, template_hash: str, cards_per_page: int):
+        """Begin an export, dropping pages stored for a different template or page layout"""
+        state = self._load()
+        if (state is None or state.get('template') != template_hash
+                or state.get('cards_per_page') != cards_per_page):
+            # Made for a different template or page layout: start over
+            self.clear()
+            self._save_state({
+                'scope': self.scope,
+                'template': template_hash,
+                'cards_per_page': cards_per_page
+            })
+
+    def page_keys(self, page: int) -> Optional[List[str]]:
+        """Card hashes a finished page was rendered from, without decoding its images"""
+        try:
+            with open(self._page_path(page), 'rb') as f:
+                return json.loads(f.readline().decode('utf-8'))
+        except Exception:
+            return None
+
+    def load_page(self, page: int) -> list:
+        """Render results of one finished page"""
+        with open(self._page_path(page), 'rb') as f:
+            f.readline()
+            return decode_result(f.read())
+
+    def save_page(self, page: int, keys: List[str], results: list):
+        """Store one finished page"""
+        path = self._page_path(page)
+        temp_path = path.with_suffix('.tmp')
+        # Write then rename so a crash never leaves a truncated page
+        with open(temp_path, 'wb') as f:
+            f.write(json.dumps(keys).encode('utf-8') + b"\n")
+            f.write(encode_result(results))
+        os.replace(temp_path, path)
+
+    def discard_from(self, page: int):
+        """Delete fragments from a page on, e.g. past the end of a shorter deck"""
+        while self._page_path(page).exists():
+            try:
+                self._page_path(page).unlink()
+            except OSError:
+                break
+            page += 1
+
+    def clear(self):
+        """Delete the checkpoint and all of its fragments"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _page_path(self, page: int) -> Path:
+        return self.directory / f"page_{page:05d}.page"
+
+    def _load(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading export checkpoint: {e}")
+            return None
+
+    def _save_state(self, state: dict):
+        # Write then rename so a crash never leaves a half-written checkpoint
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temp_path = self.state_path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, default=repr)
+        os.replace(temp_path, self.state_path)
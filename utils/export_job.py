@@ -0,0 +1,148 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Optional
+
+class ExportCancelled(Exception):
+    """Raised inside an export job once cancel() has been requested"""
+
+class ExportError(Exception):
+    """An export problem to show the user as-is"""
+
+class ExportProgress:
+    """Progress snapshot posted from an export job to the UI thread"""
+
+    def __init__(self, done: int, total: int, elapsed: float, message: str = "", data: Any = None):
+        self.done = done
+        self.total = total
+        self.elapsed = elapsed
+        self.message = message
+        self.data = data
+
+    @property
+    def fraction(self) -> float:
+        return self.done / self.total if self.total else 0.0
+
+    @property
+    def rate(self) -> float:
+        """Items per second so far"""
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Estimated seconds remaining, or None before the first item"""
+        rate = self.rate
+        return (self.total - self.done) / rate if rate > 0 else None
+
+    def describe(self, noun: str = "card") -> str:
+        """One-line status such as 'Card 12 of 300 - 4.2 cards/s - 1:08 left'"""
+        text = self.message or f"{noun.capitalize()} {self.done} of {self.total}"
+        if self.done:
+            text += f" - {self.rate:.1f} {noun}s/s"
+        eta = self.eta
+        if eta is not None and self.done < self.total:
+            minutes, seconds = divmod(int(eta + 0.5), 60)
+            text += f" - {minutes}:{seconds:02d} left"
+        return text
+
+class ExportJob:
+    """Run an export on a background thread and report back to Tk through a polled queue
+
+    The work function receives the job and calls report() and check_cancelled()
+    as it goes. Callbacks always run on the Tk thread.
+    """
+
+    def __init__(self, widget, work: Callable[['ExportJob'], Any],
+                 on_progress: Optional[Callable[[ExportProgress], None]] = None,
+                 on_done: Optional[Callable[[Any], None]] = None,
+                 on_error: Optional[Callable[[Exception], None]] = None,
+                 on_cancel: Optional[Callable[[], None]] = None,
+                 poll_ms: int = 100):
+        self.widget = widget
+        self.work = work
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.poll_ms = poll_ms
+
+        self._queue = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._thread = None
+        self._started = 0.0
+        self.running = False
+
+    def start(self):
+        """Start the work thread and begin polling for its messages"""
+        self.running = True
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="export-job", daemon=True)
+        self._thread.start()
+        self.widget.after(self.poll_ms, self._poll)
+
+    def cancel(self):
+        """Ask the work function to stop at its next check"""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        """Raise ExportCancelled if cancel() was called (work thread)"""
+        if self._cancel_event.is_set():
+            raise ExportCancelled()
+
+    def report(self, done: int, total: int, message: str = "", data: Any = None):
+        """Post progress to the UI thread (work thread)"""
+        elapsed = time.perf_counter() - self._started
+        self._queue.put(('progress', ExportProgress(done, total, elapsed, message, data)))
+
+    def _run(self):
+        try:
+            result = self.work(self)
+            self._queue.put(('done', result))
+        except ExportCancelled:
+            self._queue.put(('cancelled', None))
+        except ExportError as e:
+            self._queue.put(('error', e))
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self._queue.put(('error', e))
+
+    def _poll(self):
+        """Drain the queue on the Tk thread; only the newest progress is shown"""
+        latest = None
+        finished = None
+        try:
+            while True:
+                kind, value = self._queue.get_nowait()
+                if kind == 'progress':
+                    latest = value
+                else:
+                    finished = (kind, value)
+        except queue.Empty:
+            pass
+
+        if finished is None:
+            self.widget.after(self.poll_ms, self._poll)
+        else:
+            self.running = False
+
+        try:
+            if latest is not None and self.on_progress:
+                self.on_progress(latest)
+            if finished is None:
+                return
+            kind, value = finished
+            if kind == 'done' and self.on_done:
+                self.on_done(value)
+            elif kind == 'cancelled' and self.on_cancel:
+                self.on_cancel()
+            elif kind == 'error' and self.on_error:
+                self.on_error(value)
+        except Exception as e:
+            print(f"Error handling export progress: {e}")
+            import traceback
+            traceback.print_exc()
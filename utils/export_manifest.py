@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import List, Optional
+
+def content_hash(value) -> str:
+    """Stable SHA-256 of JSON-like data"""
+    encoded = json.dumps(value, sort_keys=True, default=repr, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+class ExportDiff:
+    """Which cards and pages of an export changed since the last run"""
+
+    def __init__(self, changed_cards: List[int], changed_pages: List[int], total_cards: int, total_pages: int):
+        self.changed_cards = changed_cards
+        self.changed_pages = changed_pages
+        self.total_cards = total_cards
+        self.total_pages = total_pages
+
+    @property
+    def unchanged(self) -> bool:
+        return not self.changed_cards and not self.changed_pages
+
+class ExportManifest:
+    """Per-card content hashes from the last export of one template, data source and page layout"""
+
+    def __init__(self, manifest_dir, scope: dict):
+        self.manifest_dir = Path(manifest_dir)
+        self.scope = scope
+        self.path = self.manifest_dir / f"{content_hash(scope)}.json"
+        self.previous = self._load()
+
+    def diff(self, card_keys: List[str], template_hash: str, cards_per_page: int) -> ExportDiff:
+        """Compare this run's card hashes with the last run's, card by card and page by page"""
+        total_pages = -(-len(card_keys) // cards_per_page) if card_keys else 0
+        previous = self.previous
+        if (previous is None or previous.get('template') != template_hash
+                or previous.get('cards_per_page') != cards_per_page):
+            # Nothing to compare against: everything counts as changed
+            return ExportDiff(list(range(len(card_keys))), list(range(total_pages)), len(card_keys), total_pages)
+
+        old_keys = previous.get('cards', [])
+        changed_cards = [
+            index for index, key in enumerate(card_keys)
+            if index >= len(old_keys) or old_keys[index] != key
+        ]
+        changed_pages = sorted({index // cards_per_page for index in changed_cards})
+
+        # A shorter deck drops (or shortens) pages at the end
+        if len(card_keys) < len(old_keys) and total_pages and total_pages - 1 not in changed_pages:
+            changed_pages.append(total_pages - 1)
+        return ExportDiff(changed_cards, changed_pages, len(card_keys), total_pages)
+
+    def may_be_current(self, template_hash: str, output_path: str) -> bool:
+        """Cheap pre-check: could the last export still be up to date, before hashing any cards?"""
+        if self.previous is None or self.previous.get('template') != template_hash:
+            return False
+        if os.path.abspath(output_path) != self.previous.get('output'):
+            return False
+        try:
+            stat = os.stat(output_path)
+        except OSError:
+            return False
+        return [stat.st_mtime_ns, stat.st_size] == self.previous.get('output_stamp')
+
+    def is_current(self, diff: ExportDiff, output_path: str) -> bool:
+        """Check if the last export already produced this exact output and the file is untouched"""
+        if not diff.unchanged or self.previous is None:
+            return False
+        return self.may_be_current(self.previous.get('template'), output_path)
+
+    def save(self, card_keys: List[str], template_hash: str, cards_per_page: int, output_path: str):
+        """Record this run's card hashes and the file it wrote"""
+        stat = os.stat(output_path)
+        data = {
+            'scope': self.scope,
+            'template': template_hash,
+            'cards_per_page': cards_per_page,
+            'cards': card_keys,
+            'output': os.path.abspath(output_path),
+            'output_stamp': [stat.st_mtime_ns, stat.st_size]
+        }
+        try:
+            self.manifest_dir.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix('.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, default=repr)
+            os.replace(temp_path, self.path)
+            self.previous = data
+        except Exception as e:
+            print(f"Error saving export manifest: {e}")
+
+    def _load(self) -> Optional[dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading export manifest: {e}")
+            return None
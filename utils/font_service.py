@@ -0,0 +1,120 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from PIL import ImageFont
+
+# Tk renders font sizes in points; the canvas runs at 96 pixels per inch
+POINTS_TO_PIXELS = 96 / 72
+
+class FontService:
+    """Resolve template fonts to files once and share loaded faces between renderers"""
+
+    def __init__(self, fonts_dir: str = "assets/fonts", max_faces: int = 256):
+        self.fonts_dir = fonts_dir
+        self.max_faces = max_faces
+        self._paths: Dict[tuple, Optional[str]] = {}
+        self._faces = OrderedDict()
+        self._tk_fonts = {}
+        self._lock = threading.RLock()
+
+    def resolve(self, font_name: str, bold: bool = False, italic: bool = False) -> Optional[str]:
+        """Resolve a family and style to a font file, or None if only the default font fits"""
+        key = (font_name, bool(bold), bool(italic))
+        with self._lock:
+            if key in self._paths:
+                return self._paths[key]
+
+        # Construct font style string
+        font_style = []
+        if bold: font_style.append('Bold')
+        if italic: font_style.append('Italic')
+        font_filename = f"{font_name}{' '.join(font_style)}.ttf" if font_style else f"{font_name}.ttf"
+
+        path = None
+        for candidate in (os.path.join(self.fonts_dir, font_filename), font_filename, f"{font_name}.ttf"):
+            try:
+                # truetype also searches the system font directories
+                path = ImageFont.truetype(candidate, 12).path
+                break
+            except Exception:
+                continue
+
+        with self._lock:
+            self._paths[key] = path
+        return path
+
+    def face(self, path: Optional[str], pixel_size: int):
+        """Get a loaded face for a font file at a pixel size; None loads the default font"""
+        key = (path, pixel_size)
+        with self._lock:
+            face = self._faces.get(key)
+            if face is not None:
+                self._faces.move_to_end(key)
+                return face
+
+        if path:
+            face = ImageFont.truetype(path, pixel_size)
+        else:
+            try:
+                face = ImageFont.load_default(pixel_size)
+            except TypeError:
+                # Pillow < 10.1 has no sized default font
+                face = ImageFont.load_default()
+
+        with self._lock:
+            self._faces[key] = face
+            while len(self._faces) > self.max_faces:
+                self._faces.popitem(last=False)
+        return face
+
+    def get_font(self, font_name: str, font_size, bold: bool = False, italic: bool = False):
+        """Get the face for a text element's font settings (size in points)"""
+        pixel_size = max(1, round(float(font_size) * POINTS_TO_PIXELS))
+        return self.face(self.resolve(font_name, bold, italic), pixel_size)
+
+    def metrics(self, face) -> Tuple[int, int, int]:
+        """Get ascent, descent and line height of a face"""
+        if hasattr(face, 'getmetrics'):
+            ascent, descent = face.getmetrics()
+        else:
+            ascent, descent = getattr(face, 'size', 12), 0
+        return ascent, descent, ascent + descent
+
+    def text_width(self, face, text: str) -> float:
+        """Measure the advance width of a line of text"""
+        return face.getlength(text)
+
+    def family(self, font_name: str, bold: bool = False, italic: bool = False) -> str:
+        """Get the family name of the face a font resolves to"""
+        path = self.resolve(font_name, bold, italic)
+        if path:
+            try:
+                return self.face(path, 12).getname()[0] or font_name
+            except Exception:
+                pass
+        return font_name
+
+    def tk_font(self, font_name: str, font_size, bold: bool = False, italic: bool = False):
+        """Get a cached Tk font using the same face as the headless renderer"""
+        key = (font_name, font_size, bool(bold), bool(italic))
+        tk_font = self._tk_fonts.get(key)
+        if tk_font is None:
+            from tkinter import font as tkfont
+            tk_font = tkfont.Font(
+                family=self.family(font_name, bold, italic),
+                size=int(round(float(font_size))),
+                weight='bold' if bold else 'normal',
+                slant='italic' if italic else 'roman'
+            )
+            self._tk_fonts[key] = tk_font
+        return tk_font
+
+_font_services: Dict[str, FontService] = {}
+
+def get_font_service(fonts_dir: str = "assets/fonts") -> FontService:
+    """Get the shared font service for a fonts directory"""
+    service = _font_services.get(fonts_dir)
+    if service is None:
+        service = _font_services[fonts_dir] = FontService(fonts_dir)
+    return service
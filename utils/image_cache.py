@@ -0,0 +1,104 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+from PIL import Image
+
+# Default budget for decoded pixels held in memory
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+class ImageCache:
+    """Process-wide LRU cache of decoded and resized images, bounded by pixel bytes
+
+    Cached images are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, path: str, size: Optional[Tuple[int, int]] = None,
+            resample=Image.Resampling.LANCZOS, mode: str = 'RGBA') -> Image.Image:
+        """Get an image decoded in the given mode and optionally resized to size"""
+        mtime = os.stat(path).st_mtime_ns
+        if size is not None:
+            size = (max(1, int(size[0])), max(1, int(size[1])))
+        key = (path, mtime, size, resample if size else None, mode)
+
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        # Resized variants are derived from the cached full-size decode
+        if size is None:
+            with Image.open(path) as source:
+                image = source.convert(mode)
+        else:
+            image = self.get(path, None, mode=mode)
+            if image.size != size:
+                image = image.resize(size, resample)
+        self._store(key, image)
+        return image
+
+    def thumbnail(self, path: str, max_size: Tuple[int, int]) -> Image.Image:
+        """Get an aspect-preserving thumbnail that fits within max_size"""
+        source = self.get(path, mode='RGBA')
+        scale = min(max_size[0] / source.width, max_size[1] / source.height, 1.0)
+        return self.get(path, (round(source.width * scale), round(source.height * scale)))
+
+    def stats(self) -> dict:
+        """Report hit/miss counters and memory use"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+    def clear(self):
+        """Drop every cached image"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _lookup(self, key) -> Optional[Image.Image]:
+        with self._lock:
+            image = self._entries.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def _store(self, key, image: Image.Image):
+        size = self._image_bytes(image)
+        with self._lock:
+            if key in self._entries:
+                return
+            # Images larger than the whole budget are returned but never kept
+            if size > self.max_bytes:
+                return
+            self._entries[key] = image
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= self._image_bytes(evicted)
+
+    def _image_bytes(self, image: Image.Image) -> int:
+        return image.width * image.height * len(image.getbands())
+
+_image_cache = None
+
+def get_image_cache() -> ImageCache:
+    """Get the shared image cache for this process"""
+    global _image_cache
+    if _image_cache is None:
+        _image_cache = ImageCache()
+    return _image_cache
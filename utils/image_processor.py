@@ -1,262 +1,342 @@
-from PIL import Image, ImageDraw, ImageFont
-import os
-from typing import Tuple, Dict
+from PIL import Image, ImageDraw, ImageColor
+from typing import Tuple, Dict, Optional
 import io
+from utils.image_cache import get_image_cache
+from utils.qr_cache import get_qr_cache
+from utils.font_service import get_font_service
 
 class ImageProcessor:
     def __init__(self, fonts_dir="assets/fonts"):
         self.fonts_dir = fonts_dir
+        self.font_service = get_font_service(fonts_dir)
         self._load_default_fonts()
-    
+
     def _load_default_fonts(self):
         """Load default fonts"""
-        self.default_font = ImageFont.load_default()
-        try:
-            # Try to load a better default font if available
-            font_path = os.path.join(self.fonts_dir, "Arial.ttf")
-            if os.path.exists(font_path):
-                self.default_font = ImageFont.truetype(font_path, 12)
-        except Exception:
-            pass
-    
+        # Try to load a better default font if available
+        self.default_font = self.font_service.face(self.font_service.resolve('Arial'), 12)
+
+    def render_template(self, template_data: Dict) -> Image.Image:
+        """Render a template (or mapped card) headlessly at its actual pixel size"""
+        width, height = self.get_template_size(template_data)
+        properties = {
+            'width': width,
+            'height': height,
+            'background_color': template_data.get('background_color', 'white')
+        }
+        return self.create_component_image(properties, template_data.get('elements', []))
+
+    def get_template_size(self, template_data: Dict) -> Tuple[int, int]:
+        """Get the pixel size a template renders at, matching the editor canvas"""
+        dimensions = template_data.get('dimensions', {})
+        width = dimensions.get('actual_width', dimensions.get('width', 300))
+        height = dimensions.get('actual_height', dimensions.get('height', 300))
+        return max(1, int(width)), max(1, int(height))
+
+    def flatten(self, img: Image.Image, background: str = 'white') -> Image.Image:
+        """Flatten an RGBA image onto a solid background and return it as RGB"""
+        if img.mode in ('RGBA', 'LA'):
+            flat = Image.new('RGB', img.size, background)
+            flat.paste(img, mask=img.split()[-1])
+            return flat
+        return img.convert('RGB')
+
     def create_component_image(self, properties: Dict, elements: list) -> Image:
         """Create a new component image with all elements"""
         # Create base image
-        width = properties.get('width', 300)
-        height = properties.get('height', 300)
-        
+        width = int(properties.get('width', 300))
+        height = int(properties.get('height', 300))
+
         # Create image with transparent background
         img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
         draw = ImageDraw.Draw(img)
-        
+
         # Set background color if specified
         if bg_color := properties.get('background_color'):
             bg_color = self._convert_color(bg_color)
-            draw.rectangle([0, 0, width, height], fill=bg_color)
-        
-        # Sort elements by z-index (if available)
+            if bg_color:
+                draw.rectangle([0, 0, width, height], fill=bg_color)
+
+        # Sort elements by z-index (if available); the sort is stable so list
+        # order, which is how the editor canvas stacks items, is kept otherwise
         sorted_elements = sorted(elements, key=lambda e: e.get('properties', {}).get('z_index', 0))
-        
+
         # Draw all elements
         for element in sorted_elements:
             self._draw_element(img, draw, element)
-        
+
         return img
-    
+
     def _draw_element(self, img: Image, draw: ImageDraw, element: Dict):
         """Draw a single element on the image"""
         element_type = element.get('type')
         properties = element.get('properties', {})
-        x = element.get('x', 0)
-        y = element.get('y', 0)
-        width = properties.get('width', 100)
-        height = properties.get('height', 100)
-        
+        x = int(element.get('x', 0))
+        y = int(element.get('y', 0))
+        width = int(properties.get('width', 100))
+        height = int(properties.get('height', 100))
+
         if element_type == 'text':
-            # Get text properties with exact same keys as canvas
-            text = properties.get('text', 'New Text')
-            font_name = properties.get('font', 'Arial')
-            font_size = properties.get('fontSize', 12)
-            fill = properties.get('fill', 'black')
-            bold = properties.get('bold', False)
-            italic = properties.get('italic', False)
-            align = properties.get('align', 'left')
-            
-            # Construct font style string
-            font_style = []
-            if bold: font_style.append('Bold')
-            if italic: font_style.append('Italic')
-            font_filename = f"{font_name}{' '.join(font_style)}.ttf" if font_style else f"{font_name}.ttf"
-            
+            self._draw_text(draw, properties, x, y, width)
+
+        elif element_type == 'shape':
+            layer = self.render_shape(properties, width, height)
+            if layer:
+                self._composite(img, layer, x, y)
+
+        elif element_type == 'image':
+            # Draw image
+            image_path = properties.get('path')
+            if not image_path:
+                return
             try:
-                font = ImageFont.truetype(
-                    os.path.join(self.fonts_dir, font_filename),
-                    font_size
+                element_img = get_image_cache().get(image_path, (width, height))
+                self._composite(img, element_img, x, y)
+            except Exception as e:
+                print(f"Error drawing image element: {e}")
+                # Match the editor placeholder for missing images
+                draw.rectangle([x, y, x + width, y + height], fill='lightgray', outline='gray')
+
+        elif element_type == 'qrcode':
+            # Draw QR code
+            try:
+                qr_img = self.render_qrcode(
+                    properties.get('content', ''),
+                    int(properties.get('width', 200)),
+                    int(properties.get('height', 200))
                 )
+                self._composite(img, qr_img.convert('RGBA'), x, y)
             except Exception as e:
-                print(f"Font error: {e}, using default font")
-                font = self.default_font
-            
-            # Calculate text wrapping and positioning
-            lines = []
+                print(f"Error drawing QR code: {e}")
+
+    def _draw_text(self, draw: ImageDraw, properties: Dict, x: int, y: int, width: int):
+        """Draw a wrapped, aligned text element the way the Tk canvas lays it out"""
+        # Get text properties with exact same keys as canvas
+        text = str(properties.get('text', 'New Text'))
+        font_name = properties.get('font', 'Arial')
+        font_size = properties.get('fontSize', 12)
+        fill = self._convert_color(properties.get('fill', 'black')) or 'black'
+        bold = properties.get('bold', False)
+        italic = properties.get('italic', False)
+        align = properties.get('align', 'left')
+
+        font = self.get_font(font_name, font_size, bold, italic)
+        lines = self.wrap_text(draw, text, font, width)
+
+        # Line spacing follows the font's own ascent and descent
+        ascent, descent, line_height = self.font_service.metrics(font)
+
+        # Draw each line with proper alignment
+        for i, line in enumerate(lines):
+            line_width = draw.textlength(line, font=font)
+
+            # Calculate x position based on alignment
+            if align == 'center':
+                line_x = x + (width - line_width) / 2
+            elif align == 'right':
+                line_x = x + width - line_width
+            else:  # left
+                line_x = x
+
+            # Draw the line
+            draw.text(
+                (line_x, y + i * line_height),
+                line,
+                font=font,
+                fill=fill
+            )
+
+    def wrap_text(self, draw: ImageDraw, text: str, font, width: int) -> list:
+        """Wrap text to the given width, keeping explicit line breaks"""
+        lines = []
+        for paragraph in text.split('\n'):
             current_line = []
-            words = text.split()
-            
-            for word in words:
+            for word in paragraph.split():
                 current_line.append(word)
                 test_line = ' '.join(current_line)
-                bbox = draw.textbbox((0, 0), test_line, font=font)
-                if bbox[2] - bbox[0] > width and len(current_line) > 1:
+                if draw.textlength(test_line, font=font) > width and len(current_line) > 1:
                     lines.append(' '.join(current_line[:-1]))
                     current_line = [word]
             lines.append(' '.join(current_line))
-            
-            # Calculate total text height
-            line_height = font.getsize('hg')[1] * 1.2  # 1.2 for line spacing
-            total_height = line_height * len(lines)
-            
-            # Draw each line with proper alignment
-            for i, line in enumerate(lines):
-                bbox = draw.textbbox((0, 0), line, font=font)
-                line_width = bbox[2] - bbox[0]
-                
-                # Calculate x position based on alignment
-                if align == 'center':
-                    line_x = x + (width - line_width) / 2
-                elif align == 'right':
-                    line_x = x + width - line_width
-                else:  # left
-                    line_x = x
-                
-                # Draw the line
-                draw.text(
-                    (line_x, y + i * line_height),
-                    line,
-                    font=font,
-                    fill=fill
-                )
-        
-        elif element_type == 'shape':
-            # Get shape properties
-            fill = properties.get('fill', 'white')
-            outline = properties.get('outline', 'black')
-            radius = int(properties.get('radius', 0))
-            opacity = float(properties.get('opacity', 1.0))
-            outline_width = int(properties.get('outline_width', 1))
-            border_style = properties.get('dash', 'Solid')
-            
-            # Convert colors to RGBA
-            fill_rgba = self._hex_to_rgba(fill, opacity)
-            outline_rgba = self._hex_to_rgba(outline, 1.0)
-            
-            if radius > 0:
-                # Draw rounded rectangle
-                self._draw_rounded_rectangle(
+        return lines
+
+    def get_font(self, font_name: str, font_size, bold: bool = False, italic: bool = False):
+        """Resolve a font for a text element, falling back to the default font"""
+        return self.font_service.get_font(font_name, font_size, bold, italic)
+
+    def render_shape(self, properties: Dict, width: int, height: int) -> Optional[Image.Image]:
+        """Render a shape element to its own RGBA layer"""
+        if width <= 0 or height <= 0:
+            return None
+
+        # Get shape properties
+        fill = properties.get('fill', 'white')
+        outline = properties.get('outline', 'black')
+        radius = int(properties.get('radius', 0))
+        opacity = float(properties.get('opacity', 1.0))
+        outline_width = int(properties.get('outline_width', 1))
+        border_style = properties.get('dash', 'Solid')
+
+        # Convert colors to RGBA
+        fill_rgba = self._hex_to_rgba(fill, opacity)
+        outline_rgba = self._hex_to_rgba(outline, 1.0)  # Border always solid
+
+        layer = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(layer)
+
+        # Dashed borders are drawn separately on top of an unbordered shape
+        solid_outline = outline_rgba if border_style == 'Solid' else None
+
+        if radius > 0:
+            draw.rounded_rectangle(
+                [0, 0, width - 1, height - 1],
+                radius=radius,
+                fill=fill_rgba,
+                outline=solid_outline,
+                width=outline_width
+            )
+        else:
+            draw.rectangle(
+                [0, 0, width - 1, height - 1],
+                fill=fill_rgba,
+                outline=solid_outline,
+                width=outline_width
+            )
+
+        if border_style != 'Solid' and outline_rgba and outline_width > 0:
+            dash_pattern = self.get_dash_pattern(border_style, outline_width)
+            if dash_pattern:
+                self._draw_dashed_border(
                     draw,
-                    [x, y, x + width - 1, y + height - 1],
+                    [0, 0, width - 1, height - 1],
                     radius,
-                    fill_rgba,
                     outline_rgba,
                     outline_width,
-                    border_style
+                    dash_pattern
                 )
-            else:
-                # Draw regular rectangle
-                draw.rectangle(
-                    [x, y, x + width - 1, y + height - 1],
-                    fill=fill_rgba,
-                    outline=outline_rgba,
-                    width=outline_width
+
+        return layer
+
+    def render_qrcode(self, content: str, width: int, height: int) -> Image.Image:
+        """Render a QR code scaled to the element size"""
+        return get_qr_cache().image(content, width, height)
+
+    def get_dash_pattern(self, style: str, width: int):
+        """Convert border style to dash pattern"""
+        # Scale dash patterns based on line width
+        scale = max(1, width)
+
+        patterns = {
+            'Solid': None,  # No dash pattern
+            'Dash': (4 * scale, 2 * scale),  # Long dashes
+            'Dot': (2 * scale, 2 * scale),   # Dots
+            'Dash Dot': (4 * scale, 2 * scale, 2 * scale, 2 * scale),  # Dash-dot pattern
+            'Dash Dot Dot': (4 * scale, 2 * scale, 2 * scale, 2 * scale, 2 * scale, 2 * scale)  # Dash-dot-dot pattern
+        }
+
+        return patterns.get(style, None)  # Default to solid if style not found
+
+    def _draw_dashed_border(self, draw, bbox, radius, color, width, dash_pattern):
+        """Draw dashed border segments along the straight edges of a shape"""
+        x1, y1, x2, y2 = bbox
+        inset = radius if radius > 0 else 0
+        edges = [
+            ((x1 + inset, y1), (x2 - inset, y1)),  # Top
+            ((x2, y1 + inset), (x2, y2 - inset)),  # Right
+            ((x2 - inset, y2), (x1 + inset, y2)),  # Bottom
+            ((x1, y2 - inset), (x1, y1 + inset))   # Left
+        ]
+        for start, end in edges:
+            self._draw_dashed_line(draw, start, end, color, width, dash_pattern)
+
+    def _draw_dashed_line(self, draw, start, end, color, width, dash_pattern):
+        """Draw a straight line as alternating on/off segments"""
+        (sx, sy), (ex, ey) = start, end
+        length = ((ex - sx) ** 2 + (ey - sy) ** 2) ** 0.5
+        if length == 0:
+            return
+        ux, uy = (ex - sx) / length, (ey - sy) / length
+
+        position = 0
+        index = 0
+        while position < length:
+            segment = dash_pattern[index % len(dash_pattern)]
+            segment_end = min(length, position + segment)
+            if index % 2 == 0:  # Even entries are drawn, odd entries are gaps
+                draw.line(
+                    [(sx + ux * position, sy + uy * position),
+                     (sx + ux * segment_end, sy + uy * segment_end)],
+                    fill=color,
+                    width=width
                 )
-        
-        elif element_type == 'image':
-            # Draw image
-            try:
-                with Image.open(properties.get('path', '')) as element_img:
-                    width = properties.get('width', element_img.width)
-                    height = properties.get('height', element_img.height)
-                    element_img = element_img.resize((width, height))
-                    img.paste(element_img, (x, y))
-            except Exception as e:
-                print(f"Error drawing image element: {e}")
-        
-        elif element_type == 'qrcode':
-            # Draw QR code
-            try:
-                import qrcode
-                qr = qrcode.QRCode(version=1, box_size=10, border=4)
-                qr.add_data(properties.get('content', ''))
-                qr.make(fit=True)
-                qr_img = qr.make_image(fill_color="black", back_color="white")
-                
-                width = properties.get('width', 200)
-                height = properties.get('height', 200)
-                qr_img = qr_img.resize((width, height))
-                
-                # Convert to RGBA if necessary
-                if qr_img.mode != 'RGBA':
-                    qr_img = qr_img.convert('RGBA')
-                
-                img.paste(qr_img, (x, y))
-            except Exception as e:
-                print(f"Error drawing QR code: {e}")
-    
+            position = segment_end
+            index += 1
+
+    def _composite(self, img: Image.Image, layer: Image.Image, x: int, y: int):
+        """Alpha-composite a layer onto the image, clipping at the image edges"""
+        if layer.mode != 'RGBA':
+            layer = layer.convert('RGBA')
+
+        # alpha_composite rejects negative offsets, so crop the layer instead
+        left, top = max(0, -x), max(0, -y)
+        right = min(layer.width, img.width - x)
+        bottom = min(layer.height, img.height - y)
+        if right <= left or bottom <= top:
+            return
+        if (left, top, right, bottom) != (0, 0, layer.width, layer.height):
+            layer = layer.crop((left, top, right, bottom))
+        img.alpha_composite(layer, dest=(x + left, y + top))
+
     def resize_image(self, img: Image, size: Tuple[int, int]) -> Image:
         """Resize image maintaining aspect ratio"""
         return img.resize(size, Image.Resampling.LANCZOS)
-    
+
     def crop_image(self, img: Image, box: Tuple[int, int, int, int]) -> Image:
         """Crop image to specified box"""
         return img.crop(box)
-    
+
     def save_image(self, img: Image, output_path: str, format: str = 'PNG'):
         """Save image to file"""
         img.save(output_path, format)
         return output_path
-    
+
+    def to_png_bytes(self, img: Image.Image) -> bytes:
+        """Encode an image as PNG bytes"""
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG')
+        return buffer.getvalue()
+
     def _convert_color(self, color: str) -> str:
         """Convert color to PIL-compatible format"""
         if not color:
             return None
-        
+
         # Handle transparent color
         if color.lower() == 'transparent':
             return None
-        
+
         # Handle hex colors
         if color.startswith('#'):
             return color
-        
+
         # Handle named colors
         try:
-            from PIL import ImageColor
             return ImageColor.getrgb(color)
         except:
             return color
-    
+
     def _hex_to_rgba(self, hex_color: str, opacity: float = 1.0):
-        """Convert hex color to RGBA tuple"""
-        if not hex_color:
+        """Convert hex or named color to RGBA tuple"""
+        if not hex_color or hex_color.lower() == 'transparent':
             return None
-        
+
         try:
-            # Remove '#' if present
-            hex_color = hex_color.lstrip('#')
-            
-            # Convert hex to RGB
-            rgb = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-            
+            # Named colors and short hex forms resolve through PIL
+            rgb = ImageColor.getrgb(hex_color)[:3]
+
             # Add alpha channel
             rgba = rgb + (int(opacity * 255),)
             return rgba
         except Exception as e:
             print(f"Error converting color {hex_color}: {e}")
             return None
-    
-    def _draw_rounded_rectangle(self, draw, coords, radius, fill, outline, width, border_style):
-        """Draw a rounded rectangle"""
-        x1, y1, x2, y2 = coords
-        diameter = radius * 2
-        
-        # Draw the main shape
-        draw.rectangle([x1 + radius, y1, x2 - radius, y2], fill=fill)
-        draw.rectangle([x1, y1 + radius, x2, y2 - radius], fill=fill)
-        
-        # Draw the corners
-        draw.ellipse([x1, y1, x1 + diameter, y1 + diameter], fill=fill)
-        draw.ellipse([x2 - diameter, y1, x2, y1 + diameter], fill=fill)
-        draw.ellipse([x1, y2 - diameter, x1 + diameter, y2], fill=fill)
-        draw.ellipse([x2 - diameter, y2 - diameter, x2, y2], fill=fill)
-        
-        # Draw the outline if specified
-        if outline and width > 0:
-            if border_style == 'Solid':
-                # Draw solid outline
-                draw.arc([x1, y1, x1 + diameter, y1 + diameter], 180, 270, outline, width)
-                draw.arc([x2 - diameter, y1, x2, y1 + diameter], 270, 0, outline, width)
-                draw.arc([x1, y2 - diameter, x1 + diameter, y2], 90, 180, outline, width)
-                draw.arc([x2 - diameter, y2 - diameter, x2, y2], 0, 90, outline, width)
-                draw.line([x1 + radius, y1, x2 - radius, y1], outline, width)
-                draw.line([x1 + radius, y2, x2 - radius, y2], outline, width)
-                draw.line([x1, y1 + radius, x1, y2 - radius], outline, width)
-                draw.line([x2, y1 + radius, x2, y2 - radius], outline, width)
\ No newline at end of file
@@ -0,0 +1,207 @@
+import hashlib
+from typing import Dict, List, Tuple
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+from utils.image_processor import ImageProcessor
+from utils.pdf_generator import CardSheetWriter
+
+# Per-process renderer for dynamic layers (used inside RenderPool workers)
+_layer_processor = None
+
+def render_dynamic_layers(spec: dict) -> dict:
+    """Render each row-dependent layer of one card, cropped to its drawn area"""
+    global _layer_processor
+    if _layer_processor is None:
+        _layer_processor = ImageProcessor()
+
+    width, height = spec['size']
+    results = []
+    for elements in spec['layers']:
+        try:
+            layer = _layer_processor.create_component_image(
+                {'width': width, 'height': height},
+                elements
+            )
+            # Only the painted area goes into the PDF
+            bbox = layer.getbbox()
+            results.append((layer.crop(bbox), bbox[:2]) if bbox else None)
+        except Exception as e:
+            print(f"Error rendering card layer: {e}")
+            results.append(None)
+
+    # Mapped image elements are drawn from shared forms by the writer
+    return {'layers': results, 'images': spec['images']}
+
+class LayerPlan:
+    """Split a template's elements into static and row-dependent layers, in stacking order"""
+
+    def __init__(self, template_data: dict):
+        mappings = template_data.get('data_source', {}).get('mappings', {})
+        self.mapped_ids = set(mappings)
+        elements = template_data.get('elements', [])
+        ordered = sorted(range(len(elements)), key=lambda i: elements[i].get('properties', {}).get('z_index', 0))
+
+        # Each layer is {'kind': 'static' | 'image' | 'dynamic', 'indices': [...]}
+        self.layers: List[Dict] = []
+        for index in ordered:
+            element = elements[index]
+            if element.get('id') not in self.mapped_ids:
+                kind = 'static'
+            elif element.get('type') == 'image':
+                # Mapped images are usually drawn from a small set of files
+                kind = 'image'
+            else:
+                kind = 'dynamic'
+
+            if self.layers and kind != 'image' and self.layers[-1]['kind'] == kind:
+                self.layers[-1]['indices'].append(index)
+            else:
+                self.layers.append({'kind': kind, 'indices': [index]})
+
+        # The first layer always carries the card background
+        if not self.layers or self.layers[0]['kind'] != 'static':
+            self.layers.insert(0, {'kind': 'static', 'indices': []})
+
+    def dynamic_spec(self, card_data: dict, size: Tuple[int, int]) -> dict:
+        """Build the worker spec holding only this card's row-dependent elements"""
+        elements = card_data.get('elements', [])
+        return {
+            'size': size,
+            'layers': [
+                [elements[i] for i in layer['indices']]
+                for layer in self.layers if layer['kind'] == 'dynamic'
+            ],
+            'images': [
+                elements[layer['indices'][0]]
+                for layer in self.layers if layer['kind'] == 'image'
+            ]
+        }
+
+class LayeredCardSheetWriter(CardSheetWriter):
+    """Card sheet writer that embeds shared artwork once and draws it by reference"""
+
+    render_fn = staticmethod(render_dynamic_layers)
+    # Shared forms are embedded once per document, so the sheet stays one document
+    pages_per_part = None
+
+    def __init__(self, output_path: str, page_size: tuple, layout: dict, direction: str,
+                 template_data: dict, image_processor: ImageProcessor):
+        super().__init__(output_path, page_size, layout, direction)
+        self.template_data = template_data
+        self.image_processor = image_processor
+        self.plan = LayerPlan(template_data)
+        self.card_size = image_processor.get_template_size(template_data)
+
+        # Points per card pixel
+        self.card_width_pt = layout['card_width'] * 72 / 25.4
+        self.card_height_pt = layout['card_height'] * 72 / 25.4
+        self.scale_x = self.card_width_pt / self.card_size[0]
+        self.scale_y = self.card_height_pt / self.card_size[1]
+
+        self._forms = set()
+        self.forms_reused = 0
+
+    def card_spec(self, card_data: dict) -> dict:
+        """Only the row-dependent layers are rendered per card"""
+        return self.plan.dynamic_spec(card_data, self.card_size)
+
+    def add_rendered(self, result):
+        """Place one card's rendered layers on the sheet"""
+        self.add_layered_card(result)
+
+    def add_layered_card(self, rendered: dict):
+        """Draw one card from shared forms plus its row-dependent layers"""
+        if self.cards_on_page >= self.layout['cards_per_page']:
+            self.flush_page()
+
+        x, y = self.card_position(self.cards_on_page)
+        c = self.canvas
+        c.saveState()
+        c.translate(x, y)
+
+        # Clip to the card so oversized elements crop like the raster export
+        clip = c.beginPath()
+        clip.rect(0, 0, self.card_width_pt, self.card_height_pt)
+        c.clipPath(clip, stroke=0, fill=0)
+
+        dynamic_iter = iter(rendered['layers'])
+        image_iter = iter(rendered['images'])
+        for layer_number, layer in enumerate(self.plan.layers):
+            if layer['kind'] == 'static':
+                self._draw_static_layer(layer_number)
+            elif layer['kind'] == 'image':
+                self._draw_image_element(next(image_iter))
+            else:
+                self._draw_dynamic_layer(next(dynamic_iter, None))
+
+        c.restoreState()
+        self.cards_on_page += 1
+        self.cards_written += 1
+
+    def _draw_static_layer(self, layer_number: int):
+        """Draw a static layer from its shared form"""
+        self._draw_form(f"bgc_static_{layer_number}", lambda: self._static_layer(layer_number), 0, 0,
+                        self.card_size[0], self.card_size[1])
+
+    def _draw_dynamic_layer(self, layer_image):
+        """Draw one cropped row-dependent layer rendered by a worker"""
+        if layer_image:
+            image, (left, top) = layer_image
+            self._draw_pixels(image, left, top)
+
+    def _static_layer(self, layer_number: int) -> Image.Image:
+        """Render a static layer once; the first one includes the background"""
+        elements = self.template_data.get('elements', [])
+        properties = {'width': self.card_size[0], 'height': self.card_size[1]}
+        if layer_number == 0:
+            properties['background_color'] = self.template_data.get('background_color', 'white')
+        return self.image_processor.create_component_image(
+            properties,
+            [elements[i] for i in self.plan.layers[layer_number]['indices']]
+        )
+
+    def _draw_image_element(self, element: dict):
+        """Draw a mapped image through a form shared by every card using the same file"""
+        properties = element.get('properties', {})
+        path = properties.get('path')
+        width = int(properties.get('width', 100))
+        height = int(properties.get('height', 100))
+        if not path or width <= 0 or height <= 0:
+            return
+
+        key = hashlib.md5(f"{path}|{width}|{height}".encode('utf-8')).hexdigest()[:16]
+        self._draw_form(f"bgc_img_{key}", lambda: self._element_layer(element, width, height),
+                        int(element.get('x', 0)), int(element.get('y', 0)), width, height)
+
+    def _element_layer(self, element: dict, width: int, height: int) -> Image.Image:
+        """Render a single element at the origin of its own layer"""
+        placed = dict(element, x=0, y=0)
+        return self.image_processor.create_component_image({'width': width, 'height': height}, [placed])
+
+    def _draw_form(self, name: str, render, left: int, top: int, width: int, height: int):
+        """Draw a named form at a card pixel position, defining it on first use"""
+        c = self.canvas
+        width_pt, height_pt = width * self.scale_x, height * self.scale_y
+        if name not in self._forms:
+            c.beginForm(name, 0, 0, width_pt, height_pt)
+            c.drawImage(ImageReader(render()), 0, 0, width=width_pt, height=height_pt, mask='auto')
+            c.endForm()
+            self._forms.add(name)
+        else:
+            self.forms_reused += 1
+
+        c.saveState()
+        c.translate(left * self.scale_x, self.card_height_pt - (top + height) * self.scale_y)
+        c.doForm(name)
+        c.restoreState()
+
+    def _draw_pixels(self, image: Image.Image, left: int, top: int):
+        """Draw a per-card layer at a card pixel position"""
+        self.canvas.drawImage(
+            ImageReader(image),
+            left * self.scale_x,
+            self.card_height_pt - (top + image.height) * self.scale_y,
+            width=image.width * self.scale_x,
+            height=image.height * self.scale_y,
+            mask='auto'
+        )
@@ -0,0 +1,187 @@
+import re
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from utils.card_instance import CardInstance
+
+# ${column} references inside macro expressions and conditional results
+_MACRO_PATTERN = re.compile(r"\$\{([^}]*)\}")
+
+def column_strings(series: pd.Series) -> pd.Series:
+    """Render a column the way the card text sees it: str() of each value, '' for missing"""
+    return series.astype(str).where(series.notna(), "")
+
+class OverrideTable:
+    """Per-row property overrides produced by a MappingPlan"""
+
+    def __init__(self, targets: Dict[str, List[Tuple[int, str]]], columns: Dict[str, np.ndarray], length: int):
+        # element id -> [(element index, property name)]
+        self.targets = targets
+        # One object array per element id; None means "keep the template value"
+        self.columns = columns
+        self.length = length
+        self._columns = [(targets[element_id], values) for element_id, values in columns.items()]
+
+    def __len__(self):
+        return self.length
+
+    def row(self, position: int) -> Dict[Tuple[int, str], str]:
+        """Overrides for one row as {(element index, property): value}"""
+        overrides = {}
+        for targets, values in self._columns:
+            value = values[position]
+            if value is None:
+                continue
+            for target in targets:
+                overrides[target] = value
+        return overrides
+
+    def card(self, template_data: dict, position: int) -> CardInstance:
+        """One row's card: the shared template plus that row's overrides"""
+        return CardInstance(template_data, self.row(position))
+
+class MappingPlan:
+    """Template data mappings compiled once and evaluated column-wise over a DataFrame"""
+
+    def __init__(self, template_data: dict, assets_path: str):
+        self.assets_path = str(assets_path)
+        self.mappings = template_data.get('data_source', {}).get('mappings', {})
+        self.targets: Dict[str, List[Tuple[int, str]]] = {}
+
+        elements = template_data.get('elements', [])
+        for element_id, mapping in self.mappings.items():
+            targets = self._resolve_targets(element_id, mapping.get('type'), elements)
+            if targets:
+                self.targets[element_id] = targets
+
+    def _resolve_targets(self, element_id: str, mapping_type: str, elements: list) -> List[Tuple[int, str]]:
+        """Find which element properties a mapping writes, matching the per-row rules"""
+        matches = [(i, e.get('type')) for i, e in enumerate(elements) if e.get('id') == element_id]
+        if mapping_type == 'direct':
+            # Text elements with the id, up to and including the first QR code
+            targets = []
+            for index, element_type in matches:
+                if element_type == 'text':
+                    targets.append((index, 'text'))
+                elif element_type == 'qrcode':
+                    targets.append((index, 'content'))
+                    break
+            return targets
+        if mapping_type == 'conditional':
+            # Only the first element with the id
+            if matches:
+                index, element_type = matches[0]
+                prop = {'text': 'text', 'image': 'path'}.get(element_type)
+                return [(index, prop)] if prop else []
+            return []
+        if mapping_type == 'macro':
+            images = [(i, 'path') for i, element_type in matches if element_type == 'image']
+            return images[:1]
+        return []
+
+    def evaluate(self, df: pd.DataFrame) -> OverrideTable:
+        """Evaluate every mapping for all rows at once"""
+        strings = {}
+
+        def column(name):
+            # Stringify each referenced column only once
+            if name not in strings:
+                strings[name] = column_strings(df[name])
+            return strings[name]
+
+        results = {}
+        for element_id in self.targets:
+            mapping = self.mappings[element_id]
+            mapping_type = mapping['type']
+            try:
+                if mapping_type == 'direct':
+                    values = self._evaluate_direct(df, mapping, column)
+                elif mapping_type == 'conditional':
+                    values = self._evaluate_conditional(df, mapping, column)
+                else:
+                    values = self._expand(mapping['expression'], df, column)
+            except Exception as e:
+                print(f"Error applying mapping for '{element_id}': {e}")
+                values = None
+            if values is None:
+                values = np.full(len(df), None, dtype=object)
+            results[element_id] = np.asarray(values, dtype=object)
+
+        return OverrideTable(self.targets, results, len(df))
+
+    def _evaluate_direct(self, df, mapping, column) -> Optional[np.ndarray]:
+        name = mapping['column']
+        if name not in df.columns:
+            print(f"Warning: Column '{name}' not found in data")
+            return None
+        values = column(name).to_numpy(dtype=object, copy=True)
+        # Empty cells keep the template text
+        values[values == ""] = None
+        return values
+
+    def _evaluate_conditional(self, df, mapping, column) -> np.ndarray:
+        values = np.full(len(df), None, dtype=object)
+        unmatched = np.ones(len(df), dtype=bool)
+
+        # First matching condition wins for each row
+        for condition in mapping.get('conditions', []):
+            name = condition['column']
+            if name not in df.columns:
+                continue
+            met = self._condition_mask(column(name), condition['operator'], condition['value'])
+            hit = unmatched & met
+            if not hit.any():
+                continue
+            result = self._expand(condition['result'], df, column)
+            values[hit] = result[hit] if isinstance(result, np.ndarray) else result
+            unmatched &= ~hit
+            if not unmatched.any():
+                break
+        return values
+
+    def _condition_mask(self, cells: pd.Series, operator: str, test_value: str) -> np.ndarray:
+        """Evaluate one condition for all rows"""
+        test_value = str(test_value)
+        if operator == 'equals':
+            return (cells == test_value).to_numpy()
+        if operator == 'not equals':
+            return (cells != test_value).to_numpy()
+        if operator == 'contains':
+            return cells.str.lower().str.contains(test_value.lower(), regex=False).to_numpy()
+        if operator in ('greater than', 'less than'):
+            # Cells or test values that are not numbers never match
+            try:
+                threshold = float(test_value)
+            except ValueError:
+                print(f"Warning: Could not evaluate condition value '{test_value}'")
+                return np.zeros(len(cells), dtype=bool)
+            numbers = pd.to_numeric(cells, errors='coerce').to_numpy(dtype=float)
+            with np.errstate(invalid='ignore'):
+                return numbers > threshold if operator == 'greater than' else numbers < threshold
+        return np.zeros(len(cells), dtype=bool)
+
+    def _expand(self, expression: str, df: pd.DataFrame, column):
+        """Substitute ${ASSETS} and ${column} macros for every row"""
+        expression = expression.replace("${ASSETS}", self.assets_path)
+        if '${' not in expression:
+            return expression
+
+        # Split into literal text and column references; unknown names stay literal
+        parts = []
+        position = 0
+        for match in _MACRO_PATTERN.finditer(expression):
+            if match.group(1) not in df.columns:
+                continue
+            parts.append(expression[position:match.start()])
+            parts.append(column(match.group(1)))
+            position = match.end()
+        parts.append(expression[position:])
+
+        result = pd.Series([""] * len(df), index=df.index, dtype=object)
+        for part in parts:
+            result = result + part
+        return result.to_numpy(dtype=object)
+
+def compile_mappings(template_data: dict, assets_path) -> MappingPlan:
+    """Compile a template's data_source mappings into a reusable plan"""
+    return MappingPlan(template_data, assets_path)
@@ -4,6 +4,127 @@
 from reportlab.lib.utils import ImageReader
 from PIL import Image
 import io
+import os
+import re
+import shutil
+import tempfile
+
+# A literal string, copied as is (reportlab escapes the parentheses inside
+# strings), or a reference like "12 0 R" in an object's dictionary
+_REFERENCE_PATTERN = re.compile(rb"\((?:\\.|[^\\()])*\)|(?<![\w.])(\d+) 0 R\b", re.DOTALL)
+
+def _read_objects(data: bytes) -> dict:
+    """Object number -> raw 'N 0 obj ... endobj' bytes, located through the xref table"""
+    startxref = data.rindex(b"startxref")
+    xref_offset = int(data[startxref + 9:].split()[0])
+    lines = data[xref_offset:].split(b"\n", 2)
+    if lines[0].strip() != b"xref":
+        raise ValueError("Only PDFs with a classic xref table can be joined")
+    first, count = (int(value) for value in lines[1].split())
+    table = lines[2]
+    if table[count * 20:].lstrip()[:7] != b"trailer":
+        raise ValueError("Only PDFs with a single xref section can be joined")
+    objects = {}
+    for index in range(count):
+        entry = table[index * 20:index * 20 + 20]
+        offset, generation, kind = entry.split()[:3]
+        if kind != b"n":
+            continue
+        start = int(offset)
+        if int(generation) != 0 or not data.startswith(b"%d 0 obj" % (first + index), start):
+            raise ValueError(f"Unsupported PDF object {first + index} at offset {start}")
+        end = data.index(b"endobj", start) + len(b"endobj")
+        # A stream may contain 'endobj'; skip past the stream data by its /Length first
+        stream = data.find(b"stream", start, end)
+        if stream != -1:
+            length = int(re.search(rb"/Length (\d+)", data[start:stream]).group(1))
+            data_start = stream + len(b"stream") + (2 if data[stream + 6:stream + 8] == b"\r\n" else 1)
+            end = data.index(b"endobj", data_start + length) + len(b"endobj")
+        objects[first + index] = data[start:end]
+    return objects
+
+def _renumber(obj: bytes, mapping: dict, number: int, replacements: dict = None) -> bytes:
+    """Give an object a new number and rewrite the references in its dictionary"""
+    body = obj[obj.index(b"obj") + 3:]
+    stream = body.find(b"stream")
+    head, tail = (body[:stream], body[stream:]) if stream != -1 else (body, b"")
+    for old, new in (replacements or {}).items():
+        head = head.replace(old, new)
+    head = _REFERENCE_PATTERN.sub(
+        lambda match: b"%d 0 R" % mapping[int(match.group(1))] if match.group(1) else match.group(0), head)
+    return b"%d 0 obj" % number + head + tail
+
+def concatenate_pdfs(part_paths: list, output_path: str):
+    """Join reportlab-written PDFs page by page, holding only one part in memory at a time
+
+    Parts must look the way reportlab writes them: one classic xref table,
+    generation 0 objects and no object streams. Anything else raises
+    ValueError rather than being guessed at.
+    """
+    page_numbers = []
+    offsets = []
+    next_number = 1
+    pages_number = None
+    info = None
+
+    with open(output_path, 'wb') as out:
+        out.write(b"%PDF-1.4\n%\x93\x8c\x8b\x9e\n")
+
+        def write(number: int, obj: bytes):
+            while len(offsets) < number:
+                offsets.append(None)
+            offsets[number - 1] = out.tell()
+            out.write(obj + b"\n")
+
+        # The shared page tree root gets its number up front so pages can point at it
+        pages_number = next_number
+        next_number += 1
+
+        for path in part_paths:
+            with open(path, 'rb') as f:
+                data = f.read()
+            objects = _read_objects(data)
+            trailer = data[data.rindex(b"trailer"):]
+            root = int(re.search(rb"/Root (\d+) 0 R", trailer).group(1))
+            info_number = re.search(rb"/Info (\d+) 0 R", trailer)
+            info_number = int(info_number.group(1)) if info_number else None
+            part_pages = int(re.search(rb"/Pages (\d+) 0 R", objects[root]).group(1))
+            kids = [int(number) for number in re.findall(rb"(\d+) 0 R", objects[part_pages].split(b"/Kids", 1)[1].split(b"]", 1)[0])]
+
+            # Everything but the part's catalog, page tree root and info is copied
+            skipped = {root, part_pages, info_number}
+            mapping = {part_pages: pages_number}
+            for number in sorted(objects):
+                if number not in skipped:
+                    mapping[number] = next_number
+                    next_number += 1
+            for number in sorted(objects):
+                if number not in skipped:
+                    write(mapping[number], _renumber(objects[number], mapping, mapping[number]))
+            page_numbers.extend(mapping[number] for number in kids)
+            if info is None and info_number is not None:
+                info = (objects[info_number], mapping)
+            del data, objects
+
+        kids = b" ".join(b"%d 0 R" % number for number in page_numbers)
+        write(pages_number, b"%d 0 obj\n<<\n/Count %d /Kids [ %s ] /Type /Pages\n>>\nendobj" % (
+            pages_number, len(page_numbers), kids))
+        catalog_number = next_number
+        write(catalog_number, b"%d 0 obj\n<<\n/PageMode /UseNone /Pages %d 0 R /Type /Catalog\n>>\nendobj" % (
+            catalog_number, pages_number))
+        info_number = None
+        if info is not None:
+            info_number = catalog_number + 1
+            write(info_number, b"%d 0 obj" % info_number + info[0][info[0].index(b"obj") + 3:])
+
+        xref_offset = out.tell()
+        out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1))
+        for offset in offsets:
+            out.write(b"%010d 00000 n \n" % offset)
+        trailer = b"/Root %d 0 R /Size %d" % (catalog_number, len(offsets) + 1)
+        if info_number is not None:
+            trailer += b" /Info %d 0 R" % info_number
+        out.write(b"trailer\n<<\n%s\n>>\nstartxref\n%d\n%%%%EOF\n" % (trailer, xref_offset))
 
 class PDFGenerator:
     def __init__(self):
@@ -83,4 +204,129 @@ def _add_text(self, canvas, text: str, x: float, y: float, width: float, height:
         """Add text to PDF"""
         canvas.setFont("Helvetica", 12)
         # Simple text addition - can be enhanced for more complex text layouts
-        canvas.drawString(x + 5, y - 15, text) 
\ No newline at end of file
+        canvas.drawString(x + 5, y - 15, text) 
+
+class CardSheetWriter:
+    """Lay out card images on PDF pages in a grid, straight from memory
+    
+    reportlab keeps every finished page of a canvas in memory until save(),
+    so pages are written to part files of pages_per_part pages each, in a
+    hidden directory next to the output, and joined into the output at the
+    end. Memory then grows with one part's embedded images rather than the
+    whole deck's. abort() removes the parts of an export that never finishes.
+    """
+    
+    # Module-level function the render pool runs per card; None renders the whole card
+    render_fn = None
+    # Whether render results are worth keeping in the render cache
+    cache_results = True
+    # Pages held in memory before they are saved to a part file; None keeps one document
+    pages_per_part = 1
+    
+    def __init__(self, output_path: str, page_size: tuple, layout: dict, direction: str = 'ltr'):
+        self.output_path = output_path
+        self.page_size = page_size
+        self.part_paths = []
+        self.part_dir = None
+        self.pages_in_part = 0
+        self.canvas = self._new_canvas()
+        self.layout = layout
+        self.direction = direction
+        self.cards_on_page = 0
+        self.pages_written = 0
+        self.cards_written = 0
+    
+    def card_position(self, slot: int) -> tuple:
+        """Get the bottom-left corner, in points, of a card slot on the page"""
+        layout = self.layout
+        row_num = slot // layout['cards_per_row']
+        col_num = slot % layout['cards_per_row']
+        
+        # Adjust column number for RTL layout
+        if self.direction == 'rtl':
+            col_num = layout['cards_per_row'] - 1 - col_num
+        
+        # Calculate x and y positions in points (72 points per inch)
+        x = (layout['margin'] + col_num * (layout['card_width'] + layout['h_spacing'])) * 72 / 25.4
+        y = (self.page_size[1] * 25.4 / 72 - (layout['margin'] + (row_num + 1) * layout['card_height'] + row_num * layout['v_spacing'])) * 72 / 25.4
+        return x, y
+    
+    def card_spec(self, card_data: dict) -> dict:
+        """Build the render pool input for one mapped card"""
+        return card_data
+    
+    def add_rendered(self, result):
+        """Place one render pool result on the sheet"""
+        self.add_card(result)
+    
+    def add_card(self, image: Image.Image):
+        """Draw a rendered RGB card image into the next slot"""
+        # Start a new page when the current one is full
+        if self.cards_on_page >= self.layout['cards_per_page']:
+            self.flush_page()
+        
+        x, y = self.card_position(self.cards_on_page)
+        self.canvas.drawImage(
+            ImageReader(image),
+            x, y,
+            width=self.layout['card_width'] * mm,
+            height=self.layout['card_height'] * mm,
+            preserveAspectRatio=True
+        )
+        self.cards_on_page += 1
+        self.cards_written += 1
+    
+    def flush_page(self):
+        """Finish the current page, saving the part once it has pages_per_part pages"""
+        if self.cards_on_page > 0:
+            self.canvas.showPage()
+            self.pages_written += 1
+            self.pages_in_part += 1
+            self.cards_on_page = 0
+            if self.pages_per_part and self.pages_in_part >= self.pages_per_part:
+                self.canvas.save()
+                self.canvas = self._new_canvas()
+                self.pages_in_part = 0
+    
+    def finish(self):
+        """Flush the last page and write the PDF"""
+        self.flush_page()
+        if self.pages_in_part or not self.part_paths[:-1]:
+            self.canvas.save()
+        else:
+            # The last part is still empty
+            self.part_paths.pop()
+        
+        try:
+            if len(self.part_paths) == 1:
+                os.replace(self.part_paths[0], self.output_path)
+            else:
+                try:
+                    concatenate_pdfs(self.part_paths, self.output_path)
+                except Exception:
+                    # Never leave a half-joined document behind
+                    if os.path.exists(self.output_path):
+                        os.remove(self.output_path)
+                    raise
+        finally:
+            self.abort()
+    
+    def abort(self):
+        """Delete the part files of an unfinished export; the output itself is left alone"""
+        if self.part_dir:
+            shutil.rmtree(self.part_dir, ignore_errors=True)
+            self.part_dir = None
+        self.part_paths = []
+    
+    def _new_canvas(self):
+        """Start a canvas for the next part file"""
+        if not self.pages_per_part:
+            path = self.output_path
+        else:
+            if self.part_dir is None:
+                # Same directory as the output, so a single part can be renamed into place
+                directory, name = os.path.split(os.path.abspath(self.output_path))
+                self.part_dir = tempfile.mkdtemp(prefix=f".{name}.", suffix=".parts", dir=directory)
+            path = os.path.join(self.part_dir, f"part{len(self.part_paths):06d}.pdf")
+        self.part_paths.append(path)
+        return canvas.Canvas(path, pagesize=self.page_size)
@@ -0,0 +1,73 @@
+import threading
+from collections import OrderedDict
+from typing import Tuple
+import qrcode
+from PIL import Image
+
+Matrix = Tuple[Tuple[bool, ...], ...]
+
+class QRCache:
+    """LRU cache of QR module matrices keyed by content and encoding settings"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._matrices = OrderedDict()
+        self._lock = threading.RLock()
+
+    def matrix(self, content: str, error_correction=qrcode.constants.ERROR_CORRECT_L,
+               border: int = 4) -> Matrix:
+        """Get the module matrix for content, quiet zone included"""
+        key = (content, error_correction, border)
+        with self._lock:
+            matrix = self._matrices.get(key)
+            if matrix is not None:
+                self._matrices.move_to_end(key)
+                self.hits += 1
+                return matrix
+            self.misses += 1
+
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=error_correction,
+            box_size=1,
+            border=border,
+        )
+        qr.add_data(content)
+        qr.make(fit=True)
+        matrix = tuple(tuple(bool(module) for module in row) for row in qr.get_matrix())
+
+        with self._lock:
+            self._matrices[key] = matrix
+            while len(self._matrices) > self.max_entries:
+                self._matrices.popitem(last=False)
+        return matrix
+
+    def image(self, content: str, width: int, height: int,
+              error_correction=qrcode.constants.ERROR_CORRECT_L, border: int = 4) -> Image.Image:
+        """Render a QR code at the element size by upscaling its module matrix"""
+        matrix = self.matrix(content, error_correction, border)
+        modules = Image.new('L', (len(matrix[0]), len(matrix)))
+        modules.putdata([0 if dark else 255 for row in matrix for dark in row])
+        # Nearest-neighbour keeps module edges sharp
+        return modules.resize((max(1, int(width)), max(1, int(height))), Image.Resampling.NEAREST)
+
+    def stats(self) -> dict:
+        """Report hit/miss counters and cache size"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._matrices)}
+
+    def clear(self):
+        """Drop every cached matrix"""
+        with self._lock:
+            self._matrices.clear()
+
+_qr_cache = None
+
+def get_qr_cache() -> QRCache:
+    """Get the shared QR cache for this process"""
+    global _qr_cache
+    if _qr_cache is None:
+        _qr_cache = QRCache()
+    return _qr_cache
@@ -0,0 +1,291 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Callable, Optional
+from PIL import Image
+
+# Bump when renderer output changes so old cache entries stop matching
+CACHE_VERSION = 2
+
+DEFAULT_MAX_MEMORY_BYTES = 128 * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = 1024 * 1024 * 1024
+
+def encode_result(result) -> bytes:
+    """Serialize a render result as one JSON line followed by its images as PNG
+
+    Only plain data is stored, so decoding never runs code read from disk.
+    Images become {"$image": n} and tuples {"$tuple": [...]} in the JSON.
+    """
+    images = []
+
+    def plain(value):
+        if isinstance(value, Image.Image):
+            buffer = io.BytesIO()
+            value.save(buffer, 'PNG', compress_level=1)
+            images.append(buffer.getvalue())
+            return {'$image': len(images) - 1}
+        if isinstance(value, tuple):
+            return {'$tuple': [plain(item) for item in value]}
+        if isinstance(value, list):
+            return [plain(item) for item in value]
+        if isinstance(value, Mapping):
+            return {str(key): plain(item) for key, item in value.items()}
+        return value
+
+    header = {'result': plain(result)}
+    header['images'] = [len(data) for data in images]
+    return json.dumps(header, separators=(',', ':')).encode('utf-8') + b"\n" + b"".join(images)
+
+def decode_result(data: bytes):
+    """Inverse of encode_result"""
+    line_end = data.index(b"\n")
+    header = json.loads(data[:line_end].decode('utf-8'))
+    images = []
+    offset = line_end + 1
+    for length in header['images']:
+        images.append(data[offset:offset + length])
+        offset += length
+
+    def restore(value):
+        if isinstance(value, dict):
+            if set(value) == {'$image'}:
+                with Image.open(io.BytesIO(images[value['$image']])) as image:
+                    image.load()
+                    return image.copy()
+            if set(value) == {'$tuple'}:
+                return tuple(restore(item) for item in value['$tuple'])
+            return {key: restore(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [restore(item) for item in value]
+        return value
+
+    return restore(header['result'])
+
+class RenderCache:
+    """Content-addressed cache of rendered cards, in memory and on disk
+
+    A card's key hashes its resolved spec, the render function, and the
+    modification times of the files it references, so identical cards are
+    rendered once and reused within a run and across runs. Cached results
+    are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, cache_dir, max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+                 max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+
+        self.memory_bytes = 0
+        self.disk_bytes: Optional[int] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        # key -> (result, approximate bytes)
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def key(self, spec: Any, render_fn: Callable) -> str:
+        """Hash everything that determines a card's rendered output"""
+        payload = {
+            'version': CACHE_VERSION,
+            'renderer': f"{render_fn.__module__}.{render_fn.__qualname__}",
+            'spec': spec,
+            'assets': self._asset_stamps(spec)
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=self._json_default, separators=(',', ':'))
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def get(self, key: str):
+        """Get a cached result, checking memory first and then disk"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                result = decode_result(f.read())
+            # Touch the file so disk eviction is least-recently-used
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            print(f"Error reading render cache entry: {e}")
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+        self._remember(key, result)
+        return result
+
+    def put(self, key: str, result, persist: bool = True):
+        """Store a rendered result in memory, and on disk unless persist is False"""
+        if result is None:
+            return
+        self._remember(key, result)
+        if not persist:
+            return
+
+        path = self._path(key)
+        if path.exists():
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            data = encode_result(result)
+            # Write then rename so a crash never leaves a truncated entry
+            temp_path = path.with_suffix('.tmp')
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except Exception as e:
+            print(f"Error writing render cache entry: {e}")
+            return
+
+        with self._lock:
+            if self.disk_bytes is None:
+                self.disk_bytes = self._scan_disk()
+            else:
+                self.disk_bytes += len(data)
+            if self.disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def get_or_render(self, spec: Any, render_fn: Callable, persist: bool = True):
+        """Return the cached result for a spec, rendering and storing it on a miss"""
+        key = self.key(spec, render_fn)
+        result = self.get(key)
+        if result is None:
+            result = render_fn(spec)
+            self.put(key, result, persist)
+        return result
+
+    def stats(self) -> dict:
+        """Report hit/miss counters and cache sizes"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'memory_bytes': self.memory_bytes,
+                'disk_bytes': self.disk_bytes
+            }
+
+    def clear(self):
+        """Drop every cached result, in memory and on disk"""
+        with self._lock:
+            self._entries.clear()
+            self.memory_bytes = 0
+            for path in self.cache_dir.glob('*/*.card'):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self.disk_bytes = 0
+
+    def _remember(self, key: str, result):
+        size = _result_bytes(result)
+        with self._lock:
+            if key in self._entries or size > self.max_memory_bytes:
+                return
+            self._entries[key] = (result, size)
+            self.memory_bytes += size
+            while self.memory_bytes > self.max_memory_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.memory_bytes -= evicted_size
+
+    def _evict_disk(self):
+        """Delete least recently used entries until the cache fits its budget again"""
+        entries = []
+        for path in self.cache_dir.glob('*/*.card'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        # Evict down to 90% so we do not rescan on every write
+        target = self.max_disk_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
+        self.disk_bytes = total
+
+    def _scan_disk(self) -> int:
+        total = 0
+        for path in self.cache_dir.glob('*/*.card'):
+            try:
+                total += path.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.card"
+
+    def _asset_stamps(self, spec: Any) -> list:
+        """(path, mtime, size) of every file a spec refers to, so edited assets miss"""
+        stamps = []
+        stack = [spec]
+        while stack:
+            value = stack.pop()
+            if isinstance(value, Mapping):
+                for key, item in value.items():
+                    if key == 'path' and isinstance(item, str) and item:
+                        try:
+                            stat = os.stat(item)
+                            stamps.append((item, stat.st_mtime_ns, stat.st_size))
+                        except OSError:
+                            stamps.append((item, None, None))
+                    else:
+                        stack.append(item)
+            elif isinstance(value, (list, tuple)):
+                stack.extend(value)
+        return sorted(stamps, key=lambda stamp: stamp[0])
+
+    def _json_default(self, value):
+        if isinstance(value, Mapping):
+            return dict(value)
+        if isinstance(value, (set, frozenset)):
+            return sorted(value, key=repr)
+        return repr(value)
+
+def _result_bytes(result) -> int:
+    """Rough memory use of a render result, counting image pixels"""
+    if isinstance(result, Image.Image):
+        return result.width * result.height * len(result.getbands())
+    if isinstance(result, Mapping):
+        return 64 + sum(_result_bytes(value) for value in result.values())
+    if isinstance(result, (list, tuple)):
+        return 64 + sum(_result_bytes(value) for value in result)
+    return 64
+
+_render_cache = None
+
+def get_render_cache() -> RenderCache:
+    """Get the shared render cache under the user data directory"""
+    global _render_cache
+    if _render_cache is None:
+        from config import get_config
+        _render_cache = RenderCache(get_config().USER_DATA_DIR / 'cache' / 'renders')
+    return _render_cache
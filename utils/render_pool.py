@@ -0,0 +1,116 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional
+from PIL import Image
+from utils.image_processor import ImageProcessor
+from utils.render_cache import RenderCache
+
+# Each worker process keeps its own renderer so fonts load once per process
+_worker_processor = None
+
+def _init_worker():
+    """Create the per-process renderer"""
+    global _worker_processor
+    _worker_processor = ImageProcessor()
+
+def _render_card(card_data: dict) -> Optional[Image.Image]:
+    """Render one mapped card to a flattened RGB image"""
+    global _worker_processor
+    if _worker_processor is None:
+        _init_worker()
+    try:
+        image = _worker_processor.render_template(card_data)
+        return _worker_processor.flatten(image)
+    except Exception as e:
+        print(f"Error rendering card: {e}")
+        return None
+
+def default_worker_count() -> int:
+    """Leave one core for the UI thread and the PDF writer"""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+class RenderPool:
+    """Render card specs across a process pool, yielding results in input order"""
+
+    def __init__(self, max_workers: Optional[int] = None, window: Optional[int] = None,
+                 render_fn: Optional[Callable] = None):
+        self.max_workers = max_workers or default_worker_count()
+        # Must be a module-level function so it can be sent to worker processes
+        self.render_fn = render_fn or _render_card
+        # Bound the number of cards in flight so memory stays flat on big decks
+        self.window = window or self.max_workers * 4
+        self._executor = None
+
+    def __enter__(self):
+        if self.max_workers > 1:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker
+            )
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+        return False
+
+    def shutdown(self):
+        """Stop the worker processes, dropping any queued cards"""
+        if self._executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def imap(self, card_specs: Iterable[dict], cache: Optional[RenderCache] = None,
+             keys: Optional[Iterable[str]] = None) -> Iterator:
+        """Render cards and yield the results in the same order as the specs
+
+        With a cache, cards already rendered (in this run or an earlier one)
+        are looked up instead of rendered, and duplicates in flight share one render.
+        Cache keys the caller already computed can be passed in as keys.
+        """
+        key_iter = iter(keys) if keys is not None else None
+
+        # Entries are (cache key or None, future, whether this entry stores the result)
+        pending = deque()
+        in_flight = {}
+        for card_data in card_specs:
+            key = None
+            if cache is not None:
+                key = next(key_iter) if key_iter is not None else cache.key(card_data, self.render_fn)
+            if key is not None and key in in_flight:
+                pending.append((key, in_flight[key], False))
+            else:
+                cached = cache.get(key) if key is not None else None
+                if cached is not None:
+                    pending.append((key, self._completed(cached), False))
+                else:
+                    future = self._submit(card_data)
+                    if key is not None:
+                        in_flight[key] = future
+                    pending.append((key, future, key is not None))
+
+            # Yield finished cards in order; block only when the window is full
+            while pending and (len(pending) >= self.window or pending[0][1].done()):
+                yield self._finish(pending.popleft(), cache, in_flight)
+
+        while pending:
+            yield self._finish(pending.popleft(), cache, in_flight)
+
+    def _submit(self, card_data) -> Future:
+        if self._executor is None:
+            # Single worker: render inline and skip the pickling overhead
+            return self._completed(self.render_fn(card_data))
+        return self._executor.submit(self.render_fn, card_data)
+
+    def _completed(self, result) -> Future:
+        future = Future()
+        future.set_result(result)
+        return future
+
+    def _finish(self, entry, cache: Optional[RenderCache], in_flight: dict):
+        key, future, store = entry
+        result = future.result()
+        if store:
+            in_flight.pop(key, None)
+            cache.put(key, result)
+        return result
@@ -1,9 +1,10 @@
 # utils/scripts/generate_asset_ai.py
 import uuid
 from utils.scripts.base_script import BaseScript, ConfigWidget
+from utils import columnar_cache
+from controllers.csv_controller import read_csv_batches
 import asyncio
 import perchance
-import pandas as pd
 from PIL import Image
 import os
 import time
@@ -33,8 +34,8 @@ def _browse_csv_file(self):
     
     def _update_csv_columns(self, csv_path):
         try:
-            df = pd.read_csv(csv_path)
-            self.csv_columns = df.columns.tolist()
+            # Header only
+            self.csv_columns = columnar_cache.read_columns(csv_path)
             # Update combobox values
             self.prompt_column.configure(values=self.csv_columns)
             self.name_column.configure(values=self.csv_columns)
@@ -305,16 +306,18 @@ def get_prompts(self, config):
         # Get prompts from CSV if file is provided
         csv_path = config["csv_path"].strip()
         if csv_path and os.path.exists(csv_path):
-            df = pd.read_csv(csv_path)
             prompt_col = config["prompt_column"].strip()
             name_col = config["name_column"].strip()
             
-            if prompt_col in df.columns and name_col in df.columns:
-                for _, row in df.iterrows():
-                    prompts.append({
-                        'prompt': row[prompt_col],
-                        'name': row[name_col]
-                    })
+            columns = columnar_cache.read_columns(csv_path)
+            if prompt_col in columns and name_col in columns:
+                # Stream the two columns in batches instead of loading the whole sheet
+                for batch in read_csv_batches(csv_path):
+                    for prompt, name in zip(batch[prompt_col], batch[name_col]):
+                        prompts.append({
+                            'prompt': prompt,
+                            'name': name
+                        })
         
         # Get prompts from text area
         custom_prompts = config["custom_prompts"].strip()
@@ -7,6 +7,7 @@
 from datetime import datetime
 from tkinter import filedialog
 from config import get_config
+from utils import columnar_cache
 
 class CrosswordGenerator(BaseScript):
     def __init__(self):
@@ -99,8 +100,7 @@ def _get_csv_columns(self, csv_file):
         """Get list of columns from CSV file"""
         try:
             csv_path = self.config.USER_DATA_DIR / "data" / csv_file
-            df = pd.read_csv(csv_path, nrows=0)  # Read only header
-            return df.columns.tolist()
+            return columnar_cache.read_columns(csv_path)
         except Exception as e:
             self.output.insert("end", f"Error reading CSV columns: {str(e)}\n")
             return []
@@ -197,8 +197,8 @@ def load_words_from_csv(self, csv_file, start_row, end_row, column=None):
             # Construct full path to CSV file
             csv_path = self.config.USER_DATA_DIR / "data" / csv_file
             
-            # Read CSV file
-            df = pd.read_csv(csv_path)
+            # Read CSV file (through its columnar sidecar)
+            df = columnar_cache.read_frame(csv_path)
             
             # Validate column selection
             if column not in df.columns:
@@ -0,0 +1,292 @@
+import os
+from typing import Dict, Optional
+from PIL import ImageColor
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from utils.image_processor import ImageProcessor
+from utils.font_service import POINTS_TO_PIXELS
+from utils.layered_export import LayeredCardSheetWriter
+from utils.qr_cache import Matrix, get_qr_cache
+
+# Standard PDF fonts used when a template font has no TrueType file
+_FALLBACK_FONTS = {
+    (False, False): 'Helvetica',
+    (True, False): 'Helvetica-Bold',
+    (False, True): 'Helvetica-Oblique',
+    (True, True): 'Helvetica-BoldOblique'
+}
+
+def qr_matrix(content: str) -> Matrix:
+    """Get the module matrix of a QR code, quiet zone included"""
+    return get_qr_cache().matrix(content)
+
+def prepare_vector_layers(spec: dict) -> dict:
+    """Pair each row-dependent element with its QR matrix (used inside RenderPool workers)"""
+    layers = []
+    for elements in spec['layers']:
+        prepared = []
+        for element in elements:
+            matrix = None
+            if element.get('type') == 'qrcode':
+                try:
+                    matrix = qr_matrix(element.get('properties', {}).get('content', ''))
+                except Exception as e:
+                    print(f"Error drawing QR code: {e}")
+            prepared.append((element, matrix))
+        layers.append(prepared)
+    return {'layers': layers, 'images': spec['images']}
+
+class VectorCardRenderer:
+    """Draw template elements onto a reportlab canvas as vector graphics"""
+
+    def __init__(self, canvas, image_processor: ImageProcessor, scale_x: float, scale_y: float,
+                 card_height_pt: float):
+        self.canvas = canvas
+        self.image_processor = image_processor
+        self.scale_x = scale_x
+        self.scale_y = scale_y
+        self.card_height_pt = card_height_pt
+        self._fonts: Dict[tuple, str] = {}
+
+    def draw_background(self, color: str, width: int, height: int):
+        """Fill the card with its background color"""
+        rgb = self._rgb(color)
+        if rgb:
+            self.canvas.setFillColorRGB(*rgb)
+            self.canvas.rect(0, 0, width * self.scale_x, height * self.scale_y, stroke=0, fill=1)
+
+    def draw_element(self, element: Dict, matrix: Optional[Matrix] = None):
+        """Draw a single element; image elements stay raster"""
+        element_type = element.get('type')
+        properties = element.get('properties', {})
+        x = int(element.get('x', 0))
+        y = int(element.get('y', 0))
+        width = int(properties.get('width', 100))
+        height = int(properties.get('height', 100))
+
+        c = self.canvas
+        c.saveState()
+        try:
+            if element_type == 'text':
+                self._draw_text(properties, x, y, width)
+            elif element_type == 'shape':
+                self._draw_shape(properties, x, y, width, height)
+            elif element_type == 'qrcode':
+                if matrix is None:
+                    matrix = qr_matrix(properties.get('content', ''))
+                self._draw_qrcode(matrix, x, y, int(properties.get('width', 200)), int(properties.get('height', 200)))
+            elif element_type == 'image':
+                self._draw_image(element, x, y, width, height)
+        except Exception as e:
+            print(f"Error drawing {element_type} element: {e}")
+        finally:
+            c.restoreState()
+
+    def _draw_text(self, properties: Dict, x: int, y: int, width: int):
+        """Draw wrapped, aligned text as PDF text with the template font embedded"""
+        text = str(properties.get('text', 'New Text'))
+        bold = properties.get('bold', False)
+        italic = properties.get('italic', False)
+        align = properties.get('align', 'left')
+        rgb = self._rgb(properties.get('fill', 'black')) or (0, 0, 0)
+
+        font_name = self.get_font(properties.get('font', 'Arial'), bold, italic)
+        # Same pixel size the raster renderer uses, laid out in card pixels
+        pixel_size = max(1, round(float(properties.get('fontSize', 12)) * POINTS_TO_PIXELS))
+        ascent, descent = pdfmetrics.getAscentDescent(font_name, pixel_size)
+        line_height = ascent - descent
+
+        # Glyphs cannot stretch, so the whole text block is scaled uniformly, as card
+        # images are fitted; only the element's position follows the card's x/y scales
+        scale = min(self.scale_x, self.scale_y)
+        left = x * self.scale_x
+        top = self.card_height_pt - y * self.scale_y
+
+        c = self.canvas
+        c.setFillColorRGB(*rgb)
+        c.setFont(font_name, pixel_size * scale)
+        for i, line in enumerate(self.wrap_text(text, font_name, pixel_size, width)):
+            line_width = pdfmetrics.stringWidth(line, font_name, pixel_size)
+
+            # Calculate x offset based on alignment
+            if align == 'center':
+                line_x = (width - line_width) / 2
+            elif align == 'right':
+                line_x = width - line_width
+            else:  # left
+                line_x = 0
+
+            baseline = i * line_height + ascent
+            c.drawString(left + line_x * scale, top - baseline * scale, line)
+
+    def wrap_text(self, text: str, font_name: str, font_size: float, width: int) -> list:
+        """Wrap text to the given width, keeping explicit line breaks"""
+        lines = []
+        for paragraph in text.split('\n'):
+            current_line = []
+            for word in paragraph.split():
+                current_line.append(word)
+                test_line = ' '.join(current_line)
+                if pdfmetrics.stringWidth(test_line, font_name, font_size) > width and len(current_line) > 1:
+                    lines.append(' '.join(current_line[:-1]))
+                    current_line = [word]
+            lines.append(' '.join(current_line))
+        return lines
+
+    def get_font(self, font_name: str, bold: bool = False, italic: bool = False) -> str:
+        """Register the template's TrueType font once and return its PDF font name"""
+        key = (font_name, bold, italic)
+        if key in self._fonts:
+            return self._fonts[key]
+
+        registered = _FALLBACK_FONTS[(bool(bold), bool(italic))]
+        font_path = self.image_processor.font_service.resolve(font_name, bold, italic)
+        if font_path and os.path.exists(font_path):
+            pdf_name = f"bgc_{os.path.splitext(os.path.basename(font_path))[0]}"
+            try:
+                if pdf_name not in pdfmetrics.getRegisteredFontNames():
+                    pdfmetrics.registerFont(TTFont(pdf_name, font_path))
+                registered = pdf_name
+            except Exception as e:
+                print(f"Error embedding font {font_path}: {e}")
+
+        self._fonts[key] = registered
+        return registered
+
+    def _draw_shape(self, properties: Dict, x: int, y: int, width: int, height: int):
+        """Draw a (rounded) rectangle with fill opacity and a dashed or solid border"""
+        if width <= 0 or height <= 0:
+            return
+
+        fill = self._rgb(properties.get('fill', 'white'))
+        outline = self._rgb(properties.get('outline', 'black'))
+        radius = int(properties.get('radius', 0))
+        opacity = float(properties.get('opacity', 1.0))
+        outline_width = int(properties.get('outline_width', 1))
+        border_style = properties.get('dash', 'Solid')
+
+        c = self.canvas
+        if fill:
+            c.setFillColorRGB(*fill)
+            c.setFillAlpha(opacity)
+        stroke = bool(outline) and outline_width > 0
+        if stroke:
+            c.setStrokeColorRGB(*outline)
+            c.setLineWidth(outline_width * self.scale_x)
+            dash_pattern = self.image_processor.get_dash_pattern(border_style, outline_width)
+            if dash_pattern:
+                c.setDash([segment * self.scale_x for segment in dash_pattern])
+
+        left = x * self.scale_x
+        bottom = self.card_height_pt - (y + height) * self.scale_y
+        width_pt = width * self.scale_x
+        height_pt = height * self.scale_y
+        if radius > 0:
+            c.roundRect(left, bottom, width_pt, height_pt, radius * self.scale_x,
+                        stroke=int(stroke), fill=int(bool(fill)))
+        else:
+            c.rect(left, bottom, width_pt, height_pt, stroke=int(stroke), fill=int(bool(fill)))
+
+    def _draw_qrcode(self, matrix: Matrix, x: int, y: int, width: int, height: int):
+        """Draw QR modules as filled rectangles over a white quiet zone"""
+        if not matrix or width <= 0 or height <= 0:
+            return
+
+        c = self.canvas
+        left = x * self.scale_x
+        top = self.card_height_pt - y * self.scale_y
+        module_w = width * self.scale_x / len(matrix[0])
+        module_h = height * self.scale_y / len(matrix)
+
+        c.setFillColorRGB(1, 1, 1)
+        c.rect(left, top - height * self.scale_y, width * self.scale_x, height * self.scale_y, stroke=0, fill=1)
+
+        # One path for every module, merging horizontal runs to keep the PDF small
+        c.setFillColorRGB(0, 0, 0)
+        path = c.beginPath()
+        for row_number, row in enumerate(matrix):
+            run_start = None
+            for col_number, dark in enumerate(row + (False,)):
+                if dark and run_start is None:
+                    run_start = col_number
+                elif not dark and run_start is not None:
+                    path.rect(
+                        left + run_start * module_w,
+                        top - (row_number + 1) * module_h,
+                        (col_number - run_start) * module_w,
+                        module_h
+                    )
+                    run_start = None
+        c.drawPath(path, stroke=0, fill=1)
+
+    def _draw_image(self, element: Dict, x: int, y: int, width: int, height: int):
+        """Image elements are the only raster content"""
+        if width <= 0 or height <= 0:
+            return
+        layer = self.image_processor.create_component_image(
+            {'width': width, 'height': height},
+            [dict(element, x=0, y=0)]
+        )
+        self.canvas.drawImage(
+            ImageReader(layer),
+            x * self.scale_x,
+            self.card_height_pt - (y + height) * self.scale_y,
+            width=width * self.scale_x,
+            height=height * self.scale_y,
+            mask='auto'
+        )
+
+    def _rgb(self, color: str):
+        """Convert a template color to reportlab RGB floats"""
+        if not color or color.lower() == 'transparent':
+            return None
+        try:
+            return tuple(channel / 255 for channel in ImageColor.getrgb(color)[:3])
+        except Exception as e:
+            print(f"Error converting color {color}: {e}")
+            return None
+
+class VectorCardSheetWriter(LayeredCardSheetWriter):
+    """Card sheet writer that emits text, shapes and QR codes as PDF vector graphics"""
+
+    render_fn = staticmethod(prepare_vector_layers)
+    # Vector layers are cheap to prepare; QR matrices are cached on their own
+    cache_results = False
+
+    def __init__(self, output_path: str, page_size: tuple, layout: dict, direction: str,
+                 template_data: dict, image_processor: ImageProcessor):
+        super().__init__(output_path, page_size, layout, direction, template_data, image_processor)
+        self.renderer = VectorCardRenderer(
+            self.canvas,
+            image_processor,
+            self.scale_x,
+            self.scale_y,
+            self.card_height_pt
+        )
+
+    def _draw_static_layer(self, layer_number: int):
+        """Draw a static layer from a shared vector form"""
+        name = f"bgc_vector_{layer_number}"
+        c = self.canvas
+        if name not in self._forms:
+            c.beginForm(name, 0, 0, self.card_width_pt, self.card_height_pt)
+            if layer_number == 0:
+                self.renderer.draw_background(
+                    self.template_data.get('background_color', 'white'),
+                    self.card_size[0],
+                    self.card_size[1]
+                )
+            elements = self.template_data.get('elements', [])
+            for index in self.plan.layers[layer_number]['indices']:
+                self.renderer.draw_element(elements[index])
+            c.endForm()
+            self._forms.add(name)
+        else:
+            self.forms_reused += 1
+        c.doForm(name)
+
+    def _draw_dynamic_layer(self, layer_items):
+        """Draw this card's row-dependent elements directly as vectors"""
+        for element, matrix in layer_items or []:
+            self.renderer.draw_element(element, matrix)
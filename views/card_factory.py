@@ -3,8 +3,23 @@
 from tkinter import filedialog
 import pandas as pd
 import os
-from typing import Dict, List
+from typing import Dict, List, Optional
 from config import get_config
+from utils.mapping_compiler import compile_mappings
+from utils.data_query import And, Comparison, QueryError, get_query
+from utils.export_job import ExportError, ExportJob, ExportProgress
+
+# Filter menu operators as filter language operators
+FILTER_OPERATORS = {
+    "equals": "=",
+    "not equals": "!=",
+    "contains": "~",
+    "greater than": ">",
+    "less than": "<"
+}
+
+# Largest size of the card previews sent from the export job to the UI
+PREVIEW_SIZE = (320, 320)
 
 class CardFactory(ctk.CTkFrame):
     def __init__(self, parent, template_controller, csv_controller):
@@ -12,6 +27,8 @@ def __init__(self, parent, template_controller, csv_controller):
         self.template_controller = template_controller
         self.csv_controller = csv_controller
         self.config = get_config()
+        # Background export in progress, if any
+        self.export_job = None
         self._create_ui()
         self._load_templates()
     
@@ -98,13 +115,14 @@ def _create_ui(self):
         control_frame = ctk.CTkFrame(bottom_frame)
         control_frame.pack(side="left", fill="y", padx=5)
         
-        # Export button
-        ctk.CTkButton(
+        # Export button; becomes Cancel while an export runs
+        self.export_button = ctk.CTkButton(
             control_frame,
             text="Start Export",
             command=self._start_export,
             width=120
-        ).pack(pady=5)
+        )
+        self.export_button.pack(pady=5)
         
         # Progress frame
         progress_frame = ctk.CTkFrame(control_frame)
@@ -229,7 +247,8 @@ def _get_csv_columns(self) -> List[str]:
                 if template_data and 'data_source' in template_data:
                     csv_file = template_data['data_source'].get('file')
                     if csv_file:
-                        df = pd.read_csv(self.config.USER_DATA_DIR / "data" / csv_file)
+                        # Header only; the data is streamed at export time
+                        df = pd.read_csv(self.config.USER_DATA_DIR / "data" / csv_file, nrows=0)
                         return list(df.columns)
             return ["No columns available"]
         except Exception:
@@ -273,263 +292,205 @@ def _on_template_selected(self, template_name: str):
         except Exception as e:
             print(f"Error updating preview container: {e}")
     
-    def _apply_filters(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Apply filters to DataFrame"""
-        try:
-            row_ranges = []
-            
-            for filter_frame in self.filters_container.winfo_children():
-                widgets = filter_frame.winfo_children()
-                filter_type = widgets[0].get()  # Filter type menu
-                
-                if filter_type == "row range":
-                    value = widgets[3].get()  # Value entry for row range
-                    try:
-                        # Parse row range
-                        if '-' in value:
-                            start, end = map(int, value.split('-'))
-                            # Convert to 0-based index and make end inclusive
-                            start = max(0, start - 1)  # Convert 1-based to 0-based index
-                            end = min(len(df), end)    # Ensure end doesn't exceed DataFrame length
-                            row_ranges.append((start, end))
-                        else:
-                            # Single row number
-                            row_num = int(value) - 1  # Convert to 0-based index
-                            if 0 <= row_num < len(df):
-                                row_ranges.append((row_num, row_num + 1))
-                    except ValueError:
-                        print(f"Invalid row range format: {value}")
-                        continue
+    def _read_filters(self) -> List[tuple]:
+        """Read the filter rows as (type, column, operator, value) on the UI thread"""
+        filters = []
+        for filter_frame in self.filters_container.winfo_children():
+            widgets = filter_frame.winfo_children()
+            filter_type = widgets[0].get()  # Filter type menu
+            if filter_type == "row range":
+                # Value entry for row range
+                filters.append((filter_type, None, None, widgets[3].get()))
+            else:
+                # Column menu, operator menu, value entry
+                filters.append((filter_type, widgets[1].get(), widgets[2].get(), widgets[3].get()))
+        return filters
+    
+    def _row_ranges(self, filters: List[tuple]) -> List[tuple]:
+        """Parse the row range filters into 0-based (start, end) positions over the filtered rows"""
+        row_ranges = []
+        for filter_type, _, _, value in filters:
+            if filter_type != "row range":
+                continue
+            try:
+                # Parse row range
+                if '-' in value:
+                    start, end = map(int, value.split('-'))
+                    # Convert to 0-based index and make end inclusive
+                    start = max(0, start - 1)  # Convert 1-based to 0-based index
+                    row_ranges.append((start, end))
                 else:
-                    # Apply regular column filters
-                    column = widgets[1].get()  # Column menu
-                    operator = widgets[2].get()  # Operator menu
-                    value = widgets[3].get()    # Value entry
-                    
-                    if column and operator and value:
-                        if operator == "equals":
-                            df = df[df[column] == value]
-                        elif operator == "not equals":
-                            df = df[df[column] != value]
-                        elif operator == "contains":
-                            df = df[df[column].astype(str).str.contains(value, case=False)]
-                        elif operator == "greater than":
-                            df = df[pd.to_numeric(df[column], errors='coerce') > float(value)]
-                        elif operator == "less than":
-                            df = df[pd.to_numeric(df[column], errors='coerce') < float(value)]
-                        elif operator == "range":
-                            try:
-                                start, end = map(float, value.split('-'))
-                                numeric_column = pd.to_numeric(df[column], errors='coerce')
-                                df = df[(numeric_column >= start) & (numeric_column <= end)]
-                            except ValueError:
-                                print(f"Invalid range format: {value}")
-                                continue
-            
-            # Apply row ranges if any exist
-            if row_ranges:
-                # Create a mask for selected rows
-                mask = pd.Series(False, index=df.index)
-                for start, end in row_ranges:
-                    mask.iloc[start:end] = True
-                df = df[mask]
-            
-            return df
-            
-        except Exception as e:
-            print(f"Error applying filters: {e}")
-            return df
+                    # Single row number
+                    row_num = int(value) - 1  # Convert to 0-based index
+                    if row_num >= 0:
+                        row_ranges.append((row_num, row_num + 1))
+            except ValueError:
+                print(f"Invalid row range format: {value}")
+                continue
+        return row_ranges
+    
+    def _filter_condition(self, filters: List[tuple]) -> Optional[And]:
+        """Turn the column filters into one query condition, or None if there are none"""
+        conditions = []
+        for filter_type, column, operator, value in filters:
+            if filter_type == "row range":
+                continue
+            if not (column and operator and value):
+                continue
+            if operator == "range":
+                try:
+                    start, end = value.split('-')
+                    float(start), float(end)
+                except ValueError:
+                    print(f"Invalid range format: {value}")
+                    continue
+                conditions.append(Comparison(column, 'between', [start, end]))
+            else:
+                conditions.append(Comparison(column, FILTER_OPERATORS[operator], [value]))
+        return And(conditions) if conditions else None
     
     def _start_export(self):
-        """Start the export process"""
+        """Start the export on a background job"""
+        if self.export_job is not None and self.export_job.running:
+            return
+        
+        # Validation
+        if not self._validate_export():
+            return
+        
         try:
-            # Reset progress
-            self.progress_bar.set(0)
-            self.progress_label.configure(text="Starting export...")
-            
-            # Validation
-            if not self._validate_export():
-                return
-            
             # Get template data
             template_name = self.template_var.get()
             template = next(t for t in self.template_controller.get_all_templates() 
                           if t.name == template_name)
             template_data = self.template_controller.load_template(template.id)
-            
-            if not template_data.get('data_source'):
-                self._show_error("Template has no data source configuration")
-                return
-            
-            # Load CSV data
-            csv_file = template_data['data_source'].get('file')
-            if not csv_file:
-                self._show_error("No CSV file configured in template")
-                return
-            
-            df = pd.read_csv(self.config.USER_DATA_DIR / "data" / csv_file)
-            
-            # Apply filters
-            df = self._apply_filters(df)
-            if df.empty:
-                self._show_error("No records match the filter criteria")
-                return
-            
-            total_records = len(df)
-            
-            # Process each record
-            for index, row in df.iterrows():
-                # Update progress
-                progress = (index + 1) / total_records
-                self.progress_bar.set(progress)
-                self.progress_label.configure(
-                    text=f"Processing card {index + 1} of {total_records}"
-                )
-                self.update()  # Force GUI update
-                
-                # Create a copy of template data
-                card_data = template_data.copy()
-                
-                # Apply mappings
-                self._apply_mappings(card_data, row)
-                
-                # Generate filename
-                filename = f"card_{index + 1}.png"
-                export_path = os.path.join(self.path_var.get(), filename)
-                
-                # Generate card image
-                success = self.template_controller.export_template_image(
-                    template_data=card_data,
-                    output_path=export_path,
-                    preview_frame=self.preview_container
-                )
-                
-                if not success:
-                    self._show_error(f"Failed to generate card {index + 1}")
-                    return
-            
-            # Update progress to complete
-            self.progress_bar.set(1)
-            self.progress_label.configure(text="Export completed!")
-            self.update()
-            
-            tk.messagebox.showinfo("Success", "Export completed successfully!")
-            
         except Exception as e:
             self._show_error(f"Export failed: {str(e)}")
-        finally:
-            # Reset progress
-            self.progress_bar.set(0)
-            self.progress_label.configure(text="Ready")
-            self.update()
+            return
+        
+        if not template_data.get('data_source'):
+            self._show_error("Template has no data source configuration")
+            return
+        
+        # Widgets and Tk variables are read here; the job only gets plain values
+        filters = self._read_filters()
+        export_dir = self.path_var.get()
+        
+        self.export_job = ExportJob(
+            self,
+            lambda job: self._run_export(job, template_data, filters, export_dir),
+            on_progress=self._on_export_progress,
+            on_done=self._on_export_done,
+            on_error=self._on_export_error,
+            on_cancel=self._on_export_cancelled
+        )
+        self.export_button.configure(text="Cancel", command=self._cancel_export)
+        self.progress_bar.set(0)
+        self.progress_label.configure(text="Starting export...")
+        self.export_job.start()
     
-    def _apply_mappings(self, card_data: dict, row: pd.Series):
-        """Apply data mappings to card data"""
-        try:
-            mappings = card_data.get('data_source', {}).get('mappings', {})
-            available_columns = row.index.tolist()
+    def _cancel_export(self):
+        """Stop the running export after the current card"""
+        if self.export_job is not None and self.export_job.running:
+            self.export_job.cancel()
+            self.export_button.configure(state="disabled")
+            self.progress_label.configure(text="Cancelling...")
+    
+    def _run_export(self, job: ExportJob, template_data: dict, filters: List[tuple], export_dir: str) -> int:
+        """Render every card to a PNG file (runs on the export job thread)"""
+        # Load CSV data
+        csv_file = template_data['data_source'].get('file')
+        if not csv_file:
+            raise ExportError("No CSV file configured in template")
+        
+        condition = self._filter_condition(filters)
+        rows = None
+        if condition is not None:
+            # Column filters are answered from the data source's indexes, so only matching rows are parsed
+            try:
+                query = get_query(self.config.USER_DATA_DIR / "data" / csv_file)
+                rows = query.positions(condition)
+            except QueryError as e:
+                raise ExportError(f"Invalid filter: {e}")
+        
+        # Stream the data source so memory stays flat and the first card appears right away
+        batches = self.csv_controller.iter_batches(
+            csv_file,
+            row_ranges=self._row_ranges(filters),
+            rows=rows
+        )
+        # Upper bound for progress; row ranges can only make it smaller
+        estimated_records = len(rows) if rows is not None else self.csv_controller.estimate_rows(csv_file)
+        
+        # Mappings are compiled once and evaluated column-wise per batch
+        plan = compile_mappings(template_data, self.config.ASSETS_PATH)
+        
+        total_records = 0
+        for batch in batches:
+            overrides = plan.evaluate(batch)
             
-            for element_id, mapping in mappings.items():
-                mapping_type = mapping['type']
+            # Process each record
+            for position, row in enumerate(batch.index):
+                job.check_cancelled()
+                total_records += 1
                 
-                if mapping_type == 'direct':
-                    # Handle direct mapping (existing code)
-                    column = mapping['column']
-                    if column not in available_columns:
-                        print(f"Warning: Column '{column}' not found in data")
-                        continue
-                    
-                    value = str(row[column]) if pd.notna(row[column]) else ""
-                    if not value:
-                        continue
-                    
-                    for element in card_data['elements']:
-                        if element['id'] == element_id and element['type'] == 'text':
-                            element['properties']['text'] = value
-                        elif element['id'] == element_id and element['type'] == 'qrcode':
-                            element['properties']['content'] = value
-                            break
+                # Template is shared read-only; the row's values live in the instance
+                card_data = overrides.card(template_data, position)
                 
-                elif mapping_type == 'conditional':
-                    # Handle conditional mapping
-                    conditions = mapping.get('conditions', [])
-                    matched_value = None
-                    
-                    for condition in conditions:
-                        column = condition['column']
-                        operator = condition['operator']
-                        test_value = condition['value']
-                        result = condition['result']
-                        
-                        if column not in available_columns:
-                            continue
-                        
-                        cell_value = str(row[column]) if pd.notna(row[column]) else ""
-                        
-                        # Evaluate condition based on operator
-                        condition_met = False
-                        try:
-                            if operator == 'equals':
-                                condition_met = cell_value == test_value
-                            elif operator == 'not equals':
-                                condition_met = cell_value != test_value
-                            elif operator == 'contains':
-                                condition_met = test_value.lower() in cell_value.lower()
-                            elif operator == 'greater than':
-                                condition_met = float(cell_value) > float(test_value)
-                            elif operator == 'less than':
-                                condition_met = float(cell_value) < float(test_value)
-                        except (ValueError, TypeError):
-                            print(f"Warning: Could not evaluate condition for column '{column}'")
-                            continue
-                        
-                        if condition_met:
-                            # Handle both direct value and macro expressions
-                            result = result.replace("${ASSETS}", str(self.config.ASSETS_PATH))
-                            if '${' in result:
-                                # Handle macro expression
-                                matched_value = result
-                                # Then handle data column macros
-                                for col in available_columns:
-                                    col_value = str(row[col]) if pd.notna(row[col]) else ""
-                                    matched_value = matched_value.replace(f"${{{col}}}", col_value)
-                            else:
-                                # Handle direct value
-                                matched_value = result
-                            break
-                    
-                    # Apply matched value if found
-                    if matched_value is not None:
-                        for element in card_data['elements']:
-                            if element['id'] == element_id:
-                                if element['type'] == 'text':
-                                    element['properties']['text'] = matched_value
-                                elif element['type'] == 'image':
-                                    element['properties']['path'] = matched_value
-                                break
+                # Named after the data row, so filters and ranges keep the numbering
+                filename = f"card_{row + 1}.png"
+                export_path = os.path.join(export_dir, filename)
                 
-                elif mapping_type == 'macro':
-                    # Handle macro mapping
-                    expression = mapping['expression']
-                    # Convert PosixPath to string when replacing ${ASSETS}
-                    expression = expression.replace("${ASSETS}", str(self.config.ASSETS_PATH))
-                    print("expression", expression)
-                    # Then handle data column macros
-                    for column in available_columns:
-                        col_value = str(row[column]) if pd.notna(row[column]) else ""
-                        expression = expression.replace(f"${{{column}}}", col_value)
-                        
-                    print("expression final", expression)
-                    
-                    for element in card_data['elements']:
-                        if element['id'] == element_id and element['type'] == 'image':
-                            element['properties']['path'] = expression
-                            break
+                # Generate card image
+                try:
+                    image = self.template_controller.render_cached_image(card_data)
+                    image.save(export_path, 'PNG')
+                except Exception as e:
+                    print(f"Error exporting card {row + 1}: {e}")
+                    raise ExportError(f"Failed to generate card {row + 1}")
+                
+                # The UI previews the newest card it receives, from a small in-memory copy
+                preview = image.copy()
+                preview.thumbnail(PREVIEW_SIZE)
+                job.report(total_records, max(total_records, estimated_records), data=preview)
         
-        except Exception as e:
-            print(f"Error applying mappings: {e}")
-            import traceback
-            traceback.print_exc()
+        if total_records == 0:
+            raise ExportError("No records match the filter criteria")
+        
+        return total_records
+    
+    def _on_export_progress(self, progress: ExportProgress):
+        """Show export progress, throughput and time left, and preview the latest card"""
+        self.progress_bar.set(progress.fraction)
+        self.progress_label.configure(text=progress.describe())
+        if progress.data:
+            try:
+                self.template_controller.show_preview(progress.data, self.preview_container)
+            except Exception as e:
+                print(f"Error showing export preview: {e}")
+    
+    def _on_export_done(self, total_records: int):
+        """Report a finished export"""
+        self._reset_export_controls()
+        tk.messagebox.showinfo("Success", "Export completed successfully!")
+    
+    def _on_export_error(self, error: Exception):
+        """Report a failed export"""
+        self._reset_export_controls()
+        if isinstance(error, ExportError):
+            self._show_error(str(error))
+        else:
+            self._show_error(f"Export failed: {str(error)}")
+    
+    def _on_export_cancelled(self):
+        """Report a cancelled export; cards already written are kept"""
+        self._reset_export_controls()
+        self.progress_label.configure(text="Export cancelled")
+    
+    def _reset_export_controls(self):
+        self.export_button.configure(text="Start Export", command=self._start_export, state="normal")
+        self.progress_bar.set(0)
+        self.progress_label.configure(text="Ready")
     
     def _validate_export(self) -> bool:
         """Validate export configuration"""
@@ -545,4 +506,4 @@ def _validate_export(self) -> bool:
     
     def _show_error(self, message: str):
         """Show error message"""
-        tk.messagebox.showerror("Error", message) 
\ No newline at end of file
+        tk.messagebox.showerror("Error", message)
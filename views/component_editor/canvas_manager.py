@@ -2,7 +2,11 @@
 from PIL import Image, ImageTk, ImageDraw
 from .events.event_types import EventType
 from .events.event_manager import EventManager
-import qrcode
+from .input_coalescer import InputCoalescer
+from .spatial_index import SpatialIndex
+from utils.image_cache import get_image_cache
+from utils.qr_cache import get_qr_cache
+from utils.font_service import get_font_service
 
 class CanvasManager:
     def __init__(self, parent, event_manager: EventManager, element_manager):
@@ -23,10 +27,19 @@ def __init__(self, parent, event_manager: EventManager, element_manager):
         self.selected_element = None
         self.dragging = False
         self.move_start = None
+        self.resized_element = None
         self.selection_items = []
         self.element_ids = {}
         self.image_refs = {}
-        self.next_image_ref_id = 1
+        
+        # Retained scene: id(element) -> canvas item and the state it was drawn with
+        self.scene = {}
+        self.scene_order = []
+        
+        # Element bounds for hit-testing, kept in sync with the scene
+        self.spatial_index = SpatialIndex()
+        if self.element_manager is not None:
+            self.element_manager.spatial_index = self.spatial_index
         
         # Initialize size tracking with default values
         self.canvas_width = 300  # Default width in pixels
@@ -37,6 +50,9 @@ def __init__(self, parent, event_manager: EventManager, element_manager):
         # Create canvas
         self._create_canvas()
         
+        # Motion events are applied at most once per frame
+        self.drag_coalescer = InputCoalescer(self.canvas, self._on_canvas_drag)
+        
         # Subscribe to events
         self._subscribe_to_events()
         print("Event subscriptions completed")  # Debug
@@ -74,7 +90,7 @@ def _bind_canvas_events(self):
         self.canvas.tag_bind("selectable", "<Double-Button-1>", self._on_element_double_click)
         self.canvas.tag_bind("handle", "<Button-1>", self._on_handle_click)
         self.canvas.bind("<Button-1>", self._on_canvas_click)
-        self.canvas.bind("<B1-Motion>", self._on_canvas_drag)
+        self.canvas.bind("<B1-Motion>", self._on_canvas_motion)
         self.canvas.bind("<ButtonRelease-1>", self._on_canvas_release)
         self.canvas.bind("<Button-3>", self._show_context_menu)
         self.canvas.bind("<Key>", self._handle_key)
@@ -116,11 +132,8 @@ def _get_element_bounds(self, element):
         # For text elements, might need to get actual bounds
         if element.get('type') == 'text':
             # Get text bounds if available
-            text_id = None
-            for item_id, elem in self.element_ids.items():
-                if elem == element:
-                    text_id = item_id
-                    break
+            state = self.scene.get(id(element))
+            text_id = state['item'] if state else None
             
             if text_id:
                 bbox = self.canvas.bbox(text_id)
@@ -165,26 +178,33 @@ def _get_element_bounds(self, element):
     
     def _find_exact_element_at(self, x, y):
         """Find element exactly at the given coordinates"""
-        items = self.canvas.find_overlapping(x-1, y-1, x+1, y+1)
-        element_items = [item for item in items if "element" in self.canvas.gettags(item)]
-        
-        if not element_items:
-            return None
-            
-        # Get exact coordinates of each element
-        for item_id in reversed(element_items):  # Check from top to bottom
-            if item_id not in self.element_ids:
-                continue
-                
-            element = self.element_ids[item_id]
-            bounds = self._get_element_bounds(element)
-            
-            # Check if point is inside element's bounds
-            if (bounds['x'] <= x <= bounds['x'] + bounds['width'] and 
-                bounds['y'] <= y <= bounds['y'] + bounds['height']):
-                return element
-        
-        return None
+        self._refresh_spatial_index()
+        # Check from top to bottom
+        hits = self.spatial_index.query_point(x, y)
+        return hits[0] if hits else None
+    
+    def find_elements_in_rect(self, x1, y1, x2, y2, contained=True):
+        """Find elements inside (or touching, if not contained) a rubber-band rectangle"""
+        self._refresh_spatial_index()
+        return self.spatial_index.query_rect(x1, y1, x2, y2, contained)
+    
+    def _refresh_spatial_index(self):
+        """Re-index every element if one changed since the canvas last indexed it"""
+        if not self.spatial_index.stale or self.element_manager is None:
+            return
+        self.spatial_index.clear()
+        for element in self.element_manager.elements:
+            self._index_element(element)
+    
+    def _index_element(self, element):
+        """Store an element's current bounds in the spatial index"""
+        bounds = self._get_element_bounds(element)
+        self.spatial_index.insert(id(element), element, (
+            bounds['x'],
+            bounds['y'],
+            bounds['x'] + bounds['width'],
+            bounds['y'] + bounds['height']
+        ))
     
     def _on_canvas_click(self, event):
         """Handle canvas click events"""
@@ -237,6 +257,10 @@ def _on_canvas_click(self, event):
             'element': None
         })
     
+    def _on_canvas_motion(self, event):
+        """Queue pointer motion; only the latest position is applied each frame"""
+        self.drag_coalescer.push(event)
+    
     def _on_canvas_drag(self, event):
         """Handle canvas drag events"""
         if not self.selected_element:
@@ -254,15 +278,17 @@ def _on_canvas_drag(self, event):
             self.selected_element['x'] = dx
             self.selected_element['y'] = dy
             
-            # Re-render and show selection
-            self.render_elements(self.element_manager.elements)
+            # Move the existing canvas item and show selection
+            self.update_element(self.selected_element)
             self.show_selection(self.selected_element)
             
-            # Emit drag event
+            # Emit one aggregated drag event per frame
             self.event_manager.emit(EventType.CANVAS_DRAGGED, {
                 'element': self.selected_element,
                 'x': event.x,
-                'y': event.y
+                'y': event.y,
+                'tool': 'move',
+                'coalesced': self.drag_coalescer.last_batch_size
             })
         elif self.current_tool == 'resize' and self.selected_element:
             if not hasattr(self, 'resize_start'):
@@ -296,14 +322,18 @@ def _on_canvas_drag(self, event):
             self.canvas.delete("size_label_text")
             self._show_size_label(display_width, display_height, event.x, event.y)
             
-            # Re-render elements
-            self.render_elements(self.element_manager.elements)
+            # Re-rasterise only the resized element
+            self.update_element(self.selected_element)
             self.show_selection(self.selected_element)
             
-            print(f"Resizing to: {display_width:.1f} × {display_height:.1f} {self.current_unit}")  # Debug
+            # Listeners hear about the resize once, when the button is released
+            self.resized_element = self.selected_element
     
     def _on_canvas_release(self, event):
         """Handle mouse release events"""
+        # Apply the final pointer position before committing the edit
+        self.drag_coalescer.flush()
+        
         if self.selected_element:
             if self.dragging or self.resize_state.get('active'):
                 self.event_manager.emit(EventType.ELEMENT_EDITED, {
@@ -326,6 +356,15 @@ def _on_canvas_release(self, event):
         
         # Reset cursor
         self.canvas.configure(cursor="arrow")
+        
+        if self.resized_element is not None:
+            self.event_manager.emit(EventType.ELEMENT_RESIZED, self.resized_element)
+            self.resized_element = None
+        
+        self.event_manager.emit(EventType.CANVAS_RELEASED, {
+            'x': event.x,
+            'y': event.y
+        })
     
     def _subscribe_to_events(self):
         """Subscribe to relevant events"""
@@ -360,7 +399,13 @@ def _subscribe_to_events(self):
         
         self.event_manager.subscribe(
             EventType.ELEMENT_EDITED,
-            lambda _: self.render_elements(self.element_manager.elements)
+            lambda _: self.update_elements(self.element_manager.elements)
+        )
+        
+        # Drop deleted elements from the canvas and the spatial index
+        self.event_manager.subscribe(
+            EventType.ELEMENT_DELETED,
+            lambda _: self.update_elements(self.element_manager.elements)
         )
     
     def _handle_tool_changed(self, data):
@@ -569,7 +614,9 @@ def render_elements(self, elements):
         self.canvas.delete("element_base")  # Also clear base elements
         self.element_ids.clear()
         self.image_refs.clear()
-        self.next_image_ref_id = 1
+        self.scene.clear()
+        self.scene_order = [id(element) for element in elements]
+        self.spatial_index.clear()
         print(f"Rendering {(elements)} elements")
         for element in elements:
             self._draw_element(element)
@@ -583,6 +630,53 @@ def render_elements(self, elements):
             self.canvas.lift(size_label_info['text'])
             self.canvas.lift(size_label_info['bg'])
     
+    def update_elements(self, elements):
+        """Bring the canvas in line with elements, touching only the items that changed"""
+        # Added, removed or reordered elements need a full rebuild
+        if [id(element) for element in elements] != self.scene_order:
+            self.render_elements(elements)
+            return
+        
+        for element in elements:
+            self.update_element(element)
+        # Every element has been re-indexed where it moved or changed
+        self.spatial_index.stale = False
+        
+        if self.selected_element:
+            self.show_selection(self.selected_element)
+    
+    def update_element(self, element):
+        """Move an element's canvas item in place, re-rasterising it only if its look changed"""
+        state = self.scene.get(id(element))
+        if state is None:
+            return
+        
+        x = element.get('x', 0)
+        y = element.get('y', 0)
+        if state['signature'] != self._render_signature(element):
+            self._redraw_item(element, state)
+        elif (x, y) != (state['x'], state['y']):
+            self.canvas.move(state['item'], x - state['x'], y - state['y'])
+            state['x'], state['y'] = x, y
+            self._index_element(element)
+    
+    def _redraw_item(self, element, state):
+        """Replace one element's canvas item, keeping its stacking position"""
+        old_item = state['item']
+        above = self.canvas.find_above(old_item)
+        self.canvas.delete(old_item)
+        self.element_ids.pop(old_item, None)
+        self.image_refs.pop(old_item, None)
+        del self.scene[id(element)]
+        
+        new_item = self._draw_element(element)
+        if new_item and above:
+            self.canvas.tag_lower(new_item, above[0])
+    
+    def _render_signature(self, element):
+        """Everything except position that affects how an element is drawn"""
+        return (element.get('type'), repr(element.get('properties', {})))
+    
     def _draw_element(self, element, canvas=None):
         """Draw a single element on the canvas"""
         # Use provided canvas or default to self.canvas
@@ -596,6 +690,7 @@ def _draw_element(self, element, canvas=None):
         height = properties.get('height', 100)
         
         canvas_id = None
+        photo_image = None
         
         if element_type == 'text':
             text = properties.get('text', 'New Text')
@@ -621,15 +716,13 @@ def _draw_element(self, element, canvas=None):
             else:  # left
                 x_pos = x
             
-            font_style = []
-            if bold: font_style.append('bold')
-            if italic: font_style.append('italic')
-            font_style = ' '.join(font_style) if font_style else 'normal'
+            # Same face the export renderer resolves, created once per style
+            tk_font = get_font_service().tk_font(font_name, font_size, bold, italic)
             
             canvas_id = target_canvas.create_text(
                 x_pos, y,
                 text=text,
-                font=(font_name, font_size, font_style),
+                font=tk_font,
                 fill=fill,
                 anchor=anchor_map[align],  # Use north-based anchors for consistent top alignment
                 justify=align,             # Keep justify for multi-line alignment
@@ -697,11 +790,6 @@ def _draw_element(self, element, canvas=None):
             # Convert to PhotoImage
             photo_image = ImageTk.PhotoImage(img)
             
-            # Store reference to prevent garbage collection
-            ref_id = f"shape_{self.next_image_ref_id}"
-            self.next_image_ref_id += 1
-            self.image_refs[ref_id] = photo_image
-            
             # Create canvas image
             canvas_id = target_canvas.create_image(
                 x, y,
@@ -715,14 +803,9 @@ def _draw_element(self, element, canvas=None):
             image_path = properties.get('path')
             if image_path:
                 try:
-                    pil_image = Image.open(image_path)
-                    pil_image = pil_image.resize((int(width), int(height)), Image.Resampling.LANCZOS)
+                    pil_image = get_image_cache().get(image_path, (width, height))
                     photo_image = ImageTk.PhotoImage(pil_image)
                     
-                    ref_id = f"img_{self.next_image_ref_id}"
-                    self.next_image_ref_id += 1
-                    self.image_refs[ref_id] = photo_image
-                    
                     canvas_id = target_canvas.create_image(
                         x, y,
                         image=photo_image,
@@ -751,30 +834,12 @@ def _draw_element(self, element, canvas=None):
                 content = properties.get('content', '')
                 print("=== content", content)
                 
-                # Generate QR code
-                qr = qrcode.QRCode(
-                    version=1,
-                    error_correction=qrcode.constants.ERROR_CORRECT_L,
-                    box_size=10,
-                    border=4,
-                )
-                qr.add_data(content)
-                qr.make(fit=True)
-                
-                # Create QR code image
-                qr_image = qr.make_image(fill_color="black", back_color="white")
-                
-                # Resize image to match element dimensions
-                qr_image = qr_image.resize((width, height), Image.Resampling.LANCZOS)
+                # Reuse the cached module matrix, upscaled to the element size
+                qr_image = get_qr_cache().image(content, width, height)
                 
                 # Convert to PhotoImage
                 photo_image = ImageTk.PhotoImage(qr_image)
                 
-                # Store reference to prevent garbage collection
-                image_ref_id = self.next_image_ref_id
-                self.image_refs[image_ref_id] = photo_image
-                self.next_image_ref_id += 1
-                
                 # Create canvas image
                 canvas_id = target_canvas.create_image(
                     x + width/2,  # Center the image
@@ -797,6 +862,18 @@ def _draw_element(self, element, canvas=None):
         
         if canvas_id:
             self.element_ids[canvas_id] = element
+            if photo_image:
+                # Store reference to prevent garbage collection
+                self.image_refs[canvas_id] = photo_image
+            if target_canvas is self.canvas:
+                self.scene[id(element)] = {
+                    'element': element,
+                    'item': canvas_id,
+                    'x': x,
+                    'y': y,
+                    'signature': self._render_signature(element)
+                }
+                self._index_element(element)
         
         return canvas_id
     
@@ -912,7 +989,7 @@ def on_save(properties):
                 if 'properties' not in element:
                     element['properties'] = {}
                 element['properties'].update(properties)
-                self.render_elements(self.element_manager.elements)
+                self.update_elements(self.element_manager.elements)
                 self.show_selection(element)
                 self.event_manager.emit(EventType.ELEMENT_EDITED, {
                     'element': element
@@ -1059,8 +1136,8 @@ def _handle_resize(self, event):
             self.selected_element['x'] = new_x
             self.selected_element['y'] = new_y
             
-            # Re-render to get new wrapped height
-            self.render_elements(self.element_manager.elements)
+            # Redraw the text item to get new wrapped height
+            self.update_element(self.selected_element)
             
             # Get actual height after wrapping
             for item_id, elem in self.element_ids.items():
@@ -1094,8 +1171,8 @@ def _handle_resize(self, event):
         # Show size label with current dimensions
         self._show_size_label(display_width, display_height, event.x, event.y)
         
-        # Re-render elements
-        self.render_elements(self.element_manager.elements)
+        # Re-rasterise only the resized element
+        self.update_element(self.selected_element)
         self.show_selection(self.selected_element)
     
     def _show_size_label(self, width, height, x, y):
@@ -1494,8 +1571,10 @@ def render_elements_ondemand(self, elements, exporting=False):
             
             # Store element references
             self.element_ids = {}
-            self.next_image_ref_id = 0
             self.image_refs = {}
+            self.scene.clear()
+            self.scene_order = [id(element) for element in elements]
+            self.spatial_index.clear()
             
             # Draw background
             self.canvas.configure(bg=self.background_color)
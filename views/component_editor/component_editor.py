@@ -26,8 +26,9 @@ def __init__(self, parent, component_controller, template_controller, asset_cont
         # Configure frame to expand
         self.pack(fill="both", expand=True)
         
-        # Create event manager
+        # Create event manager; redraw events are merged and delivered once per idle cycle
         self.event_manager = EventManager()
+        self.event_manager.enable_batching(self)
         
         # Initialize managers
         self.element_manager = ElementManager(
@@ -163,6 +164,10 @@ def _handle_canvas_click(self, data):
                 self.event_manager.emit(EventType.ELEMENT_SELECTED, clicked_element)
                 self.canvas_manager.show_selection(clicked_element)
                 
+                # The whole drag or resize becomes one undo step
+                if tool in ['move', 'resize'] and not self.history_manager.in_transaction():
+                    self.history_manager.begin_transaction()
+                
                 if tool == 'resize':
                     self.resize_start = (data['x'], data['y'])
                     self.original_size = (
@@ -208,8 +213,8 @@ def _handle_canvas_drag(self, data):
             self.selected_element['x'] = new_x
             self.selected_element['y'] = new_y
             
-            # Re-render and show selection
-            self.canvas_manager.render_elements(self.element_manager.elements)
+            # Move the element's canvas item in place
+            self.canvas_manager.update_element(self.selected_element)
             
         elif tool == 'resize':
             if self.resize_start and self.original_size:
@@ -223,8 +228,8 @@ def _handle_canvas_drag(self, data):
                 self.selected_element['properties']['width'] = new_width
                 self.selected_element['properties']['height'] = new_height
                 
-                # Re-render and show selection
-                self.canvas_manager.render_elements(self.element_manager.elements)
+                # Re-rasterise only the resized element
+                self.canvas_manager.update_element(self.selected_element)
     
     def _handle_canvas_release(self, data):
         """Handle canvas release events"""
@@ -235,11 +240,13 @@ def _handle_canvas_release(self, data):
                     self.element_manager.elements,
                     self.canvas_manager.background_color
                 )
-                self.event_manager.emit(EventType.ELEMENT_EDITED, self.selected_element)
             
         self.move_start = None
         self.resize_start = None
         self.original_size = None
+        
+        # Close the gesture opened on mouse press
+        self.history_manager.commit_transaction()
     
     def _handle_element_created(self, element):
         """Handle element creation"""
@@ -512,7 +519,8 @@ def _handle_undo(self, _):
             self.element_manager.elements = state.elements.copy()
             self.canvas_manager.background_color = state.background_color
             self.canvas_manager.canvas.configure(bg=state.background_color)
-            self.canvas_manager.render_elements(self.element_manager.elements)
+            # Elements are patched in place, so only the changed items are redrawn
+            self.canvas_manager.update_elements(self.element_manager.elements)
             self.canvas_manager.clear_selection()
             self.selected_element = None
     
@@ -523,25 +531,32 @@ def _handle_redo(self, _):
             self.element_manager.elements = state.elements.copy()
             self.canvas_manager.background_color = state.background_color
             self.canvas_manager.canvas.configure(bg=state.background_color)
-            self.canvas_manager.render_elements(self.element_manager.elements)
+            # Elements are patched in place, so only the changed items are redrawn
+            self.canvas_manager.update_elements(self.element_manager.elements)
             self.canvas_manager.clear_selection()
             self.selected_element = None
     
     def _handle_element_edited(self, element):
         """Handle element editing"""
-        # Push state to history after any element edit
+        # Some emitters wrap the element as {'element': element}
+        edited = element.get('element', element) if isinstance(element, dict) else element
+        
+        # Push state to history after any element edit; bursts on the same property of one element merge
         self.history_manager.push_state(
             self.element_manager.elements,
-            self.canvas_manager.background_color
+            self.canvas_manager.background_color,
+            merge_key=('edit', id(edited))
         )
-        # Re-render the canvas
-        self.canvas_manager.render_elements(self.element_manager.elements)
+        # The canvas redraws changed items from its own ELEMENT_EDITED listener
         if self.selected_element:
             self.canvas_manager.show_selection(self.selected_element)
     
     def _push_state(self):
         """Push current state to history"""
-        self.history_manager.push_state(self.element_manager.elements) 
+        self.history_manager.push_state(
+            self.element_manager.elements,
+            self.canvas_manager.background_color
+        )
     
     def _handle_export_component(self, data):
         """Handle component export"""
@@ -14,6 +14,8 @@ def __init__(self, event_manager: EventManager, parent_window: ctk.CTk, asset_co
         self.asset_controller = asset_controller
         self.elements: List[Dict[str, Any]] = []
         self.selected_element = None
+        # Optional SpatialIndex kept in sync by the canvas
+        self.spatial_index = None
         
     def create_element(self, element_type: str, x: int, y: int) -> Dict[str, Any]:
         """Create a new element with default properties"""
@@ -25,12 +27,18 @@ def create_element(self, element_type: str, x: int, y: int) -> Dict[str, Any]:
         }
         
         self.elements.append(new_element)
+        self._invalidate_index()
         self.event_manager.emit(EventType.ELEMENT_CREATED, new_element)
         self.parent_window.after(100, lambda: self.event_manager.emit(EventType.STATE_CHANGED, None))
         return new_element
     
     def find_element_at(self, x: int, y: int) -> Optional[Dict[str, Any]]:
         """Find element at the given coordinates"""
+        # The index is only trusted until an element changes and the canvas has not re-indexed it yet
+        if self.spatial_index is not None and not self.spatial_index.stale and len(self.spatial_index):
+            hits = self.spatial_index.query_point(x, y)
+            return hits[0] if hits else None
+        
         for element in reversed(self.elements):  # Check from top to bottom
             if self._is_point_inside_element(x, y, element):
                 return element
@@ -51,6 +59,7 @@ def move_element(self, element: Dict[str, Any], new_x: int, new_y: int) -> None:
         if element in self.elements:
             element['x'] = new_x
             element['y'] = new_y
+            self._invalidate_index()
             self.event_manager.emit(EventType.ELEMENT_MOVED, element)
     
     def resize_element(self, element: Dict[str, Any], new_width: int, new_height: int) -> None:
@@ -58,15 +67,22 @@ def resize_element(self, element: Dict[str, Any], new_width: int, new_height: in
         if element in self.elements:
             element['properties']['width'] = new_width
             element['properties']['height'] = new_height
+            self._invalidate_index()
             self.event_manager.emit(EventType.ELEMENT_RESIZED, element)
     
     def delete_element(self, element: Dict[str, Any]) -> None:
         """Delete an element"""
         if element in self.elements:
             self.elements.remove(element)
+            self._invalidate_index()
             self.event_manager.emit(EventType.ELEMENT_DELETED, element)
             self.parent_window.after(100, lambda: self.event_manager.emit(EventType.STATE_CHANGED, None))
     
+    def _invalidate_index(self):
+        """Fall back to scanning the elements until the canvas re-indexes them"""
+        if self.spatial_index is not None:
+            self.spatial_index.stale = True
+    
     def _get_default_properties(self, element_type: str) -> Dict[str, Any]:
         """Get default properties for element type"""
         if element_type == 'text':
@@ -114,6 +130,7 @@ def on_save(properties: Dict[str, Any]):
                 if 'properties' not in element:
                     element['properties'] = {}
                 element['properties'].update(properties)
+                self._invalidate_index()
                 self.event_manager.emit(EventType.ELEMENT_EDITED, element)
 
             # Create and show dialog
@@ -134,6 +151,7 @@ def on_save(properties: Dict[str, Any]):
                 if 'properties' not in element:
                     element['properties'] = {}
                 element['properties'].update(properties)
+                self._invalidate_index()
                 self.event_manager.emit(EventType.ELEMENT_EDITED, element)
 
             # Create and show dialog
@@ -155,6 +173,7 @@ def on_save(properties: Dict[str, Any]):
                     element['properties'] = {}
                 element['properties'].update(properties)
                 print(f"Updated image properties: {properties}")  # Debug log
+                self._invalidate_index()
                 self.event_manager.emit(EventType.ELEMENT_EDITED, element)
 
             # Create and show dialog
@@ -185,6 +204,7 @@ def on_save(properties: Dict[str, Any]):
                 #     self.elements.append(element)
                 #     self.event_manager.emit(EventType.ELEMENT_CREATED, element)
                 # else:
+                self._invalidate_index()
                 self.event_manager.emit(EventType.ELEMENT_EDITED, element)
                 
                 # Update canvas
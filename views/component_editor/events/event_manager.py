@@ -1,23 +1,128 @@
-from typing import Callable, Dict, List, Any
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Any, Optional, Set
 from .event_types import EventType
 
+# Events whose listeners redraw or refresh UI; safe to defer to the next idle cycle
+DEFAULT_BATCHED_EVENTS = {
+    EventType.ELEMENT_EDITED,
+    EventType.ELEMENT_MOVED,
+    EventType.ELEMENT_RESIZED,
+    EventType.STATE_CHANGED,
+    EventType.CANVAS_BACKGROUND_CHANGED
+}
+
+# Listener calls slower than this are reported, since they stall the UI
+SLOW_LISTENER_SECONDS = 0.05
+
 class EventManager:
     def __init__(self):
         self._listeners: Dict[EventType, List[Callable]] = {}
-        
+
+        # Batched mode: queued (event type, target) -> data, flushed on Tk idle
+        self._widget = None
+        self._batched_types: Optional[Set[EventType]] = None
+        self._queue: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._flush_id = None
+
+        # Listener name -> {'calls', 'total', 'max'} in seconds
+        self.listener_stats: Dict[str, Dict[str, float]] = {}
+
     def subscribe(self, event_type: EventType, listener: Callable) -> None:
         """Subscribe to an event"""
         if event_type not in self._listeners:
             self._listeners[event_type] = []
         self._listeners[event_type].append(listener)
-        
+
     def unsubscribe(self, event_type: EventType, listener: Callable) -> None:
         """Unsubscribe from an event"""
         if event_type in self._listeners:
             self._listeners[event_type].remove(listener)
-            
+
+    def enable_batching(self, widget, event_types: Optional[Set[EventType]] = None) -> None:
+        """Queue the given event types and deliver them once per Tk idle cycle"""
+        self._widget = widget
+        self._batched_types = set(event_types) if event_types is not None else set(DEFAULT_BATCHED_EVENTS)
+
+    def disable_batching(self) -> None:
+        """Deliver queued events now and go back to synchronous dispatch"""
+        self.flush()
+        self._widget = None
+        self._batched_types = None
+
     def emit(self, event_type: EventType, data: Any = None) -> None:
         """Emit an event with optional data"""
+        if self._batched_types is not None and event_type in self._batched_types:
+            # Duplicate events for the same target collapse to the latest data
+            self._queue[(event_type, self._target_key(data))] = data
+            self._schedule_flush()
+            return
+        self._dispatch(event_type, data)
+
+    def flush(self) -> None:
+        """Deliver every queued event, including ones emitted while flushing"""
+        if self._flush_id is not None and self._widget is not None:
+            try:
+                self._widget.after_cancel(self._flush_id)
+            except Exception:
+                pass
+        self._flush_id = None
+
+        while self._queue:
+            (event_type, _), data = self._queue.popitem(last=False)
+            self._dispatch(event_type, data)
+
+    def get_listener_stats(self) -> List[tuple]:
+        """Listener timings as (name, calls, total seconds, max seconds), slowest first"""
+        return sorted(
+            ((name, s['calls'], s['total'], s['max']) for name, s in self.listener_stats.items()),
+            key=lambda stat: stat[2],
+            reverse=True
+        )
+
+    def _schedule_flush(self) -> None:
+        if self._flush_id is None and self._widget is not None:
+            self._flush_id = self._widget.after_idle(self._flush_from_idle)
+
+    def _flush_from_idle(self) -> None:
+        self._flush_id = None
+        self.flush()
+
+    def _dispatch(self, event_type: EventType, data: Any) -> None:
         if event_type in self._listeners:
-            for listener in self._listeners[event_type]:
-                listener(data) 
\ No newline at end of file
+            for listener in list(self._listeners[event_type]):
+                start = time.perf_counter()
+                listener(data)
+                self._record(listener, time.perf_counter() - start)
+
+    def _record(self, listener: Callable, elapsed: float) -> None:
+        name = getattr(listener, '__qualname__', repr(listener))
+        if name.endswith('<lambda>') and hasattr(listener, '__code__'):
+            # Tell inline lambdas apart by where they are defined
+            name = f"{name}:{listener.__code__.co_firstlineno}"
+        stats = self.listener_stats.get(name)
+        if stats is None:
+            stats = self.listener_stats[name] = {'calls': 0, 'total': 0.0, 'max': 0.0}
+        stats['calls'] += 1
+        stats['total'] += elapsed
+        stats['max'] = max(stats['max'], elapsed)
+        if elapsed > SLOW_LISTENER_SECONDS:
+            print(f"Slow event listener {name}: {elapsed * 1000:.0f} ms "
+                  f"(average {stats['total'] / stats['calls'] * 1000:.0f} ms over {stats['calls']} calls)")
+
+    def _target_key(self, data: Any):
+        """Identify what an event is about, so repeats for the same target merge
+
+        Element payloads merge per element, payloads with an 'id' per id, and
+        other payloads per shape, so the latest state of each kind wins.
+        """
+        if isinstance(data, dict):
+            if isinstance(data.get('element'), dict):
+                return ('element', id(data['element']))
+            if 'properties' in data or 'type' in data:
+                # The payload is an element itself
+                return ('element', id(data))
+            if 'id' in data:
+                return ('id', data['id'])
+            return ('keys', tuple(sorted(str(key) for key in data)))
+        return None
@@ -2,72 +2,337 @@
 from .events.event_types import EventType
 
 import copy
+import sys
+import time
+
+# Marks a field that did not exist on one side of a change
+_MISSING = object()
 
 class HistoryState:
     def __init__(self, elements, background_color):
-        self.elements = copy.deepcopy(elements)
+        self.elements = elements
         self.background_color = background_color
 
+class HistoryEntry:
+    """One undo step: the element fields, element order and background that changed"""
+
+    def __init__(self, field_changes, old_order, new_order, background):
+        # [(element, field path, old value, new value)]
+        self.field_changes = field_changes
+        # Element lists before/after, only when elements were added, removed or reordered
+        self.old_order = old_order
+        self.new_order = new_order
+        # (old, new) background color, or None
+        self.background = background
+        self.size = self._estimate_size()
+
+    def merge(self, later: 'HistoryEntry'):
+        """Fold a later entry into this one, keeping the earliest old values"""
+        changes = {}
+        for element, path, old, new in self.field_changes + later.field_changes:
+            key = (id(element), path)
+            if key in changes:
+                changes[key] = (element, path, changes[key][2], new)
+            else:
+                changes[key] = (element, path, old, new)
+        self.field_changes = [change for change in changes.values() if not _same(change[2], change[3])]
+
+        if later.old_order is not None:
+            if self.old_order is None:
+                self.old_order = later.old_order
+            self.new_order = later.new_order
+        if later.background is not None:
+            old_background = self.background[0] if self.background else later.background[0]
+            self.background = (old_background, later.background[1])
+        self.size = self._estimate_size()
+
+    def _estimate_size(self) -> int:
+        size = sys.getsizeof(self)
+        for _, path, old, new in self.field_changes:
+            size += 64 + _approx_size(path) + _approx_size(old) + _approx_size(new)
+        if self.old_order is not None:
+            size += 8 * (len(self.old_order) + len(self.new_order))
+            # Added or removed elements are only kept alive by this entry
+            old_ids = {id(element) for element in self.old_order}
+            new_ids = {id(element) for element in self.new_order}
+            for element in self.old_order + self.new_order:
+                if (id(element) in old_ids) != (id(element) in new_ids):
+                    size += _approx_size(element)
+        return size
+
 class HistoryManager:
     def __init__(self, event_manager):
         self.event_manager = event_manager
-        self.history: List[HistoryState] = []
+        self.history: List[HistoryEntry] = []
         self.current_index: int = -1
-        self.max_history: int = 50
-    
-    def push_state(self, elements: List[Dict[str, Any]], background_color: str) -> None:
-        """Push a new state to history"""
-        state = HistoryState(elements, background_color)
-        
+        # Undo steps are dropped oldest-first once they use more than this
+        self.max_bytes: int = 8 * 1024 * 1024
+        self.history_bytes: int = 0
+
+        # Pushes with the same merge key this close together become one step
+        self.merge_window: float = 1.0
+        self._last_merge_key = None
+        self._last_push_time = 0.0
+
+        # Open transactions defer pushes until the outermost commit
+        self._transaction_depth = 0
+        self._pending = None
+        self._last_emitted = None
+
+        # Last committed state: element list, flattened fields per element, background
+        self._order: Optional[List[Dict[str, Any]]] = None
+        self._fields: Dict[int, Dict[tuple, Any]] = {}
+        self._background: Optional[str] = None
+
+    def begin_transaction(self) -> None:
+        """Start grouping pushes (e.g. a drag) into a single undo step"""
+        self._transaction_depth += 1
+
+    def commit_transaction(self) -> None:
+        """Close a transaction; the outermost commit records one step for all its changes"""
+        if self._transaction_depth == 0:
+            return
+        self._transaction_depth -= 1
+        if self._transaction_depth == 0 and self._pending is not None:
+            elements, background_color = self._pending
+            self._pending = None
+            self.push_state(elements, background_color)
+
+    def in_transaction(self) -> bool:
+        """Check if a transaction is open"""
+        return self._transaction_depth > 0
+
+    def push_state(self, elements: List[Dict[str, Any]], background_color: str, merge_key=None) -> None:
+        """Record the changes since the last committed state as one undo step
+
+        Consecutive pushes with the same merge_key within merge_window seconds
+        (e.g. a typing burst on one element) are merged into the previous step,
+        as long as they change the same fields: editing the text and then the
+        color of an element stays two steps.
+        """
+        if self._transaction_depth:
+            self._pending = (elements, background_color)
+            return
+
+        if self._order is None:
+            # First state is the baseline everything else is diffed against
+            self._commit_baseline(elements, background_color)
+            self._emit_state_change()
+            return
+
+        entry = self._diff(elements, background_color)
+        if entry is None:
+            return
+        if merge_key is not None:
+            merge_key = (merge_key, frozenset((id(element), path) for element, path, _, _ in entry.field_changes))
+
+        now = time.monotonic()
+        mergeable = (
+            merge_key is not None
+            and merge_key == self._last_merge_key
+            and now - self._last_push_time <= self.merge_window
+            and self.history
+            and self.current_index == len(self.history) - 1
+        )
+        self._last_merge_key = merge_key
+        self._last_push_time = now
+
+        if mergeable:
+            last = self.history[-1]
+            self.history_bytes -= last.size
+            last.merge(entry)
+            self.history_bytes += last.size
+            self._emit_state_change()
+            return
+
         # If we're not at the end of the history, truncate the future states
         if self.current_index < len(self.history) - 1:
+            for dropped in self.history[self.current_index + 1:]:
+                self.history_bytes -= dropped.size
             self.history = self.history[:self.current_index + 1]
-        
+
         # Add new state
-        self.history.append(state)
+        self.history.append(entry)
+        self.history_bytes += entry.size
         self.current_index += 1
-        
-        # Limit history size
-        if len(self.history) > self.max_history:
-            self.history.pop(0)
+
+        # Limit history memory, always keeping the newest step
+        while self.history_bytes > self.max_bytes and len(self.history) > 1:
+            dropped = self.history.pop(0)
+            self.history_bytes -= dropped.size
             self.current_index -= 1
-        
+
         # Emit state change event
         self._emit_state_change()
-    
+
     def undo(self) -> Optional[HistoryState]:
         """Undo the last action"""
         if self.can_undo():
+            self._last_merge_key = None
+            self._apply(self.history[self.current_index], forward=False)
             self.current_index -= 1
             self._emit_state_change()
-            return self.history[self.current_index]
+            return HistoryState(list(self._order), self._background)
         return None
-    
+
     def redo(self) -> Optional[HistoryState]:
         """Redo the last undone action"""
         if self.can_redo():
+            self._last_merge_key = None
             self.current_index += 1
+            self._apply(self.history[self.current_index], forward=True)
             self._emit_state_change()
-            return self.history[self.current_index]
+            return HistoryState(list(self._order), self._background)
         return None
-    
+
     def can_undo(self) -> bool:
         """Check if undo is available"""
-        return self.current_index > 0
-    
+        return self.current_index >= 0
+
     def can_redo(self) -> bool:
         """Check if redo is available"""
         return self.current_index < len(self.history) - 1
-    
+
+    def _commit_baseline(self, elements, background_color):
+        self._order = list(elements)
+        self._fields = {id(element): _flatten(element) for element in elements}
+        self._background = background_color
+
+    def _diff(self, elements, background_color) -> Optional[HistoryEntry]:
+        """Compare the current state with the last committed one, copying only changed fields"""
+        field_changes = []
+        new_fields = {}
+
+        # Removed elements are diffed too, so undo restores them as they were
+        seen = set()
+        for element in list(elements) + self._order:
+            key = id(element)
+            if key in seen:
+                continue
+            seen.add(key)
+
+            old = self._fields.get(key)
+            if old is None:
+                # New element: nothing to diff against yet
+                new_fields[key] = _flatten(element)
+                continue
+
+            changed = {}
+            current_paths = set()
+            for path, value in _iter_fields(element):
+                current_paths.add(path)
+                old_value = old.get(path, _MISSING)
+                if old_value is _MISSING or old_value != value:
+                    changed[path] = (old_value, copy.deepcopy(value))
+            for path in old.keys() - current_paths:
+                changed[path] = (old[path], _MISSING)
+
+            if changed:
+                fields = dict(old)
+                for path, (old_value, new_value) in changed.items():
+                    field_changes.append((element, path, old_value, new_value))
+                    if new_value is _MISSING:
+                        del fields[path]
+                    else:
+                        fields[path] = new_value
+                new_fields[key] = fields
+            else:
+                new_fields[key] = old
+
+        old_order = new_order = None
+        if [id(element) for element in elements] != [id(element) for element in self._order]:
+            old_order, new_order = self._order, list(elements)
+
+        background = None
+        if background_color != self._background:
+            background = (self._background, background_color)
+
+        if not field_changes and old_order is None and background is None:
+            return None
+
+        # Removed elements drop out of the committed state; their entry keeps them for undo
+        self._order = list(elements)
+        self._fields = {id(element): new_fields[id(element)] for element in elements}
+        self._background = background_color
+        return HistoryEntry(field_changes, old_order, new_order, background)
+
+    def _apply(self, entry: HistoryEntry, forward: bool):
+        """Apply an entry's changes (redo) or their inverse (undo) in place"""
+        for element, path, old_value, new_value in entry.field_changes:
+            value = new_value if forward else old_value
+            _set_field(element, path, value)
+
+        if entry.old_order is not None:
+            self._order = list(entry.new_order if forward else entry.old_order)
+        if entry.background is not None:
+            self._background = entry.background[1] if forward else entry.background[0]
+
+        # Re-read the fields of every element the entry touched, keeping only current elements
+        touched = {id(element) for element, _, _, _ in entry.field_changes}
+        self._fields = {
+            id(element): self._fields[id(element)]
+            if id(element) in self._fields and id(element) not in touched
+            else _flatten(element)
+            for element in self._order
+        }
+
     def _emit_state_change(self) -> None:
-        """Emit state change event"""
+        """Emit state change event when undo/redo availability changes"""
+        state = (self.can_undo(), self.can_redo())
+        if state == self._last_emitted:
+            return
+        self._last_emitted = state
         self.event_manager.emit(EventType.STATE_CHANGED, {
-            'can_undo': self.can_undo(),
-            'can_redo': self.can_redo()
+            'can_undo': state[0],
+            'can_redo': state[1]
         })
-    
+
     def clear(self) -> None:
         """Clear history"""
         self.history.clear()
         self.current_index = -1
-        self._emit_state_change() 
\ No newline at end of file
+        self.history_bytes = 0
+        self._order = None
+        self._fields = {}
+        self._background = None
+        self._last_merge_key = None
+        self._transaction_depth = 0
+        self._pending = None
+        self._emit_state_change()
+
+def _iter_fields(element: Dict[str, Any]):
+    """Yield (field path, value) pairs, with properties one level down"""
+    for key, value in element.items():
+        if key == 'properties' and isinstance(value, dict):
+            for prop_key, prop_value in value.items():
+                yield ('properties', prop_key), prop_value
+        else:
+            yield (key,), value
+
+def _flatten(element: Dict[str, Any]) -> Dict[tuple, Any]:
+    """Snapshot an element as {field path: value}"""
+    return {path: copy.deepcopy(value) for path, value in _iter_fields(element)}
+
+def _set_field(element: Dict[str, Any], path: tuple, value):
+    """Set or remove a field of an element in place"""
+    target = element
+    for key in path[:-1]:
+        target = target.setdefault(key, {})
+    if value is _MISSING:
+        target.pop(path[-1], None)
+    else:
+        target[path[-1]] = copy.deepcopy(value)
+
+def _same(old, new) -> bool:
+    """Check if a merged change is a no-op"""
+    if old is _MISSING or new is _MISSING:
+        return old is new
+    return old == new
+
+def _approx_size(value) -> int:
+    """Rough memory use of a history value in bytes"""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_approx_size(k) + _approx_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(_approx_size(v) for v in value)
+    return sys.getsizeof(value)
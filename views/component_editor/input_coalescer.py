@@ -0,0 +1,70 @@
+import time
+from typing import Any, Callable, Optional
+
+# Roughly one update per display frame at 60 Hz
+FRAME_INTERVAL_MS = 16
+
+class InputCoalescer:
+    """Collapse high-rate pointer events into at most one update per frame"""
+
+    def __init__(self, widget, callback: Callable[[Any], None], interval_ms: int = FRAME_INTERVAL_MS):
+        self.widget = widget
+        self.callback = callback
+        self.interval_ms = interval_ms
+
+        self._latest = None
+        self._pending = 0
+        self._after_id: Optional[str] = None
+        self._last_flush = 0.0
+
+        # Number of raw events folded into the most recent update
+        self.last_batch_size = 0
+        self.events_received = 0
+        self.frames_applied = 0
+
+    def push(self, event):
+        """Record the latest event and schedule an update if none is pending"""
+        self._latest = event
+        self._pending += 1
+        self.events_received += 1
+
+        if self._after_id is None:
+            elapsed_ms = (time.perf_counter() - self._last_flush) * 1000
+            delay = int(self.interval_ms - elapsed_ms)
+            if delay > 0:
+                self._after_id = self.widget.after(delay, self._run)
+            else:
+                self._after_id = self.widget.after_idle(self._run)
+
+    def flush(self):
+        """Apply any pending event right away (e.g. on mouse release)"""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+        self._run()
+
+    def cancel(self):
+        """Drop any pending event without applying it"""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        self._latest = None
+        self._pending = 0
+
+    def _run(self):
+        self._after_id = None
+        if self._latest is None:
+            return
+
+        event = self._latest
+        self.last_batch_size = self._pending
+        self._latest = None
+        self._pending = 0
+        self._last_flush = time.perf_counter()
+        self.frames_applied += 1
+
+        try:
+            self.callback(event)
+        except Exception as e:
+            print(f"Error applying coalesced input: {e}")
+            import traceback
+            traceback.print_exc()
@@ -0,0 +1,98 @@
+import math
+from typing import Any, Dict, Hashable, List, Set, Tuple
+
+Bounds = Tuple[float, float, float, float]
+
+class SpatialIndex:
+    """Uniform-grid index of element bounds for point and rectangle hit-testing"""
+
+    def __init__(self, cell_size: int = 64):
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        # key -> (item, bounds, stacking order)
+        self._entries: Dict[Hashable, Tuple[Any, Bounds, int]] = {}
+        self._next_order = 0
+        # Set by whoever changes the indexed items until the index is rebuilt
+        self.stale = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Remove every entry, before the index is rebuilt"""
+        self._cells.clear()
+        self._entries.clear()
+        self._next_order = 0
+        self.stale = False
+
+    def insert(self, key: Hashable, item: Any, bounds: Bounds):
+        """Add an item, or update its bounds while keeping its stacking order"""
+        if key in self._entries:
+            _, old_bounds, order = self._entries[key]
+            self._unlink(key, old_bounds)
+        else:
+            order = self._next_order
+            self._next_order += 1
+
+        bounds = self._normalize(bounds)
+        self._entries[key] = (item, bounds, order)
+        for cell in self._cells_for(bounds):
+            self._cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key: Hashable):
+        """Remove an item if it is indexed"""
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._unlink(key, entry[1])
+
+    def query_point(self, x: float, y: float) -> List[Any]:
+        """Items whose bounds contain the point, topmost first"""
+        cell = (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+        hits = []
+        for key in self._cells.get(cell, ()):
+            item, (x1, y1, x2, y2), order = self._entries[key]
+            if x1 <= x <= x2 and y1 <= y <= y2:
+                hits.append((order, item))
+        hits.sort(key=lambda hit: hit[0], reverse=True)
+        return [item for _, item in hits]
+
+    def query_rect(self, x1: float, y1: float, x2: float, y2: float, contained: bool = False) -> List[Any]:
+        """Items intersecting (or fully inside, if contained) a rectangle, bottom first"""
+        rect = self._normalize((x1, y1, x2, y2))
+        seen = set()
+        hits = []
+        for cell in self._cells_for(rect):
+            for key in self._cells.get(cell, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                item, bounds, order = self._entries[key]
+                if contained:
+                    matches = (rect[0] <= bounds[0] and rect[1] <= bounds[1] and
+                               bounds[2] <= rect[2] and bounds[3] <= rect[3])
+                else:
+                    matches = (bounds[0] <= rect[2] and rect[0] <= bounds[2] and
+                               bounds[1] <= rect[3] and rect[1] <= bounds[3])
+                if matches:
+                    hits.append((order, item))
+        hits.sort(key=lambda hit: hit[0])
+        return [item for _, item in hits]
+
+    def _unlink(self, key: Hashable, bounds: Bounds):
+        for cell in self._cells_for(bounds):
+            keys = self._cells.get(cell)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self._cells[cell]
+
+    def _cells_for(self, bounds: Bounds):
+        x1, y1, x2, y2 = bounds
+        size = self.cell_size
+        for cx in range(math.floor(x1 / size), math.floor(x2 / size) + 1):
+            for cy in range(math.floor(y1 / size), math.floor(y2 / size) + 1):
+                yield cx, cy
+
+    def _normalize(self, bounds: Bounds) -> Bounds:
+        x1, y1, x2, y2 = bounds
+        return min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
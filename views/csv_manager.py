@@ -1,10 +1,46 @@
 import customtkinter as ctk
+import numpy as np
 import pandas as pd
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import shutil
 import os
 from config import get_config
+from utils import columnar_cache
+from utils.data_query import DataQuery, QueryError
+from utils.edit_journal import EditJournal, write_frame
+from views.virtual_table import VirtualTable, format_cell
+
+# Numpy dtypes that cannot hold a missing value, and the nullable dtypes that can
+NULLABLE_DTYPES = {'i': 'Int64', 'u': 'UInt64', 'b': 'boolean'}
+
+def parse_cell(text: str, dtype):
+    """Typed value for text entered into a column, or the text itself if it does not parse"""
+    if text == "":
+        return None
+    if pd.api.types.is_bool_dtype(dtype):
+        lowered = text.strip().lower()
+        if lowered in ("true", "false"):
+            return lowered == "true"
+    elif pd.api.types.is_numeric_dtype(dtype):
+        converted = pd.to_numeric(text, errors="coerce")
+        if not pd.isna(converted):
+            return converted
+    return text
+
+def append_empty_row(data: pd.DataFrame, label) -> pd.DataFrame:
+    """Add a blank row without upcasting integer or boolean columns to float/object"""
+    data = data.astype({
+        column: NULLABLE_DTYPES[dtype.kind]
+        for column, dtype in data.dtypes.items()
+        if isinstance(dtype, np.dtype) and dtype.kind in NULLABLE_DTYPES
+    })
+    row = pd.DataFrame({
+        column: pd.Series([None], index=[label]).astype(dtype)
+        for column, dtype in data.dtypes.items()
+    })
+    return pd.concat([data, row])
+
 class CSVManager(ctk.CTkFrame):
     def __init__(self, parent, controller):
         super().__init__(parent)
@@ -12,6 +48,10 @@ def __init__(self, parent, controller):
         self.config = get_config()
         self.current_csv = None
         self.data = None
+        self.journal = None
+        # Index over self.data for the search box, rebuilt after edits
+        self.query = None
+        self.search_text = ""
         
         self._create_ui()
         self._load_csv_list()
@@ -91,6 +131,22 @@ def _create_ui(self):
         )
         self.records_label.pack(side="right", padx=5)
         
+        # Search box: plain words or filter expressions such as "type = Spell and cost > 2"
+        ctk.CTkButton(
+            self.lower_toolbar,
+            text="Clear",
+            width=60,
+            command=self._clear_search
+        ).pack(side="right", padx=5)
+        
+        self.search_entry = ctk.CTkEntry(
+            self.lower_toolbar,
+            width=250,
+            placeholder_text="Search... (e.g. type = Spell and cost > 2)"
+        )
+        self.search_entry.pack(side="right", padx=5)
+        self.search_entry.bind('<Return>', self._on_search)
+        
         # Table frame (update row number)
         self.table_frame = ctk.CTkFrame(self)
         self.table_frame.grid(row=2, column=0, sticky="nsew", padx=5, pady=5)
@@ -108,10 +164,10 @@ def _create_ui(self):
         self.edit_entry.bind('<Return>', self._on_entry_return)
         self.edit_entry.bind('<Escape>', lambda e: self._cancel_edit())
         
-        # Configure scrollbar commands
+        # Configure scrollbar commands; vertical scrolling pages rows in from the DataFrame
         x_scroll.configure(command=self.table.xview)
-        y_scroll.configure(command=self.table.yview)
-        self.table.configure(xscrollcommand=x_scroll.set, yscrollcommand=y_scroll.set)
+        self.table.configure(xscrollcommand=x_scroll.set)
+        self.virtual_table = VirtualTable(self.table, y_scroll)
         
         # Grid layout instead of pack for better control
         self.table.grid(row=0, column=0, sticky="nsew")
@@ -166,28 +222,16 @@ def _import_csv(self):
     def _load_csv(self, file_path):
         """Load CSV data into table"""
         try:
-            self.data = pd.read_csv(file_path)
+            # Typed columnar sidecar; built on first load and rebuilt when the CSV changes
+            self.data = columnar_cache.read_frame(file_path).reset_index(drop=True)
             self.current_csv = file_path
+            self.journal = EditJournal(file_path, len(self.data))
+            self.query = None
+            self.search_text = ""
+            self.search_entry.delete(0, tk.END)
             
-            # Clear existing table
-            self.table.delete(*self.table.get_children())
-            
-            # Set columns with No. as first column
-            columns = ["No."] + list(self.data.columns)
-            self.table["columns"] = columns
-            self.table["show"] = "headings"
-            
-            # Configure columns
-            self.table.heading("No.", text="No.")
-            self.table.column("No.", width=50, anchor="center")
-            
-            for column in self.data.columns:
-                self.table.heading(column, text=column)
-                self.table.column(column, width=100)
-            
-            # Add data with row numbers
-            for idx, row in self.data.iterrows():
-                self.table.insert("", "end", values=[idx + 1] + list(row))
+            # Only the rows in view are put into the table, so this is the same cost for any size
+            self.virtual_table.set_data(self.data)
             
             # Update records count
             self._update_records_count()
@@ -197,33 +241,66 @@ def _load_csv(self, file_path):
     
     def _update_records_count(self):
         """Update the records count label"""
-        count = len(self.table.get_children())
-        self.records_label.configure(text=f"Total Records: {count}")
+        count = len(self.data) if self.data is not None else 0
+        if self.virtual_table.rows is not None:
+            self.records_label.configure(text=f"Showing {len(self.virtual_table.rows)} of {count} Records")
+        else:
+            self.records_label.configure(text=f"Total Records: {count}")
+
+    def _on_search(self, event=None):
+        """Filter the table to the rows matching the search box"""
+        if self.data is None:
+            return
+        self.search_text = self.search_entry.get().strip()
+        rows = self._search_rows()
+        if self.search_text and rows is None:
+            return
+        self.virtual_table.set_rows(rows)
+        self._update_records_count()
+
+    def _clear_search(self):
+        """Show every row again"""
+        self.search_entry.delete(0, tk.END)
+        self._on_search()
+
+    def _search_rows(self):
+        """Row positions matching the current search, or None to show every row"""
+        if not self.search_text:
+            return None
+        try:
+            if self.query is None:
+                self.query = DataQuery(self.data)
+            return self.query.positions(self.search_text)
+        except QueryError as e:
+            messagebox.showwarning("Search", str(e))
+            return None
+
+    def _refresh_view(self, include_row=None):
+        """Redisplay after the DataFrame changed, re-running any active search"""
+        self.query = None
+        rows = self._search_rows()
+        if rows is not None and include_row is not None:
+            # Keep a row the user just added visible even though it cannot match yet
+            rows = np.union1d(rows, [include_row])
+        self.virtual_table.set_data(self.data, keep_position=True, rows=rows)
+        self._update_records_count()
 
     def _delete_selected_rows(self):
         """Delete selected rows from table"""
-        if not self.table.selection():
+        rows = self.virtual_table.selected_rows()
+        if not rows:
             messagebox.showwarning("Warning", "Please select rows to delete")
             return
             
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete the selected rows?"):
-            # Delete selected items
-            for item in self.table.selection():
-                self.table.delete(item)
+            # Delete from the DataFrame; row numbers follow from positions, so nothing to renumber.
+            # Index labels are kept so the journal can still find the deleted lines in the file
+            labels = self.data.index[rows]
+            self.journal.delete_rows(labels)
+            self.data = self.data.drop(labels)
             
-            # Renumber remaining rows
-            self._renumber_rows()
-            
-            # Update records count
-            self._update_records_count()
-
-    def _renumber_rows(self):
-        """Renumber all rows after deletion"""
-        items = self.table.get_children()
-        for idx, item in enumerate(items, 1):
-            values = list(self.table.item(item)["values"])
-            values[0] = idx  # Update row number
-            self.table.item(item, values=values)
+            # Redisplay and update records count
+            self._refresh_view()
 
     def _add_row(self):
         """Add new row to table"""
@@ -231,14 +308,17 @@ def _add_row(self):
             messagebox.showwarning("Warning", "Please load a CSV file first")
             return
             
-        # Create empty row with row number
-        new_row = [len(self.table.get_children()) + 1] + [""] * len(self.data.columns)
-        item = self.table.insert("", "end", values=new_row)
-        self._update_records_count()
+        # Append an empty row and scroll to it
+        row = len(self.data)
+        self.data = append_empty_row(self.data, self.journal.add_row())
+        self._refresh_view(include_row=row)
         
         # Optional: Start editing the first cell of the new row
-        self.table.selection_set(item)
-        self.table.focus(item)
+        self.virtual_table.see(row)
+        self.virtual_table.select([row])
+        item = self.virtual_table.item_of(row)
+        if item:
+            self.table.focus(item)
     
     def _add_column(self):
         """Add new column to table"""
@@ -254,16 +334,14 @@ def _add_column(self):
         column_name = dialog.get_input()
         
         if column_name:
-            # Add column to table
-            self.table["columns"] = list(self.table["columns"]) + [column_name]
-            self.table.heading(column_name, text=column_name)
-            self.table.column(column_name, width=100)
+            if column_name in self.data.columns:
+                messagebox.showwarning("Warning", f"Column '{column_name}' already exists")
+                return
             
-            # Update all rows with empty value for new column
-            for item in self.table.get_children():
-                values = list(self.table.item(item)["values"])
-                values.append("")
-                self.table.item(item, values=values)
+            # Add an empty column to the DataFrame and show it
+            self.journal.add_column(column_name)
+            self.data[column_name] = ""
+            self._refresh_view()
     
     def _save_changes(self):
         """Save changes to CSV file"""
@@ -271,20 +349,23 @@ def _save_changes(self):
             messagebox.showwarning("Warning", "No CSV file loaded")
             return
             
-        try:
-            # Get data from table
-            data = []
-            columns = list(self.table["columns"])
-            columns.remove("No.")  # Remove No. column before saving
+        if not self.journal.dirty:
+            messagebox.showinfo("Info", "No changes to save")
+            return
             
-            for item in self.table.get_children():
-                values = list(self.table.item(item)["values"])
-                values.pop(0)  # Remove the No. column value
-                data.append(values)
+        try:
+            if self.journal.source_changed():
+                # The file changed underneath us, so the journal no longer lines up with it
+                write_frame(self.data, self.current_csv)
+            else:
+                # Only the recorded edits are applied; untouched cells keep their text
+                self.journal.save(list(self.data.columns))
             
-            # Create DataFrame and save
-            df = pd.DataFrame(data, columns=columns)
-            df.to_csv(self.current_csv, index=False)
+            # The sidecar takes the in-memory frame, so column types survive without a re-parse
+            self.data = self.data.reset_index(drop=True)
+            columnar_cache.build(self.current_csv, self.data)
+            self.journal = EditJournal(self.current_csv, len(self.data))
+            self._refresh_view()
             
             messagebox.showinfo("Success", "Changes saved successfully!")
             
@@ -352,9 +433,13 @@ def _on_double_click(self, event):
         if column == "#1":  # No. column
             return
             
+        row = self.virtual_table.row_of(item)
+        if row is None:
+            return
+            
         # Get column name and current value
         column_id = self.table["columns"][int(column.replace("#", "")) - 1]
-        current_value = self.table.item(item)["values"][int(column.replace("#", "")) - 1]
+        current_value = format_cell(self.data[column_id].iat[row])
         
         # Get cell bbox
         x, y, w, h = self.table.bbox(item, column)
@@ -369,7 +454,7 @@ def _on_double_click(self, event):
         
         # Store current editing info
         self._editing = {
-            "item": item,
+            "row": row,
             "column": column,
             "column_id": column_id
         }
@@ -382,20 +467,30 @@ def _on_entry_return(self, event):
         # Get new value
         new_value = self.edit_entry.get()
         
-        # Update table
-        item = self._editing["item"]
-        column_idx = int(self._editing["column"].replace("#", "")) - 1
-        
-        # Get current values and update the specific column
-        values = list(self.table.item(item)["values"])
-        values[column_idx] = new_value
-        
-        # Update the table
-        self.table.item(item, values=values)
+        # Update the DataFrame, then the visible rows
+        row = self._editing["row"]
+        column_id = self._editing["column_id"]
+        self._set_cell(row, column_id, new_value)
+        # The row stays in view until the next search, even if it no longer matches
+        self.query = None
+        self.virtual_table.refresh()
         
         # Clean up
         self._cancel_edit()
 
+    def _set_cell(self, row, column_id, text):
+        """Store an edit in the DataFrame as the column's type and in the journal as typed"""
+        label = self.data.index[row]
+        self.journal.record_cell(label, column_id, text)
+        column = self.data[column_id]
+        value = parse_cell(text, column.dtype)
+        try:
+            self.data.at[label, column_id] = value
+        except (TypeError, ValueError):
+            # Value does not fit the column's dtype: widen the column instead of failing
+            self.data[column_id] = column.astype(object)
+            self.data.at[label, column_id] = value
+
     def _cancel_edit(self):
         """Cancel editing and hide entry widget"""
         self.edit_entry.delete(0, tk.END)
@@ -407,8 +502,10 @@ def _cancel_edit(self):
     def _show_context_menu(self, event):
         """Show context menu on right click"""
         item = self.table.identify_row(event.y)
-        if item:
-            self.table.selection_set(item)
+        row = self.virtual_table.row_of(item) if item else None
+        if row is not None:
+            self.virtual_table.select([row])
+            self.table.focus(item)
             self.context_menu.post(event.x_root, event.y_root)
 
     def _edit_selected(self):
@@ -439,8 +536,12 @@ def _delete_csv_file(self):
                 # Delete the file
                 os.remove(self.current_csv)
                 
+                columnar_cache.remove(self.current_csv)
+                self.journal = None
+                self.query = None
+                
                 # Clear the table
-                self.table.delete(*self.table.get_children())
+                self.virtual_table.clear()
                 self.current_csv = None
                 self.data = None
                 
@@ -1,7 +1,6 @@
 import customtkinter as ctk
 import tkinter as tk
 import json
-import pandas as pd
 import os
 import tkinter.messagebox as messagebox
 
@@ -10,6 +9,7 @@
 from views.component_editor.events.event_manager import EventManager
 from views.component_editor.element_manager import ElementManager
 from config import get_config
+from utils import columnar_cache
 
 class DataSourceDialog:
     def __init__(self, parent, template_data, on_save):
@@ -513,8 +513,7 @@ def _get_csv_files(self):
     def _get_csv_columns(self, csv_file):
         try:
             data_path = self.config.USER_DATA_DIR / "data" / csv_file
-            df = pd.read_csv(data_path)
-            return list(df.columns)
+            return columnar_cache.read_columns(data_path)
         except Exception:
             return []
     
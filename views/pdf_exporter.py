@@ -2,17 +2,24 @@
 from tkinter import filedialog
 from PIL import Image
 import os
-import pandas as pd
-from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A3, A4, A5
 from reportlab.lib.units import mm
 import tkinter as tk
-from reportlab.lib.utils import ImageReader
 import math
-import shutil
-import tempfile
+from collections import deque
+from itertools import count, islice
 import traceback
 from config import get_config
+from utils.render_pool import RenderPool, default_worker_count
+from utils.render_cache import get_render_cache
+from utils.export_manifest import ExportManifest, content_hash
+from utils.export_job import ExportError, ExportJob, ExportProgress
+from utils.export_checkpoint import ExportCheckpoint
+from utils.pdf_generator import CardSheetWriter
+from utils.layered_export import LayeredCardSheetWriter
+from utils.vector_export import VectorCardSheetWriter
+from utils.mapping_compiler import OverrideTable, compile_mappings
+from utils.card_instance import CardInstance
 
 class PDFExporter(ctk.CTkFrame):
     def __init__(self, parent, template_controller, csv_controller):
@@ -31,6 +38,9 @@ def __init__(self, parent, template_controller, csv_controller):
             "A5": A5
         }
         
+        # Background export in progress, if any
+        self.export_job = None
+        
         self._create_ui()
         self._load_templates()
     
@@ -104,6 +114,51 @@ def _create_ui(self):
             value="rtl"
         ).pack(side="left", padx=10)
         
+        # Output mode selection
+        mode_frame = ctk.CTkFrame(top_frame)
+        mode_frame.pack(fill="x", padx=5, pady=5)
+        
+        ctk.CTkLabel(
+            mode_frame,
+            text="Output Mode:",
+            font=("Arial", 12, "bold")
+        ).pack(side="left", padx=5)
+        
+        self.mode_var = ctk.StringVar(value="Raster")
+        for mode in ["Raster", "Layered", "Vector"]:
+            ctk.CTkRadioButton(
+                mode_frame,
+                text=mode,
+                variable=self.mode_var,
+                value=mode
+            ).pack(side="left", padx=10)
+        
+        # Render worker selection
+        workers_frame = ctk.CTkFrame(top_frame)
+        workers_frame.pack(fill="x", padx=5, pady=5)
+        
+        ctk.CTkLabel(
+            workers_frame,
+            text="Render Workers:",
+            font=("Arial", 12, "bold")
+        ).pack(side="left", padx=5)
+        
+        self.workers_var = ctk.StringVar(value="Auto")
+        ctk.CTkOptionMenu(
+            workers_frame,
+            variable=self.workers_var,
+            values=["Auto", "1", "2", "4", "8"],
+            width=80
+        ).pack(side="left", padx=5)
+        
+        # Keep finished pages between runs and only re-render pages whose cards changed
+        self.incremental_var = ctk.BooleanVar(value=True)
+        ctk.CTkCheckBox(
+            workers_frame,
+            text="Incremental",
+            variable=self.incremental_var
+        ).pack(side="left", padx=10)
+        
         # Export Path Selection
         path_frame = ctk.CTkFrame(top_frame)
         path_frame.pack(fill="x", padx=5, pady=5)
@@ -180,13 +235,14 @@ def _create_ui(self):
         control_frame = ctk.CTkFrame(bottom_frame)
         control_frame.pack(side="left", fill="y", padx=5)
         
-        # Export button
-        ctk.CTkButton(
+        # Export button; becomes Cancel while an export runs
+        self.export_button = ctk.CTkButton(
             control_frame,
             text="Generate PDF",
             command=self._start_export,
             width=120
-        ).pack(pady=5)
+        )
+        self.export_button.pack(pady=5)
         
         # Progress frame
         progress_frame = ctk.CTkFrame(control_frame)
@@ -337,251 +393,340 @@ def _calculate_layout(self, card_width_mm: float, card_height_mm: float, page_si
             'card_height': card_height_mm
         }
 
-    def _generate_card_image(self, card_data: dict, output_path: str) -> str:
-        """Generate a temporary image file for a card"""
-        try:
-            # Create preview frame for image generation
-            preview_frame = ctk.CTkFrame(self)
-            
-            # Get dimensions and convert to pixels
-            dimensions = card_data.get('dimensions', {})
-            dpi = dimensions.get('dpi', 96)
-            unit = dimensions.get('unit', 'mm')
-            
-            # Convert dimensions to pixels
-            if unit == 'mm':
-                width = int((dimensions['width'] * dpi) / 25.4)
-                height = int((dimensions['height'] * dpi) / 25.4)
-            elif unit == 'in':
-                width = int(dimensions['width'] * dpi)
-                height = int(dimensions['height'] * dpi)
-            else:  # unit is already px
-                width = int(dimensions['width'])
-                height = int(dimensions['height'])
-            
-            # Ensure dimensions are positive integers
-            width = max(1, width)
-            height = max(1, height)
-            
-            preview_frame.configure(width=width, height=height)
-            preview_frame.pack_forget()  # Hide the frame but keep it in memory
-            
-            try:
-                # Generate card image using template controller
-                success = self.template_controller.export_template_image(
-                    template_data=card_data,
-                    output_path=output_path,
-                    preview_frame=None
-                )
-                
-                if not success:
-                    print(f"Template controller failed with dimensions: {width}x{height}")
-                    return None
-                
-                # Verify the image exists
-                if not os.path.exists(output_path):
-                    print(f"Output file not found: {output_path}")
-                    return None
-                
-                # Verify and process the image
-                with Image.open(output_path) as img:
-                    # Save as PNG with white background
-                    if img.mode in ('RGBA', 'LA'):
-                        background = Image.new('RGB', img.size, 'WHITE')
-                        background.paste(img, mask=img.split()[-1])
-                        background.save(output_path, 'PNG')
-                    else:
-                        img.convert('RGB').save(output_path, 'PNG')
-                
-                return output_path
-                
-            except Exception as e:
-                print(f"Error in image generation: {e}")
-                import traceback
-                traceback.print_exc()
-                return None
-            
-            finally:
-                # Clean up preview frame
-                preview_frame.destroy()
-                
-        except Exception as e:
-            print(f"Critical error in _generate_card_image: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
+    def _build_card_data(self, template_data: dict, overrides: OverrideTable, position: int) -> CardInstance:
+        """Build an independent, fully mapped card spec for one data row"""
+        # Rows share the template read-only; only overridden elements are copied
+        return overrides.card(template_data, position)
+    
+    def _create_writer(self, template_data: dict, page_size: tuple, layout: dict, settings: dict) -> CardSheetWriter:
+        """Create the sheet writer for the selected output mode"""
+        writer_classes = {
+            # Shared artwork is embedded once and drawn by reference on every card
+            "Layered": LayeredCardSheetWriter,
+            # Text, shapes and QR codes stay sharp at any print size
+            "Vector": VectorCardSheetWriter
+        }
+        writer_class = writer_classes.get(settings['mode'])
+        if writer_class:
+            return writer_class(
+                settings['output_path'],
+                page_size,
+                layout,
+                settings['direction'],
+                template_data,
+                self.template_controller.image_processor
+            )
+        return CardSheetWriter(
+            settings['output_path'],
+            page_size,
+            layout,
+            settings['direction']
+        )
+    
+    def _export_scope(self, template_data: dict, csv_file: str, layout: dict, settings: dict) -> dict:
+        """Identify an export by its template, data source and page setup"""
+        return {
+            'template': template_data.get('id', settings['template_id']),
+            'data_source': csv_file,
+            'rows': [settings['start_row'], settings['end_row']],
+            'page_size': settings['page_size'],
+            'direction': settings['direction'],
+            'mode': settings['mode'],
+            'layout': layout
+        }
+    
+    def _export_settings(self) -> dict:
+        """Snapshot the export options, since Tk variables may only be read on the UI thread"""
+        return {
+            'template_id': self.selected_template.id,
+            'output_path': self.path_var.get(),
+            'page_size': self.size_var.get(),
+            'direction': self.direction_var.get(),
+            'mode': self.mode_var.get(),
+            'workers': self._get_worker_count(),
+            'incremental': self.incremental_var.get(),
+            'start_row': self.start_row_var.get(),
+            'end_row': self.end_row_var.get()
+        }
+    
+    def _get_worker_count(self) -> int:
+        """Get the number of render processes selected in the UI"""
+        value = self.workers_var.get()
+        return default_worker_count() if value == "Auto" else int(value)
 
     def _start_export(self):
-        """Start the PDF export process"""
+        """Start the PDF export on a background job"""
+        if self.export_job is not None and self.export_job.running:
+            return
         if not self._validate_export():
             return
         
+        # Get template data
+        template_data = self.template_controller.load_template(self.selected_template.id)
+        if not template_data:
+            self._show_error("Failed to load template data")
+            return
+        
+        settings = self._export_settings()
+        self.export_job = ExportJob(
+            self,
+            lambda job: self._run_export(job, template_data, settings),
+            on_progress=self._on_export_progress,
+            on_done=self._on_export_done,
+            on_error=self._on_export_error,
+            on_cancel=self._on_export_cancelled
+        )
+        self.export_button.configure(text="Cancel", command=self._cancel_export)
+        self.progress_bar.set(0)
+        self.progress_label.configure(text="Starting export...")
+        self.export_job.start()
+    
+    def _cancel_export(self):
+        """Stop the running export after the current card"""
+        if self.export_job is not None and self.export_job.running:
+            self.export_job.cancel()
+            self.export_button.configure(state="disabled")
+            self.progress_label.configure(text="Cancelling...")
+    
+    def _run_export(self, job: ExportJob, template_data: dict, settings: dict) -> dict:
+        """Render and write the PDF (runs on the export job thread)"""
+        # Get card dimensions and calculate actual size
+        dimensions = template_data.get('dimensions', {})
+        unit = dimensions.get('unit', 'mm')
+        dpi = dimensions.get('dpi', 96)
+        
+        # Get actual width and height in mm
+        card_width_mm = dimensions.get('actual_width', dimensions.get('width', 63))
+        card_height_mm = dimensions.get('actual_height', dimensions.get('height', 88))
+        
+        # Convert dimensions to mm
+        if unit == 'px' or unit == 'mm':  # Both need same conversion since actual size is in pixels
+            card_width_mm = (card_width_mm / dpi) * 25.4
+            card_height_mm = (card_height_mm / dpi) * 25.4
+        elif unit == 'in':
+            card_width_mm = card_width_mm * 25.4
+            card_height_mm = card_height_mm * 25.4
+        
+        # Load and validate CSV data
+        csv_file = template_data.get('data_source', {}).get('file')
+        if not csv_file:
+            raise ExportError("No CSV file configured in template")
+        
+        csv_path = self.config.USER_DATA_DIR / "data" / csv_file
+        if not os.path.exists(csv_path):
+            raise ExportError(f"CSV file not found: {csv_file}")
+        
+        # Row range filter, applied while streaming
         try:
-            # Get template data
-            template_data = self.template_controller.load_template(self.selected_template.id)
-            if not template_data:
-                self._show_error("Failed to load template data")
-                return
-            
-            # Get card dimensions and calculate actual size
-            dimensions = template_data.get('dimensions', {})
-            unit = dimensions.get('unit', 'mm')
-            dpi = dimensions.get('dpi', 96)
-            
-            # Get actual width and height in mm
-            card_width_mm = dimensions.get('actual_width', dimensions.get('width', 63))
-            card_height_mm = dimensions.get('actual_height', dimensions.get('height', 88))
-            
-            # Convert dimensions to mm
-            if unit == 'px' or unit == 'mm':  # Both need same conversion since actual size is in pixels
-                card_width_mm = (card_width_mm / dpi) * 25.4
-                card_height_mm = (card_height_mm / dpi) * 25.4
-            elif unit == 'in':
-                card_width_mm = card_width_mm * 25.4
-                card_height_mm = card_height_mm * 25.4
+            start_row = max(0, int(settings['start_row']) - 1)
+            end_row = int(settings['end_row']) if settings['end_row'] else None
+        except ValueError as e:
+            raise ExportError(f"Invalid row numbers: {str(e)}")
+        
+        # Progress estimate; the real count is only known once the file has been streamed
+        available_rows = self.csv_controller.estimate_rows(csv_file)
+        estimated_cards = max(0, min(end_row if end_row is not None else available_rows, available_rows) - start_row)
+        
+        # Get page size and calculate layout
+        page_size = self.page_sizes[settings['page_size']]
+        layout = self._calculate_layout(card_width_mm, card_height_mm, page_size)
+        
+        # Cards go straight from the renderer to the PDF page in memory
+        writer = self._create_writer(template_data, page_size, layout, settings)
+        
+        # A failed or cancelled export leaves no part files behind
+        try:
+            # Mappings are compiled once and evaluated column-wise per batch
+            plan = compile_mappings(template_data, self.config.ASSETS_PATH)
             
-            # Load and validate CSV data
-            csv_file = template_data.get('data_source', {}).get('file')
-            if not csv_file:
-                self._show_error("No CSV file configured in template")
-                return
+            # Identical cards, in this deck or a previous export, are rendered only once
+            cache = get_render_cache() if writer.cache_results else None
+            output_path = settings['output_path']
+            cards_per_page = layout['cards_per_page']
+            scope = self._export_scope(template_data, csv_file, layout, settings)
+            template_hash = content_hash(template_data)
             
-            csv_path = self.config.USER_DATA_DIR / "data" / csv_file
-            if not os.path.exists(csv_path):
-                self._show_error(f"CSV file not found: {csv_file}")
-                return
+            # Incremental exports keep every finished page, so a later or interrupted
+            # run replays the pages whose cards are unchanged and renders only the rest
+            incremental = settings['incremental']
+            manifest = None
+            pages = None
+            if incremental:
+                manifest = ExportManifest(self.config.USER_DATA_DIR / 'cache' / 'manifests', scope)
+                pages = ExportCheckpoint(self.config.USER_DATA_DIR / 'cache' / 'checkpoints', scope)
+                pages.start(template_hash, cards_per_page)
             
-            try:
-                df = pd.read_csv(csv_path)
-            except Exception as e:
-                self._show_error(f"Failed to read CSV file: {str(e)}")
-                return
+            with RenderPool(settings['workers'], render_fn=writer.render_fn) as pool:
+                def keyed_specs():
+                    """(content hash, render spec) of every card, streamed one batch at a time"""
+                    batches = self.csv_controller.iter_batches(csv_file, start_row=start_row, end_row=end_row)
+                    for batch in batches:
+                        overrides = plan.evaluate(batch)
+                        for position in range(len(batch)):
+                            spec = writer.card_spec(self._build_card_data(template_data, overrides, position))
+                            # Hashes are only needed to compare pages; the pool hashes for the cache itself
+                            yield (get_render_cache().key(spec, pool.render_fn) if incremental else None), spec
             
-            # Apply row range filter
-            try:
-                start_row = max(0, int(self.start_row_var.get()) - 1)
-                end_row = int(self.end_row_var.get()) if self.end_row_var.get() else len(df)
-                df = df.iloc[start_row:end_row]
-            except ValueError as e:
-                self._show_error(f"Invalid row numbers: {str(e)}")
-                return
+                stream = keyed_specs()
+                if incremental and manifest.may_be_current(template_hash, output_path):
+                    # Only hash the whole deck up front when the last output could still be current;
+                    # the hashed specs are kept and exported from if anything changed
+                    job.report(0, estimated_cards, "Checking for changes...")
+                    items = list(stream)
+                    diff = manifest.diff([key for key, _ in items], template_hash, cards_per_page)
+                    if manifest.is_current(diff, output_path):
+                        return {'up_to_date': True}
+                    stream = iter(items)
             
-            if df.empty:
-                self._show_error("No records match the filter criteria")
-                return
+                # Pages are planned as the pool reads ahead: (hashes, stored page to replay or None)
+                page_plan = deque()
+                # Hashes already computed for the pages are handed to the cache instead of recomputed
+                pass_keys = incremental and cache is not None
+                render_keys = deque()
             
-            # Get page size and calculate layout
-            page_size = self.page_sizes[self.size_var.get()]
-            layout = self._calculate_layout(card_width_mm, card_height_mm, page_size)
+                def specs_to_render():
+                    for page in count():
+                        page_items = list(islice(stream, cards_per_page))
+                        if not page_items:
+                            return
+                        page_keys = [key for key, _ in page_items]
+                        if pages is not None and pages.page_keys(page) == page_keys:
+                            page_plan.append((page_keys, page))
+                            continue
+                        page_plan.append((page_keys, None))
+                        for key, spec in page_items:
+                            if pass_keys:
+                                render_keys.append(key)
+                            yield spec
             
-            # Create temporary directory for card images
-            temp_dir = tempfile.mkdtemp()
+                results = pool.imap(
+                    specs_to_render(),
+                    cache=cache,
+                    # The pool takes each spec's hash right after the spec, so it is always queued
+                    keys=(render_keys.popleft() for _ in count()) if pass_keys else None
+                )
+                # At most one result is read ahead, to make the pool plan the next pages
+                waiting = deque()
             
-            try:
-                # Create PDF
-                c = canvas.Canvas(self.path_var.get(), pagesize=page_size)
-                
-                # Process cards
-                total_cards = len(df)
-                cards_on_current_page = 0
-                cards_per_page = layout['cards_per_page']
-                total_pages = math.ceil(total_cards / cards_per_page)
-                current_page = 1
-                successful_cards = 0
-                
-                for index, row in df.iterrows():
-                    # Check if we need a new page before processing the next card
-                    if cards_on_current_page >= cards_per_page:
-                        c.showPage()
-                        current_page += 1
-                        cards_on_current_page = 0
-                    
-                    # Update progress
-                    progress = (index - start_row + 1) / total_cards
-                    self.progress_bar.set(progress)
-                    self.progress_label.configure(
-                        text=f"Processing card {index - start_row + 1} of {total_cards}"
-                    )
-                    self.update()
-                    
-                    try:
-                        # Generate card image
-                        card_data = template_data.copy()
-                        self._apply_mappings(card_data, row)
-                        
-                        # Generate temporary image file
-                        temp_image_path = os.path.join(temp_dir, f"card_{index}.png")
-                        result_path = self._generate_card_image(card_data, temp_image_path)
-                        
-                        if not result_path or not os.path.exists(result_path):
-                            print(f"Failed to generate image for card {index}")
-                            continue
-                        
-                        # Calculate position on page
-                        row_num = (cards_on_current_page // layout['cards_per_row'])
-                        col_num = (cards_on_current_page % layout['cards_per_row'])
-                        
-                        # Adjust column number for RTL layout
-                        if self.direction_var.get() == "rtl":
-                            col_num = layout['cards_per_row'] - 1 - col_num
-                        
-                        # Calculate x and y positions in points (72 points per inch)
-                        x = (layout['margin'] + col_num * (layout['card_width'] + layout['h_spacing'])) * 72 / 25.4
-                        y = (page_size[1] * 25.4 / 72 - (layout['margin'] + (row_num + 1) * layout['card_height'] + row_num * layout['v_spacing'])) * 72 / 25.4
-                        
-                        # Add image to PDF
+                card_keys = []
+                reused_pages = 0
+                while True:
+                    job.check_cancelled()
+                    if not page_plan:
                         try:
-                            img = ImageReader(result_path)
-                            c.drawImage(
-                                img,
-                                x, y,
-                                width=card_width_mm * 72 / 25.4,
-                                height=card_height_mm * 72 / 25.4,
-                                preserveAspectRatio=True
-                            )
-                            
-                            cards_on_current_page += 1
-                            successful_cards += 1
-                            
-                        except Exception as e:
-                            print(f"Error adding image to PDF: {e}")
-                            continue
-                        
-                    except Exception as e:
-                        print(f"Error processing card {index}: {e}")
+                            waiting.append(next(results))
+                        except StopIteration:
+                            if not page_plan:
+                                break
                         continue
                 
-                # Save the final PDF
-                if cards_on_current_page > 0:
-                    c.showPage()
-                c.save()
-                
-                self.progress_bar.set(1)
-                self.progress_label.configure(text="Export completed!")
-                
-                if successful_cards > 0:
-                    tk.messagebox.showinfo(
-                        "Success",
-                        f"PDF exported successfully!\n"
-                        f"Total pages: {total_pages}\n"
-                        f"Total cards: {successful_cards}"
-                    )
-                else:
-                    self._show_error("No cards were successfully generated")
+                    page_keys, stored_page = page_plan.popleft()
+                    page = len(card_keys) // cards_per_page
+                    if stored_page is not None:
+                        page_results = pages.load_page(stored_page)
+                        reused_pages += 1
+                    else:
+                        page_results = []
+                        for _ in page_keys:
+                            # Leaving the pool drops every card still queued
+                            job.check_cancelled()
+                            page_results.append(waiting.popleft() if waiting else next(results))
+                            job.report(len(card_keys) + len(page_results),
+                                       max(estimated_cards, len(card_keys) + len(page_results)))
+                        if pages is not None:
+                            pages.save_page(page, page_keys, page_results)
                 
-            finally:
-                # Clean up temporary files
-                try:
-                    shutil.rmtree(temp_dir, ignore_errors=True)
-                except Exception as e:
-                    print(f"Error cleaning up temporary files: {e}")
+                    for key, result in zip(page_keys, page_results):
+                        card_keys.append(key)
+                        self._add_result(writer, result, len(card_keys))
+                    job.report(len(card_keys), max(estimated_cards, len(card_keys)))
+            
+            total_cards = len(card_keys)
+            if total_cards == 0:
+                raise ExportError("No records match the filter criteria")
+            
+            # Save the final PDF
+            job.check_cancelled()
+            job.report(total_cards, total_cards, "Saving PDF...")
+            writer.finish()
+        finally:
+            writer.abort()
+        
+        diff = None
+        if manifest is not None:
+            # Pages past the end of a shorter deck can never be replayed
+            pages.discard_from(-(-total_cards // cards_per_page))
+            diff = manifest.diff(card_keys, template_hash, cards_per_page)
+            if writer.cards_written == total_cards:
+                manifest.save(card_keys, template_hash, cards_per_page, output_path)
         
+        return {
+            'up_to_date': False,
+            'pages': writer.pages_written,
+            'cards': writer.cards_written,
+            'reused_pages': reused_pages,
+            'diff': diff
+        }
+    
+    def _add_result(self, writer: CardSheetWriter, result, card_number: int = None):
+        """Place one card on the sheet, skipping cards that failed to render"""
+        if result is None:
+            if card_number is not None:
+                print(f"Failed to generate image for card {card_number}")
+            return
+        try:
+            writer.add_rendered(result)
         except Exception as e:
-            self._show_error(f"Export failed: {str(e)}")
-            traceback.print_exc()
-        finally:
-            self.progress_bar.set(0)
-            self.progress_label.configure(text="Ready")
+            print(f"Error adding card {card_number} to PDF: {e}")
+    
+    def _on_export_progress(self, progress: ExportProgress):
+        """Show export progress, throughput and time left"""
+        self.progress_bar.set(progress.fraction)
+        self.progress_label.configure(text=progress.describe())
+    
+    def _on_export_done(self, result: dict):
+        """Report a finished export"""
+        self._reset_export_controls()
+        if result['up_to_date']:
+            tk.messagebox.showinfo("Up to date", "Nothing changed since the last export.")
+            return
+        
+        if result['cards'] > 0:
+            diff = result['diff']
+            tk.messagebox.showinfo(
+                "Success",
+                f"PDF exported successfully!\n"
+                f"Total pages: {result['pages']}\n"
+                f"Total cards: {result['cards']}"
+                + (f"\nChanged: {len(diff.changed_cards)} cards on {len(diff.changed_pages)} pages"
+                   if diff is not None else "")
+                + (f"\nReused: {result['reused_pages']} unchanged pages"
+                   if result['reused_pages'] else "")
+            )
+        else:
+            self._show_error("No cards were successfully generated")
+    
+    def _on_export_error(self, error: Exception):
+        """Report a failed export"""
+        self._reset_export_controls()
+        if isinstance(error, ExportError):
+            self._show_error(str(error))
+        else:
+            self._show_error(f"Export failed: {str(error)}")
+    
+    def _on_export_cancelled(self):
+        """Report a cancelled export; incremental exports keep finished pages for the next run"""
+        self._reset_export_controls()
+        if self.incremental_var.get():
+            self.progress_label.configure(text="Export cancelled - finished pages will be reused")
+        else:
+            self.progress_label.configure(text="Export cancelled")
+    
+    def _reset_export_controls(self):
+        self.export_button.configure(text="Generate PDF", command=self._start_export, state="normal")
+        self.progress_bar.set(0)
+        self.progress_label.configure(text="Ready")
+    
     def _validate_export(self) -> bool:
         """Validate export configuration"""
         if self.template_var.get() == "Select template...":
@@ -613,111 +758,3 @@ def _validate_export(self) -> bool:
     def _show_error(self, message: str):
         """Show error message"""
         tk.messagebox.showerror("Error", message)
-    
-    def _apply_mappings(self, card_data: dict, row: pd.Series):
-        """Apply data mappings to card data"""
-        try:
-            mappings = card_data.get('data_source', {}).get('mappings', {})
-            available_columns = row.index.tolist()
-            
-            for element_id, mapping in mappings.items():
-                mapping_type = mapping['type']
-                
-                if mapping_type == 'direct':
-                    # Handle direct mapping (existing code)
-                    column = mapping['column']
-                    if column not in available_columns:
-                        print(f"Warning: Column '{column}' not found in data")
-                        continue
-                    
-                    value = str(row[column]) if pd.notna(row[column]) else ""
-                    if not value:
-                        continue
-                    
-                    for element in card_data['elements']:
-                        if element['id'] == element_id and element['type'] == 'text':
-                            element['properties']['text'] = value
-                        elif element['id'] == element_id and element['type'] == 'qrcode':
-                            element['properties']['content'] = value
-                            break
-                
-                elif mapping_type == 'conditional':
-                    # Handle conditional mapping
-                    conditions = mapping.get('conditions', [])
-                    matched_value = None
-                    
-                    for condition in conditions:
-                        column = condition['column']
-                        operator = condition['operator']
-                        test_value = condition['value']
-                        result = condition['result']
-                        
-                        if column not in available_columns:
-                            continue
-                        
-                        cell_value = str(row[column]) if pd.notna(row[column]) else ""
-                        
-                        # Evaluate condition based on operator
-                        condition_met = False
-                        try:
-                            if operator == 'equals':
-                                condition_met = cell_value == test_value
-                            elif operator == 'not equals':
-                                condition_met = cell_value != test_value
-                            elif operator == 'contains':
-                                condition_met = test_value.lower() in cell_value.lower()
-                            elif operator == 'greater than':
-                                condition_met = float(cell_value) > float(test_value)
-                            elif operator == 'less than':
-                                condition_met = float(cell_value) < float(test_value)
-                        except (ValueError, TypeError):
-                            print(f"Warning: Could not evaluate condition for column '{column}'")
-                            continue
-                        
-                        if condition_met:
-                            # Handle both direct value and macro expressions
-                            result = result.replace("${ASSETS}", str(self.config.ASSETS_PATH))
-                            if '${' in result:
-                                # Handle macro expression
-                                matched_value = result
-                                # Then handle data column macros
-                                for col in available_columns:
-                                    col_value = str(row[col]) if pd.notna(row[col]) else ""
-                                    matched_value = matched_value.replace(f"${{{col}}}", col_value)
-                            else:
-                                # Handle direct value
-                                matched_value = result
-                            break
-                    
-                    # Apply matched value if found
-                    if matched_value is not None:
-                        for element in card_data['elements']:
-                            if element['id'] == element_id:
-                                if element['type'] == 'text':
-                                    element['properties']['text'] = matched_value
-                                elif element['type'] == 'image':
-                                    element['properties']['path'] = matched_value
-                                break
-                
-                elif mapping_type == 'macro':
-                    # Handle macro mapping
-                    expression = mapping['expression']
-                    # Convert PosixPath to string when replacing ${ASSETS}
-                    expression = expression.replace("${ASSETS}", str(self.config.ASSETS_PATH))
-                    print("expression", expression)
-                    # Then handle data column macros
-                    for column in available_columns:
-                        col_value = str(row[column]) if pd.notna(row[column]) else ""
-                        expression = expression.replace(f"${{{column}}}", col_value)
-                        
-                    print("expression final", expression)
-                    
-                    for element in card_data['elements']:
-                        if element['id'] == element_id and element['type'] == 'image':
-                            element['properties']['path'] = expression
-                            break
-        
-        except Exception as e:
-            print(f"Error applying mappings: {e}")
-            import traceback
-            traceback.print_exc()
@@ -0,0 +1,286 @@
+import sys
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+
+# Rows materialised beyond the viewport, so a partly visible last row and small resizes never show blanks
+DEFAULT_BUFFER_ROWS = 5
+DEFAULT_ROW_HEIGHT = 20
+
+def format_cell(value) -> str:
+    """Text shown for one cell; missing values show as empty"""
+    if value is None:
+        return ""
+    try:
+        if pd.isna(value):
+            return ""
+    except (TypeError, ValueError):
+        pass
+    return str(value)
+
+class VirtualTable:
+    """Show a DataFrame in a Treeview while only materialising the rows in view
+
+    The Treeview holds a fixed pool of slot items, one per visible row plus a
+    small buffer. Scrolling moves an offset into the DataFrame and rewrites the
+    slots' values, so opening or scrolling a sheet costs the same for 100 rows
+    as for 100k. The DataFrame stays the source of truth; selection is kept as
+    row positions because the slot items are reused.
+
+    An optional sorted array of row positions limits the view to those rows
+    (e.g. search results); offsets count over the view, and everything else
+    takes and returns DataFrame row positions.
+    """
+
+    def __init__(self, tree, y_scroll, number_column: str = "No.", buffer_rows: int = DEFAULT_BUFFER_ROWS):
+        self.tree = tree
+        self.y_scroll = y_scroll
+        self.number_column = number_column
+        self.buffer_rows = buffer_rows
+
+        self.data: Optional[pd.DataFrame] = None
+        self.rows: Optional[np.ndarray] = None
+        self.offset = 0
+        self.selected = set()
+
+        self._slots: List[str] = []
+        self._row_height = DEFAULT_ROW_HEIGHT
+        self._header_height = DEFAULT_ROW_HEIGHT
+        self._filling = False
+
+        self.y_scroll.configure(command=self._on_scrollbar)
+        self.tree.configure(yscrollcommand="")
+        self.tree.bind('<Configure>', lambda e: self.refresh(), add="+")
+        self.tree.bind('<<TreeviewSelect>>', self._on_select, add="+")
+        self.tree.bind('<Up>', lambda e: self._on_arrow(-1))
+        self.tree.bind('<Down>', lambda e: self._on_arrow(1))
+        self.tree.bind('<Prior>', lambda e: self._on_page(-1))
+        self.tree.bind('<Next>', lambda e: self._on_page(1))
+        if sys.platform.startswith("linux"):
+            self.tree.bind('<Button-4>', lambda e: self._scroll_units(-3))
+            self.tree.bind('<Button-5>', lambda e: self._scroll_units(3))
+        else:
+            self.tree.bind('<MouseWheel>', self._on_mousewheel)
+
+    @property
+    def row_count(self) -> int:
+        """Rows in the view"""
+        if self.rows is not None:
+            return len(self.rows)
+        return len(self.data) if self.data is not None else 0
+
+    @property
+    def visible_rows(self) -> int:
+        """Rows that fit in the Treeview's current height"""
+        height = self.tree.winfo_height() - self._header_height
+        return max(1, height // max(1, self._row_height))
+
+    def set_data(self, data: Optional[pd.DataFrame], keep_position: bool = False,
+                 rows: Optional[np.ndarray] = None):
+        """Show a new DataFrame, or only some of its rows, resetting columns, scroll position and selection"""
+        self.data = data
+        self.rows = rows
+        self.selected = set()
+        if not keep_position:
+            self.offset = 0
+
+        columns = [self.number_column] + (list(data.columns) if data is not None else [])
+        self._clear_slots()
+        self.tree["columns"] = columns
+        self.tree["show"] = "headings"
+        self.tree.heading(self.number_column, text=self.number_column)
+        self.tree.column(self.number_column, width=50, anchor="center")
+        if data is not None:
+            for column in data.columns:
+                self.tree.heading(column, text=column)
+                self.tree.column(column, width=100)
+        self.refresh()
+
+    def set_rows(self, rows: Optional[np.ndarray]):
+        """Limit the view to sorted row positions, or show every row again with None"""
+        self.rows = rows
+        self.offset = 0
+        self.selected = set()
+        self.refresh()
+
+    def clear(self):
+        """Show nothing"""
+        self.set_data(None)
+        self.tree["columns"] = []
+
+    def refresh(self):
+        """Rewrite the slots for the current offset, e.g. after the DataFrame changed"""
+        if self._filling:
+            return
+        self._filling = True
+        try:
+            self._fill()
+        finally:
+            self._filling = False
+
+    def row_of(self, item: str) -> Optional[int]:
+        """DataFrame row position shown by a Treeview item, or None for an empty slot"""
+        try:
+            view = self.offset + self._slots.index(item)
+        except ValueError:
+            return None
+        return self._row_at(view)
+
+    def item_of(self, row: int) -> Optional[str]:
+        """Treeview item currently showing a row, or None when it is scrolled out of view"""
+        view = self._view_of(row)
+        if view is None:
+            return None
+        slot = view - self.offset
+        if 0 <= slot < len(self._slots):
+            return self._slots[slot]
+        return None
+
+    def selected_rows(self) -> List[int]:
+        """Selected row positions, including ones scrolled out of view"""
+        total = len(self.data) if self.data is not None else 0
+        return sorted(row for row in self.selected if row < total)
+
+    def select(self, rows: List[int]):
+        """Replace the selection"""
+        self.selected = set(rows)
+        self._sync_selection()
+
+    def see(self, row: int):
+        """Scroll so a row is inside the viewport, if it is in the view"""
+        view = self._view_of(row)
+        if view is None:
+            return
+        visible = self.visible_rows
+        if view < self.offset:
+            self._scroll_to(view)
+        elif view >= self.offset + visible:
+            self._scroll_to(view - visible + 1)
+
+    def _row_at(self, view: int) -> Optional[int]:
+        """DataFrame row position at a view position"""
+        if not 0 <= view < self.row_count:
+            return None
+        return int(self.rows[view]) if self.rows is not None else view
+
+    def _view_of(self, row: int) -> Optional[int]:
+        """View position of a DataFrame row, or None when the view leaves it out"""
+        if self.rows is None:
+            return row if 0 <= row < self.row_count else None
+        view = int(np.searchsorted(self.rows, row))
+        if view < len(self.rows) and self.rows[view] == row:
+            return view
+        return None
+
+    def _fill(self):
+        total = self.row_count
+        visible = self.visible_rows
+        self.offset = max(0, min(self.offset, total - visible))
+        page = visible + self.buffer_rows
+
+        # Grow or shrink the slot pool to fit the viewport
+        while len(self._slots) < page:
+            self._slots.append(self.tree.insert("", "end", iid=f"slot{len(self._slots)}", values=[]))
+        while len(self._slots) > page:
+            self.tree.delete(self._slots.pop())
+
+        if self.data is None:
+            window_rows = np.arange(0)
+        elif self.rows is not None:
+            window_rows = self.rows[self.offset:self.offset + page]
+        else:
+            window_rows = np.arange(self.offset, min(self.offset + page, total))
+        window = self.data.iloc[window_rows].to_numpy(dtype=object) if len(window_rows) else []
+        for slot, item in enumerate(self._slots):
+            if slot < len(window):
+                # Numbered by position in the sheet, so search results keep their row numbers
+                row = int(window_rows[slot])
+                self.tree.item(item, values=[row + 1] + [format_cell(value) for value in window[slot]])
+            else:
+                self.tree.item(item, values=[])
+
+        # Slots are never scrolled natively; the offset does the scrolling
+        self.tree.yview_moveto(0)
+        self._sync_selection()
+        self._measure()
+        if total:
+            self.y_scroll.set(self.offset / total, min(1.0, (self.offset + visible) / total))
+        else:
+            self.y_scroll.set(0.0, 1.0)
+
+    def _measure(self):
+        """Take row and heading heights from the first slot once it is laid out"""
+        if not self._slots:
+            return
+        bbox = self.tree.bbox(self._slots[0])
+        if bbox:
+            self._header_height = bbox[1]
+            self._row_height = bbox[3]
+
+    def _clear_slots(self):
+        if self._slots:
+            self.tree.delete(*self._slots)
+        self._slots = []
+
+    def _sync_selection(self):
+        """Select the slots whose rows are selected"""
+        items = [self.item_of(row) for row in self.selected]
+        items = [item for item in items if item is not None]
+        self.tree.selection_set(items)
+
+    def _on_select(self, event):
+        """Fold the Treeview's selection of the visible slots into the row selection"""
+        selected_items = set(self.tree.selection())
+        for slot, item in enumerate(self._slots):
+            row = self._row_at(self.offset + slot)
+            if row is None:
+                continue
+            if item in selected_items:
+                self.selected.add(row)
+            else:
+                self.selected.discard(row)
+
+    def _scroll_to(self, offset: int):
+        offset = max(0, min(int(offset), self.row_count - self.visible_rows))
+        if offset != self.offset:
+            self.offset = offset
+            self.refresh()
+
+    def _scroll_units(self, units: int):
+        self._scroll_to(self.offset + units)
+        return "break"
+
+    def _on_mousewheel(self, event):
+        if sys.platform == "darwin":
+            units = -event.delta
+        else:
+            units = -int(event.delta / 40)
+        return self._scroll_units(units)
+
+    def _on_scrollbar(self, *args):
+        if args[0] == 'moveto':
+            self._scroll_to(round(float(args[1]) * self.row_count))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if len(args) > 2 and args[2] == 'pages':
+                amount *= self.visible_rows
+            self._scroll_to(self.offset + amount)
+
+    def _on_arrow(self, step: int):
+        """Move the focus a row at a time, scrolling at the viewport edges"""
+        row = self.row_of(self.tree.focus())
+        if row is None:
+            return None
+        target = self._row_at(self._view_of(row) + step)
+        if target is None:
+            return "break"
+        self.see(target)
+        item = self.item_of(target)
+        self.selected = {target}
+        self._sync_selection()
+        self.tree.focus(item)
+        return "break"
+
+    def _on_page(self, step: int):
+        self._scroll_to(self.offset + step * self.visible_rows)
+        return "break"